@@ -4,46 +4,87 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-import json, os, time
+from scroll_driver import scroll_to_end, expected_from
+from network_capture import enable_network_log, collect_json_responses, discover, SHABDA_KEY_RE
+from resource_blocking import ResourceBlocker
+from metrics import Metrics
+import json, os
+
+# ----------- SETTINGS -------------
+DISCOVERY_MODE = "network"  # "network" (read the list's JSON data) or "scroll" (scroll + parse DOM)
+OUTPUT_FILE = os.path.expanduser("~/Desktop/all_shabda_links.json")
+META_FILE = os.path.expanduser("~/Desktop/all_shabda_meta.json")
+BLOCK_TYPES = ("image", "font", "media")  # cancelled via DevTools; stylesheets stay, the list needs layout to scroll
+METRICS_FILE = os.path.expanduser("~/Desktop/shabda_links_metrics.prom")  # Prometheus text; ".json" for a JSON summary
+# ----------------------------------
+
+metrics = Metrics("shabda_links")
+metrics.start_exporter(METRICS_FILE, interval=10)
 
 # Setup headless browser
 options = Options()
 options.add_argument("--headless")
-driver = webdriver.Chrome(options=options)
+blocker = ResourceBlocker(BLOCK_TYPES) if BLOCK_TYPES else None
+if DISCOVERY_MODE == "network" or blocker:
+    enable_network_log(options)
+with metrics.stage("chrome_startup"):
+    driver = webdriver.Chrome(options=options)
+    if blocker:
+        blocker.install(driver)
 
 # Load the main page
-driver.get("https://ashtadhyayi.com/shabda")
-WebDriverWait(driver, 20).until(
-    EC.presence_of_element_located((By.CLASS_NAME, "list-group-content"))
-)
-
-# Scroll until all entries are loaded
-print("🔄 Scrolling to load all entries...")
-last_height = driver.execute_script("return document.body.scrollHeight")
-while True:
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(2)
-    new_height = driver.execute_script("return document.body.scrollHeight")
-    if new_height == last_height:
-        break
-    last_height = new_height
-
-print("✅ All shabda entries should be loaded.")
-
-# Parse and collect links
-soup = BeautifulSoup(driver.page_source, "html.parser")
-entries = soup.select('div[id^="shabdalist-entry-"]')
+with metrics.stage("driver_get"):
+    driver.get("https://ashtadhyayi.com/shabda")
+with metrics.stage("wait_list"):
+    WebDriverWait(driver, 20).until(
+        EC.presence_of_element_located((By.CLASS_NAME, "list-group-content"))
+    )
+
 links = []
-for e in entries:
-    data_nav = e.get("data-nav")
-    if data_nav:
-        links.append("https://ashtadhyayi.com" + data_nav)
+metadata = {}
+messages = []  # DevTools events seen while reading the list, for the blocking report
+if DISCOVERY_MODE == "network":
+    print("📡 Reading shabda list data from network responses...")
+    with metrics.stage("collect_network"):
+        payloads = collect_json_responses(driver, messages=messages)
+    with metrics.stage("discover"):
+        links, metadata = discover(payloads, SHABDA_KEY_RE, "https://ashtadhyayi.com/shabda/")
+    if not links:
+        print("⚠️ No shabda entries found in network responses, falling back to scrolling.")
 
+if not links:
+    # Scroll until the list stops growing
+    print("🔄 Scrolling to load all entries...")
+    with metrics.stage("scroll"):
+        scrolled = scroll_to_end(
+            driver, 'div[id^="shabdalist-entry-"]', ".list-group-content", expected=expected_from(OUTPUT_FILE)
+        )
+    print(f"{'✅' if scrolled.complete else '⚠️'} Loaded {scrolled.summary()}")
+
+    # Parse and collect links
+    with metrics.stage("parse"):
+        soup = BeautifulSoup(driver.page_source, "html.parser")
+        entries = soup.select('div[id^="shabdalist-entry-"]')
+        for e in entries:
+            data_nav = e.get("data-nav")
+            if data_nav:
+                links.append("https://ashtadhyayi.com" + data_nav)
+
+if blocker:
+    stats = blocker.page_stats(driver, messages)
+    print(f"🧱 Blocked {stats['blocked']} of {stats['requests']} requests; {stats['loaded_bytes'] / 1024:.0f} KB loaded")
 driver.quit()
 
 # Save to JSON
-output_file = os.path.expanduser("~/Desktop/all_shabda_links.json")
-with open(output_file, "w", encoding="utf-8") as f:
-    json.dump(links, f, indent=2)
+with metrics.stage("write"):
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        json.dump(links, f, indent=2)
+
+    if metadata:
+        with open(META_FILE, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        print(f"🗂️ Per-entry metadata saved to:\n→ {META_FILE}")
+metrics.close()
+print(metrics.report())
 
-print(f"✅ Extracted {len(links)} shabda links. Saved to:\n→ {output_file}")
+print(f"✅ Extracted {len(links)} shabda links. Saved to:\n→ {OUTPUT_FILE}")
@@ -0,0 +1,66 @@
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from concurrent.futures import ThreadPoolExecutor
+from driver_pool import DriverPool, build_options
+import os
+import json
+import time
+
+# Compares the old "new Chrome per link" scraping against the shared DriverPool.
+
+# ----------- SETTINGS -------------
+LINK_FILE = os.path.expanduser("~/Desktop/all_shabda_links.json")
+SAMPLE_SIZE = 30
+MAX_THREADS = 5
+WAIT_TIME = 40
+READY_SELECTOR = ".table-bordered"
+# ----------------------------------
+
+with open(LINK_FILE, "r", encoding="utf-8") as f:
+    links = json.load(f)[:SAMPLE_SIZE]
+
+
+def load(driver, link):
+    driver.get(link)
+    WebDriverWait(driver, WAIT_TIME).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, READY_SELECTOR))
+    )
+
+
+def cold_one(link):
+    driver = webdriver.Chrome(options=build_options())
+    try:
+        load(driver, link)
+    finally:
+        driver.quit()
+
+
+def run(label, fn):
+    start = time.perf_counter()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
+        for future in [executor.submit(fn, link) for link in links]:
+            try:
+                future.result()
+            except Exception:
+                failed += 1
+    elapsed = time.perf_counter() - start
+    rate = len(links) / elapsed
+    print(f"{label:<12} {len(links)} pages in {elapsed:7.1f}s → {rate:5.2f} pages/sec ({failed} failed)")
+    return rate
+
+
+print(f"⏱️ Benchmarking {len(links)} pages with {MAX_THREADS} threads...")
+cold_rate = run("per-link", cold_one)
+
+with DriverPool(size=MAX_THREADS) as pool:
+    def pooled_one(link):
+        with pool.driver() as driver:
+            load(driver, link)
+
+    pooled_rate = run("pooled", pooled_one)
+    print(f"🔁 Chrome starts: {pool.started} pooled vs {len(links)} per-link")
+
+print(f"✅ Speed-up: {pooled_rate / cold_rate:.1f}x")
@@ -0,0 +1,59 @@
+from dhatu_front_parser import parse_front_list, parse_front_list_find_previous, BACKENDS
+import dhatu_front_parser
+from multiprocessing import get_context
+import os
+import resource
+import sys
+import time
+
+# Single-pass front-list extraction against the original find_previous()
+# version, on the saved full dhatu list (fixtures/dhatu_list.html). Each
+# variant runs in a fresh process so peak RSS is its own; every variant must
+# produce exactly the entries the original does.
+
+# ----------- SETTINGS -------------
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "dhatu_list.html")
+REPEAT = 5  # parses per variant
+# ----------------------------------
+
+VARIANTS = {"find_previous": parse_front_list_find_previous}
+VARIANTS.update({f"one-pass {b}": (lambda html, b=b: parse_front_list(html, b)) for b in BACKENDS})
+
+
+def max_rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS, KB on Linux
+
+
+def run_variant(name, html, out):
+    parse = VARIANTS[name]
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        entries = parse(html)
+        timings.append(time.perf_counter() - start)
+    out.put((min(timings), sum(timings) / len(timings), max_rss_kb(), entries))
+
+
+if __name__ == "__main__":
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        html = f.read()
+    print(f"⏱️ {FIXTURE} ({len(html.encode('utf-8')) / 1024:.0f} KB), best/mean of {REPEAT} parses\n")
+    print(f"{'variant':<22} {'entries':>8} {'best ms':>9} {'mean ms':>9} {'RSS MB':>8} {'speedup':>8}  same output")
+
+    ctx = get_context("spawn")
+    reference = baseline = None
+    for name in VARIANTS:
+        if name.endswith("lxml") and dhatu_front_parser.lxml is None:
+            print(f"{name:<22} skipped (lxml not installed)")
+            continue
+        out = ctx.Queue()
+        proc = ctx.Process(target=run_variant, args=(name, html, out))
+        proc.start()
+        best, mean, rss, entries = out.get()
+        proc.join()
+        if reference is None:
+            reference, baseline = entries, best
+        same = entries == reference
+        print(f"{name:<22} {len(entries):8d} {best * 1000:9.1f} {mean * 1000:9.1f} {rss / 1024:8.1f} "
+              f"{baseline / best:7.1f}×  {'✅' if same else '❌'}")
@@ -0,0 +1,68 @@
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from concurrent.futures import ThreadPoolExecutor
+from driver_pool import DriverPool
+from fake_site import FakeSite, DATA_URLS
+from http_fetch import HttpFetcher, rebase_url
+from rate_control import AdaptiveThrottle
+from shabda_parser import parse_shabda_data
+import os
+import json
+import time
+
+# Offline throughput of the HTTP backend (the entry's JSON data, one page per
+# throttle slot, as in the scrapers) vs the Selenium path, both served by the
+# local fixture server so the numbers do not depend on the live site.
+
+# ----------- SETTINGS -------------
+LINK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "all_shabda_links.json")
+SAMPLE_SIZE = 500
+SELENIUM_SAMPLE_SIZE = 50
+LATENCY = 0.05  # simulated server latency per request (seconds)
+HTTP_THREADS = 20
+MAX_THREADS = 5
+INCLUDE_SELENIUM = True
+# ----------------------------------
+
+with open(LINK_FILE, "r", encoding="utf-8") as f:
+    links = json.load(f)[:SAMPLE_SIZE]
+
+with FakeSite(latency=LATENCY) as site:
+    print(f"🧪 Fixture server at {site.base_url} (latency {LATENCY * 1000:.0f} ms)")
+
+    throttle = AdaptiveThrottle(rate=1000, burst=HTTP_THREADS, initial=HTTP_THREADS, maximum=HTTP_THREADS)
+    with HttpFetcher(DATA_URLS["shabda"], concurrency=HTTP_THREADS, base_url=site.base_url,
+                     validate=parse_shabda_data) as http:
+        def fetch(link):
+            with throttle.request():
+                return http.fetch(link)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=HTTP_THREADS) as executor:
+            pages = list(executor.map(fetch, links))
+        elapsed = time.perf_counter() - start
+    ok = sum(1 for page in pages if page)
+    http_rate = ok / elapsed
+    print(f"⚡ http      {ok}/{len(links)} pages in {elapsed:6.2f}s → {http_rate:7.1f} pages/sec")
+
+    if INCLUDE_SELENIUM:
+        sample = links[:SELENIUM_SAMPLE_SIZE]
+        with DriverPool(size=MAX_THREADS) as pool:
+            def render(link):
+                with pool.driver() as driver:
+                    driver.get(rebase_url(link, site.base_url))
+                    WebDriverWait(driver, 20).until(
+                        EC.presence_of_element_located((By.CLASS_NAME, "table-bordered"))
+                    )
+                    return driver.page_source
+
+            # Warm the pool so Chrome start-up is not counted against the page rate
+            with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
+                list(executor.map(render, sample[:MAX_THREADS]))
+                start = time.perf_counter()
+                rendered = list(executor.map(render, sample))
+                elapsed = time.perf_counter() - start
+        selenium_rate = len(rendered) / elapsed
+        print(f"🌐 selenium  {len(rendered)}/{len(sample)} pages in {elapsed:6.2f}s → {selenium_rate:7.1f} pages/sec")
+        print(f"✅ HTTP fast path is {http_rate / selenium_rate:.1f}x faster")
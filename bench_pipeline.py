@@ -0,0 +1,81 @@
+from pipeline import Pipeline, start_parse_pool
+from shabda_parser import parse_shabda
+from dhatu_parser import parse_dhatu
+from functools import partial
+import glob
+import os
+import sys
+import time
+
+# Throughput and CPU use of the staged pipeline (pipeline.py) for different
+# numbers of parse processes, on the fixture pages. Fetching is simulated (a
+# sleep per page, like waiting on Chrome) so the numbers isolate how well
+# parsing keeps up; each configuration runs in a fresh subprocess so every
+# parse pool is forked from a single-threaded process, as in the scrapers.
+#
+#   python bench_pipeline.py [shabda|dhatu]
+
+# ----------- SETTINGS -------------
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAGES = {"shabda": 2000, "dhatu": 400}
+FETCH_THREADS = 10
+FETCH_LATENCY = 0.01  # seconds per simulated fetch
+QUEUE_SIZE = 32
+PROCESS_COUNTS = sorted({0, 1, 2, 4, os.cpu_count() or 1})
+# ----------------------------------
+
+PARSERS = {"shabda": partial(parse_shabda, backend="lxml"), "dhatu": parse_dhatu}
+
+
+def load_pages(kind):
+    paths = sorted(glob.glob(os.path.join(FIXTURE_DIR, kind, "*.html")))
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+
+def run(kind, processes):
+    parse_pool = start_parse_pool(processes)
+    pages = load_pages(kind)
+    jobs = iter(range(PAGES[kind]))
+    written = []
+
+    def next_job():
+        idx = next(jobs, None)
+        return None if idx is None else (idx, f"page-{idx}")
+
+    def fetch(idx, url):
+        time.sleep(FETCH_LATENCY)
+        return pages[idx % len(pages)]
+
+    def write(idx, url, parsed, error):
+        written.append(error is None)
+
+    cpu_before = os.times()
+    start = time.perf_counter()
+    pipeline = Pipeline(next_job, fetch, PARSERS[kind], write, fetch_workers=FETCH_THREADS,
+                        parse_pool=parse_pool, queue_size=QUEUE_SIZE).run()
+    elapsed = time.perf_counter() - start
+    if parse_pool is not None:
+        parse_pool.close()  # children's CPU time is only counted once they are reaped
+    cpu_after = os.times()
+    cpu = sum(after - before for after, before in zip(cpu_after[:4], cpu_before[:4]))
+    print(f"{processes:9d} {sum(written):7d} {sum(written) / elapsed:10.1f} {cpu / elapsed * 100:8.0f}% "
+          f"{pipeline.blocked_seconds:11.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:  # child: one configuration
+        run(sys.argv[1], int(sys.argv[2]))
+        sys.exit(0)
+
+    import subprocess
+
+    kind = sys.argv[1] if len(sys.argv) > 1 else "dhatu"
+    print(f"⏱️ {PAGES[kind]} {kind} pages, {FETCH_THREADS} fetch threads, {FETCH_LATENCY * 1000:.0f} ms per fetch, "
+          f"{os.cpu_count()} CPUs\n")
+    print(f"{'processes':>9} {'pages':>7} {'pages/s':>10} {'CPU':>9} {'blocked s':>11}")
+    for processes in PROCESS_COUNTS:
+        subprocess.run([sys.executable, os.path.abspath(__file__), kind, str(processes)], check=True)
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+from fake_site import FakeSite
+from rate_control import AdaptiveThrottle
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Simulation of the adaptive throttle against the local fixture server with
+# injected latency, errors, empty pages and a capacity limit past which the
+# server degrades. Compares fixed settings (old-style threads + sleep, and
+# "just use more threads") with the AIMD throttle. The deterministic checks of
+# the same behaviour (simulated clock and 429s) live in tests/test_rate_control.py.
+
+# ----------- SETTINGS -------------
+PAGES = 300
+LATENCY = 0.2
+JITTER = 0.05
+ERROR_RATE = 0.01
+EMPTY_RATE = 0.01
+CAPACITY = 8  # in-flight requests the fake server handles before degrading
+FIXED_THREADS = 5
+FIXED_SLEEP = 1.5
+MAX_THREADS = 32
+# ----------------------------------
+
+
+def fetch(url):
+    try:
+        with urllib.request.urlopen(url, timeout=10) as resp:
+            return resp.read()
+    except (urllib.error.URLError, OSError):
+        return None
+
+
+def run(label, site, threads, one):
+    urls = [f"{site.base_url}/shabda/@page{i}" for i in range(PAGES)]
+    site.requests = site.errors = 0
+    ok = [0]
+    lock = threading.Lock()
+
+    def task(url):
+        if one(url):
+            with lock:
+                ok[0] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(task, urls))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {ok[0]:4d}/{PAGES} ok  {PAGES / elapsed:6.1f} pages/sec  {site.errors:4d} server errors")
+
+
+def fixed_one(url, sleep):
+    body = fetch(url)
+    time.sleep(sleep)
+    return bool(body)
+
+
+with FakeSite(latency=LATENCY, jitter=JITTER, error_rate=ERROR_RATE,
+              empty_rate=EMPTY_RATE, capacity=CAPACITY) as site:
+    print(f"🧪 {PAGES} pages, {LATENCY * 1000:.0f}±{JITTER * 1000:.0f} ms, {ERROR_RATE:.0%} errors, "
+          f"{EMPTY_RATE:.0%} empty, degrades above {CAPACITY} in flight\n")
+
+    run(f"fixed {FIXED_THREADS} + {FIXED_SLEEP}s sleep", site, FIXED_THREADS, lambda url: fixed_one(url, FIXED_SLEEP))
+    run(f"fixed {MAX_THREADS}, no sleep", site, MAX_THREADS, lambda url: fixed_one(url, 0))
+
+    throttle = AdaptiveThrottle(rate=100, burst=4, initial=2, maximum=MAX_THREADS,
+                                target_latency=LATENCY * 2, cooldown=LATENCY * 2)
+    limits = []
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.25):
+            limits.append(throttle.snapshot()["limit"])
+
+    def adaptive_one(url):
+        with throttle.request() as ticket:
+            body = fetch(url)
+            if not body:
+                ticket.failed("error or empty page")
+        return bool(body)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    run("adaptive (AIMD)", site, MAX_THREADS, adaptive_one)
+    done.set()
+
+    stats = throttle.snapshot()
+    print(f"\n🚦 Limit over time: {' '.join(map(str, limits))}")
+    print(f"🚦 {stats['decreases']} back-offs, {stats['failures']} unhealthy responses, "
+          f"latency EWMA {stats['latency_ewma'] * 1000:.0f} ms")
+
+    # The overloaded server must have forced back-offs, and the limit never passes its cap
+    assert stats["decreases"] > 0, "throttle never backed off from the overloaded server"
+    assert max(limits, default=0) <= MAX_THREADS, f"limit exceeded {MAX_THREADS}: {max(limits)}"
+    print("✅ Throttle backed off under overload and stayed within its limits")
@@ -0,0 +1,70 @@
+from shabda_parser import parse_shabda, BACKENDS
+from multiprocessing import get_context
+import glob
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+# Parse time per page and peak memory for each shabda parser backend, measured
+# on saved pages in fixtures/. Each backend runs in a fresh process so the
+# peak-RSS numbers do not bleed into one another (tracemalloc only sees Python
+# allocations, so RSS is the figure to compare for lxml).
+
+# ----------- SETTINGS -------------
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+REPEAT = 200  # parses per fixture page
+# ----------------------------------
+
+
+def load_pages():
+    paths = [os.path.join(FIXTURE_DIR, "shabda_page.html")]
+    paths += sorted(glob.glob(os.path.join(FIXTURE_DIR, "shabda", "*.html")))
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+
+def max_rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS, KB on Linux
+
+
+def run_backend(backend, pages, out):
+    parse_shabda(pages[0], backend)  # imports, compiled XPaths
+    rss_before = max_rss_kb()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for html in pages:
+            parse_shabda(html, backend)
+    elapsed = time.perf_counter() - start
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = max_rss_kb()
+    out.put((backend, elapsed / (REPEAT * len(pages)), py_peak, rss_after - rss_before))
+
+
+if __name__ == "__main__":
+    pages = load_pages()
+    reference = parse_shabda(pages[0], "html.parser")
+    size_kb = sum(len(html.encode("utf-8")) for html in pages) / len(pages) / 1024
+    print(f"⏱️ {len(pages)} fixture page(s), avg {size_kb:.0f} KB, {REPEAT} parses each\n")
+    print(f"{'backend':<12} {'ms/page':>9} {'py peak KB':>11} {'RSS +KB':>9}  same output")
+
+    ctx = get_context("spawn")
+    for backend in BACKENDS:
+        try:
+            same = parse_shabda(pages[0], backend) == reference
+        except ImportError as e:
+            print(f"{backend:<12} skipped ({e})")
+            continue
+        out = ctx.Queue()
+        proc = ctx.Process(target=run_backend, args=(backend, pages, out))
+        proc.start()
+        name, per_page, py_peak, rss_delta = out.get()
+        proc.join()
+        print(f"{name:<12} {per_page * 1000:9.3f} {py_peak / 1024:11.0f} {rss_delta:9d}  {'✅' if same else '❌'}")
@@ -0,0 +1,69 @@
+from coordinator import Coordinator, CoordinatorServer
+from fake_site import FakeSite, DATA_URLS
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# End-to-end check of the sharded crawl on one machine: a coordinator, several
+# crawl_worker.py processes and the local fixture server. One worker is killed
+# part-way through; its leases must be reassigned and the merged corpus must
+# still contain every link exactly once, in the original order.
+
+# ----------- SETTINGS -------------
+HERE = os.path.dirname(os.path.abspath(__file__))
+KIND = "shabda"  # or "dhatu"
+SAMPLE_SIZE = 600
+SHARDS = 8
+WORKERS = 4
+LATENCY = 0.05  # simulated server latency per request (seconds)
+KILL_AFTER = 0.3  # kill one worker once this share of the links is done
+WORKER_TIMEOUT = 3
+# ----------------------------------
+
+with open(os.path.join(HERE, f"all_{KIND}_links.json"), "r", encoding="utf-8") as f:
+    links = json.load(f)[:SAMPLE_SIZE]
+
+with tempfile.TemporaryDirectory() as tmp, FakeSite(latency=LATENCY) as site:
+    coordinator = Coordinator(KIND, links, os.path.join(tmp, "state"), shards=SHARDS,
+                              lease_seconds=30, worker_timeout=WORKER_TIMEOUT)
+    with CoordinatorServer(coordinator, host="127.0.0.1", port=0) as server:
+        print(f"🧪 {len(links)} {KIND} links, {SHARDS} shards, {WORKERS} workers, "
+              f"fixture server at {site.base_url} ({LATENCY * 1000:.0f} ms)")
+        start = time.perf_counter()
+        env = dict(os.environ, PYTHONUNBUFFERED="1", SCRAPER_SETTINGS=json.dumps({
+            "HTTP_DATA_URLS": DATA_URLS, "MAX_REQUESTS_PER_SEC": 100.0,  # the fake site needs no politeness
+        }))
+        workers = [
+            subprocess.Popen([sys.executable, os.path.join(HERE, "crawl_worker.py"), server.base_url, site.base_url],
+                             cwd=HERE, env=env, stdout=subprocess.DEVNULL)
+            for _ in range(WORKERS)
+        ]
+
+        killed = False
+        while coordinator.has_work():
+            time.sleep(0.2)
+            if not killed and coordinator.counts()["done"] >= KILL_AFTER * len(links):
+                workers[0].kill()
+                killed = True
+                print(f"💥 Killed worker pid {workers[0].pid} at {coordinator.counts()['done']} pages")
+        elapsed = time.perf_counter() - start
+        for process in workers:
+            process.wait(timeout=60)
+
+    merged = os.path.join(tmp, f"{KIND}_records.jsonl")
+    written = coordinator.merge(merged)
+    with open(merged, "r", encoding="utf-8") as f:
+        order = [(record["idx"], record["url"]) for record in map(json.loads, f)]
+
+    status = coordinator.status()
+    per_shard = [counts["done"] for counts in status["shards"]]
+    print(f"⏱️ {written} pages in {elapsed:.1f}s → {written / elapsed:.1f} pages/sec")
+    print(f"🧩 Per-shard pages: {per_shard}; {status['reassigned']} leases reassigned from the dead worker")
+    # worker_name() is "<host>-<pid>-<thread>": the live workers kept heartbeating and must not be reaped
+    reaped_pids = {int(name.rsplit("-", 2)[1]) for name in status["reaped"]}
+    assert reaped_pids == {workers[0].pid}, f"reaped {status['reaped']}, expected only pid {workers[0].pid}"
+    assert order == list(enumerate(links)), "merged corpus is incomplete or out of order"
+    print("✅ Only the killed worker was reaped; merged corpus has every link exactly once, in link order")
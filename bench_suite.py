@@ -0,0 +1,329 @@
+from fake_site import FakeSite, FIXTURE_DIR, DATA_URLS
+from multiprocessing import get_context
+from page_cache import PageCache
+from urllib.parse import urlsplit
+import glob
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Offline benchmark suite. Everything runs against the recorded pages in
+# fixtures/ (shabda and dhatu pages, both list pages) served by the local fake
+# site with configurable latency, so numbers are repeatable and the live site
+# is never touched.
+#
+#   pipelines  multishabdhas.py, dhatulinkscontent.py and dhatufrontcontent.py,
+#              run unmodified as subprocesses with their settings pointed at temp
+#              files and the fake site via SCRAPER_SETTINGS:
+#                :http-json   HTTP backend: fetches each entry's JSON data and reads
+#                             it with parse_*_data; no HTML is parsed
+#                :html-cache  the recorded HTML pages, preloaded into the page
+#                             cache and re-parsed with CACHE_ONLY: the HTML parse
+#                             path through the parse pool and writer, no network
+#                :selenium    rendered in Chrome (only when Chrome is installed;
+#                             dhatufrontcontent.py is Selenium only)
+#   parsers    parse_shabda per backend, parse_dhatu and parse_front_list (plus
+#              the original find_previous extraction) on the recorded HTML, and
+#              parse_*_data on the JSON payloads, each in a fresh process
+#
+# Reports pages/sec, p50/p95 latency and peak RSS per benchmark, saves them to
+# RESULTS_FILE and, given a BASELINE_FILE from an earlier run, flags anything
+# that got worse by more than REGRESSION_TOLERANCE.
+
+# ----------- SETTINGS -------------
+HERE = os.path.dirname(os.path.abspath(__file__))
+LATENCY = 0.05  # simulated server latency per request (seconds)
+JITTER = 0.02
+SHABDA_PAGES = 300
+DHATU_PAGES = 150
+SELENIUM_PAGES = 40  # per Selenium pipeline; Chrome is far slower
+PARSE_SECONDS = 2.0  # wall time budget per parser micro-benchmark
+INCLUDE_SELENIUM = None  # None = only if a Chrome binary is found
+RESULTS_FILE = os.path.join(HERE, "bench_results.json")
+BASELINE_FILE = None  # e.g. a previous bench_results.json
+REGRESSION_TOLERANCE = 0.15  # 15% slower / bigger counts as a regression
+# ----------------------------------
+
+
+def max_rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS, KB on Linux
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+def chrome_available():
+    binaries = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+    return any(shutil.which(b) for b in binaries) or os.path.exists("/Applications/Google Chrome.app")
+
+
+# ---- Pipelines ----
+def sample_links(kind, count, base_url):
+    # Recorded keys first so every fixture page is exercised, then the rest of the list
+    with open(os.path.join(HERE, f"all_{kind}_links.json"), "r", encoding="utf-8") as f:
+        links = json.load(f)
+    recorded = {os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(FIXTURE_DIR, kind, "*.html"))}
+    keyed = sorted(links, key=lambda link: link.rsplit("/", 1)[-1] not in recorded)
+    return [base_url + "/" + kind + "/" + link.rsplit("/", 1)[-1] for link in keyed[:count]]
+
+
+def run_script(script, settings, timeout=900):
+    # Runs a scraper unmodified with overridden settings; returns (seconds, peak RSS KB, exit code, output)
+    env = dict(os.environ, SCRAPER_SETTINGS=json.dumps(settings), PYTHONUNBUFFERED="1")
+    log = tempfile.TemporaryFile()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(HERE, script)], cwd=HERE, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + timeout
+    while True:
+        pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if time.time() > deadline:
+            proc.kill()
+            pid, status, usage = os.wait4(proc.pid, 0)
+            break
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    log.seek(0)
+    output = log.read().decode("utf-8", errors="replace")
+    rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return elapsed, rss, proc.returncode, output
+
+
+def count_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def bench_scrape_pipeline(name, script, kind, backend, pages, site, tmp):
+    links = sample_links(kind, pages, site.base_url)
+    work = os.path.join(tmp, name)
+    os.makedirs(work)
+    link_file = os.path.join(work, "links.json")
+    with open(link_file, "w", encoding="utf-8") as f:
+        json.dump(links, f)
+    metrics_file = os.path.join(work, "metrics.json")
+    records = os.path.join(work, "records.jsonl")
+    cache_dir = None
+    if backend == "html-cache":
+        # What the fake site serves for each link: its recorded page, or the kind's generic one
+        cache_dir = os.path.join(work, "cache")
+        cache = PageCache(cache_dir)
+        for link in links:
+            cache.put(link, site.resolve(urlsplit(link).path)[0].decode("utf-8"))
+    settings = {
+        "STATE_DB": os.path.join(work, "state.sqlite"),
+        "RECORDS_JSONL": records,
+        "CACHE_DIR": cache_dir,
+        "CACHE_ONLY": cache_dir is not None,
+        "FETCH_BACKEND": "selenium" if backend == "selenium" else "http",
+        "HTTP_BASE_URL": None,  # links already point at the fake site
+        "HTTP_DATA_URL": DATA_URLS[kind] if backend == "http-json" else None,
+        "METRICS_FILE": metrics_file,
+        "MAX_REQUESTS_PER_SEC": 1000.0,
+        "START_CONCURRENCY": 5,
+        "MAX_ATTEMPTS": 1,
+    }
+    if kind == "shabda":
+        settings.update(LINK_FILE=link_file, OUTPUT_FILE=os.path.join(work, "output.txt"),
+                        FAILED_JSON=os.path.join(work, "failed.json"))
+    else:
+        settings.update(INPUT_JSON=link_file, OUTPUT_DIR=os.path.join(work, "chunks"))
+
+    elapsed, rss, code, output = run_script(script, settings)
+    done = count_lines(records)
+    result = {"pages": done, "seconds": elapsed, "pages_per_sec": done / elapsed, "peak_rss_kb": rss}
+    if os.path.exists(metrics_file):
+        with open(metrics_file, "r", encoding="utf-8") as f:
+            page = json.load(f)["stages"].get("page", {})
+        result["p50_ms"] = page["p50"] * 1000 if page.get("p50") is not None else None
+        result["p95_ms"] = page["p95"] * 1000 if page.get("p95") is not None else None
+    if code or done < len(links):
+        result["error"] = f"exit {code}, {done}/{len(links)} pages\n" + output[-2000:]
+    return result
+
+
+def bench_front_list(site, tmp):
+    output = os.path.join(tmp, "front.txt")
+    settings = {
+        "DHATU_URL": site.base_url + "/dhatu",
+        "LINK_FILE": os.path.join(HERE, "all_dhatu_links.json"),
+        "OUTPUT_FILE": output,
+    }
+    elapsed, rss, code, log = run_script("dhatufrontcontent.py", settings)
+    entries = 0
+    if os.path.exists(output):
+        with open(output, "r", encoding="utf-8") as f:
+            entries = f.read().count("-" * 80)
+    result = {"pages": 1, "entries": entries, "seconds": elapsed, "pages_per_sec": 1 / elapsed,
+              "p50_ms": elapsed * 1000, "p95_ms": elapsed * 1000, "peak_rss_kb": rss}
+    if code or not entries:
+        result["error"] = f"exit {code}, {entries} entries\n" + log[-2000:]
+    return result
+
+
+# ---- Parser micro-benchmarks (run in a fresh process each) ----
+def _fixture_pages(kind, ext="html"):
+    # The generic page plus every recorded one; "json" gives the hand-written data payloads
+    if ext == "html":
+        paths = [os.path.join(FIXTURE_DIR, f"{kind}_page.html")] + sorted(glob.glob(os.path.join(FIXTURE_DIR, kind, "*.html")))
+    else:
+        paths = [os.path.join(FIXTURE_DIR, f"{kind}_data.json")] + sorted(glob.glob(os.path.join(FIXTURE_DIR, kind, "*.json")))
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+
+def _readable(parse, pages):
+    # Leaves out the foreign-schema payloads kept for the fallback tests
+    readable = []
+    for page in pages:
+        try:
+            parse(page)
+        except ValueError:
+            continue
+        readable.append(page)
+    return readable
+
+
+def _parser(name):
+    if name == "parse_shabda_data":
+        from shabda_parser import parse_shabda_data
+        return parse_shabda_data, _readable(parse_shabda_data, _fixture_pages("shabda", "json"))
+    if name == "parse_dhatu_data":
+        from dhatu_parser import parse_dhatu_data
+        return parse_dhatu_data, _readable(parse_dhatu_data, _fixture_pages("dhatu", "json"))
+    if name.startswith("parse_shabda"):
+        from shabda_parser import parse_shabda
+        backend = name.split(":", 1)[1]
+        return lambda html: parse_shabda(html, backend), _fixture_pages("shabda")
+    if name == "parse_dhatu":
+        from dhatu_parser import parse_dhatu
+        return parse_dhatu, _fixture_pages("dhatu")
+    if name.startswith("parse_front_list"):
+        from dhatu_front_parser import parse_front_list, parse_front_list_find_previous
+        parse = parse_front_list_find_previous if name.endswith(":find_previous") else parse_front_list
+        with open(os.path.join(FIXTURE_DIR, "dhatu_list.html"), "r", encoding="utf-8") as f:
+            return parse, [f.read()]
+    raise ValueError(name)
+
+
+def _run_parser(name, out):
+    try:
+        parse, pages = _parser(name)
+        parse(pages[0])  # imports, compiled XPaths
+    except ImportError as e:
+        out.put({"error": f"skipped ({e})"})
+        return
+    timings = []
+    deadline = time.perf_counter() + PARSE_SECONDS
+    while time.perf_counter() < deadline or len(timings) < 5:
+        for html in pages:
+            start = time.perf_counter()
+            parse(html)
+            timings.append(time.perf_counter() - start)
+    out.put({
+        "pages": len(timings),
+        "seconds": sum(timings),
+        "pages_per_sec": len(timings) / sum(timings),
+        "p50_ms": percentile(timings, 0.5) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "peak_rss_kb": max_rss_kb(),
+    })
+
+
+def bench_parser(name):
+    ctx = get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(target=_run_parser, args=(name, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    return result
+
+
+# ---- Reporting ----
+def print_result(name, r):
+    if "error" in r and "pages_per_sec" not in r:
+        print(f"{name:<28} {r['error']}")
+        return
+    fmt = lambda v, spec: format(v, spec) if v is not None else "-".rjust(int(spec.split(".")[0]))
+    print(f"{name:<28} {r['pages_per_sec']:10.1f} {fmt(r.get('p50_ms'), '10.2f')} {fmt(r.get('p95_ms'), '10.2f')} "
+          f"{r['peak_rss_kb'] / 1024:10.1f}")
+    if "error" in r:
+        print(f"   ⚠️ {r['error'].splitlines()[0]}")
+
+
+def compare(results, baseline):
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b or "pages_per_sec" not in r or "pages_per_sec" not in b:
+            continue
+        if r["pages_per_sec"] < b["pages_per_sec"] * (1 - REGRESSION_TOLERANCE):
+            regressions.append(f"{name}: {b['pages_per_sec']:.1f} → {r['pages_per_sec']:.1f} pages/sec")
+        for key in ("p95_ms", "peak_rss_kb"):
+            if r.get(key) and b.get(key) and r[key] > b[key] * (1 + REGRESSION_TOLERANCE):
+                regressions.append(f"{name}: {key} {b[key]:.1f} → {r[key]:.1f}")
+    return regressions
+
+
+if __name__ == "__main__":
+    selenium = chrome_available() if INCLUDE_SELENIUM is None else INCLUDE_SELENIUM
+    results = {}
+    print(f"🧪 Offline benchmarks: fake site latency {LATENCY * 1000:.0f}±{JITTER * 1000:.0f} ms, "
+          f"Selenium {'on' if selenium else 'off (no Chrome found)'}\n")
+    print(f"{'benchmark':<28} {'pages/sec':>10} {'p50 ms':>10} {'p95 ms':>10} {'RSS MB':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp, FakeSite(latency=LATENCY, jitter=JITTER) as site:
+        pipelines = [
+            ("pipeline:shabda:http-json", "multishabdhas.py", "shabda", "http-json", SHABDA_PAGES),
+            ("pipeline:dhatu:http-json", "dhatulinkscontent.py", "dhatu", "http-json", DHATU_PAGES),
+            ("pipeline:shabda:html-cache", "multishabdhas.py", "shabda", "html-cache", SHABDA_PAGES),
+            ("pipeline:dhatu:html-cache", "dhatulinkscontent.py", "dhatu", "html-cache", DHATU_PAGES),
+        ]
+        if selenium:
+            pipelines += [
+                ("pipeline:shabda:selenium", "multishabdhas.py", "shabda", "selenium", SELENIUM_PAGES),
+                ("pipeline:dhatu:selenium", "dhatulinkscontent.py", "dhatu", "selenium", SELENIUM_PAGES),
+            ]
+        for name, script, kind, backend, pages in pipelines:
+            results[name] = bench_scrape_pipeline(name.replace(":", "_"), script, kind, backend, pages, site, tmp)
+            print_result(name, results[name])
+        if selenium:
+            results["pipeline:dhatu_front"] = bench_front_list(site, tmp)
+            print_result("pipeline:dhatu_front", results["pipeline:dhatu_front"])
+
+    from shabda_parser import BACKENDS
+    parsers = [f"parse_shabda:{b}" for b in BACKENDS] + ["parse_dhatu", "parse_front_list", "parse_front_list:find_previous",
+                                                         "parse_shabda_data", "parse_dhatu_data"]
+    for name in parsers:
+        results[name] = bench_parser(name)
+        print_result(name, results[name])
+
+    with open(RESULTS_FILE, "w", encoding="utf-8") as f:
+        json.dump({"latency": LATENCY, "jitter": JITTER, "results": results}, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Results: {RESULTS_FILE}")
+
+    if BASELINE_FILE:
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline)
+        for line in regressions:
+            print(f"🔻 {line}")
+        print("✅ No regressions against the baseline" if not regressions else f"⚠️ {len(regressions)} regressions")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,303 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from crawl_state import CrawlState, PENDING, IN_FLIGHT, DONE, FAILED
+import hashlib
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+
+# Coordinator for a crawl spread over several machines.
+#
+# The link list is split into shards by a stable hash of the URL, and each
+# shard gets its own CrawlState file under `state_dir`. Workers (crawl_worker.py,
+# on any node) talk to the coordinator over a small JSON-over-HTTP API:
+#
+#   POST /lease      {"worker", "limit"}          -> {"items": [[idx, url]], "shard", "finished", "retry_in"}
+#   POST /complete   {"worker", "url", "record"}
+#   POST /fail       {"worker", "url", "error"}
+#   POST /heartbeat  {"worker"}                    -> renews the worker's leases
+#   GET  /status                                   -> counts per shard and live workers
+#
+# A worker sticks to one shard until it runs dry, then moves to the shard with
+# the fewest live workers. A worker that stops sending heartbeats for
+# `worker_timeout` seconds is presumed dead and its leases go straight back to
+# pending for someone else; per-URL lease expiry covers the rest. When every
+# shard is finished, merge() streams all shards back into one corpus in the
+# original link order.
+
+# ----------- SETTINGS -------------
+LINK_FILES = {
+    "shabda": os.path.expanduser("~/Desktop/all_shabda_links.json"),
+    "dhatu": os.path.expanduser("~/Desktop/all_dhatu_links.json"),
+}
+STATE_DIR = os.path.expanduser("~/Desktop/sharded_state")  # one SQLite file per shard; re-run to resume
+MERGED_DIR = os.path.expanduser("~/Desktop")  # <kind>_records.jsonl is written here when the crawl ends
+SHARDS = 16
+LEASE_SECONDS = 300
+WORKER_TIMEOUT = 60  # seconds without a heartbeat before a worker's leases are reassigned
+MAX_ATTEMPTS = 4
+# ----------------------------------
+
+
+def shard_of(url, shards):
+    # Stable across processes and machines, unlike hash()
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+class Coordinator:
+    def __init__(self, kind, links, state_dir, shards=SHARDS, lease_seconds=LEASE_SECONDS,
+                 worker_timeout=WORKER_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+        self.kind = kind
+        self.shards = shards
+        self.worker_timeout = worker_timeout
+        self.lease_seconds = lease_seconds
+        self.total = len(links)
+        os.makedirs(state_dir, exist_ok=True)
+        self._check_layout(os.path.join(state_dir, f"{kind}_shards.json"))
+        self.states = [
+            CrawlState(os.path.join(state_dir, f"{kind}_shard{n:03d}.sqlite"),
+                       lease_seconds=lease_seconds, max_attempts=max_attempts)
+            for n in range(shards)
+        ]
+        buckets = [[] for _ in range(shards)]
+        for idx, url in enumerate(links):
+            buckets[shard_of(url, shards)].append((idx, url))
+        for state, rows in zip(self.states, buckets):
+            state.seed_indexed(rows)
+        self.workers = {}  # name -> {"shard", "seen", "held", "done", "failed"}
+        self.reassigned = 0
+        self.reaped = []  # names of workers presumed dead, in order
+        self._lock = threading.Lock()
+
+    def _check_layout(self, path):
+        # The shard count is part of the on-disk layout; changing it would file URLs twice
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                shards = json.load(f)["shards"]
+            if shards != self.shards:
+                raise ValueError(f"{path} was created with {shards} shards, not {self.shards}")
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"kind": self.kind, "shards": self.shards}, f)
+
+    def _state(self, url):
+        return self.states[shard_of(url, self.shards)]
+
+    # ---- Workers ----
+    def _touch(self, worker):
+        info = self.workers.setdefault(worker, {"shard": None, "seen": 0, "held": set(), "done": 0, "failed": 0})
+        info["seen"] = time.time()
+        return info
+
+    def reap(self):
+        # Return the leases of workers that stopped sending heartbeats
+        now = time.time()
+        with self._lock:
+            dead = [name for name, info in self.workers.items() if now - info["seen"] > self.worker_timeout]
+            for name in dead:
+                info = self.workers.pop(name)
+                self.reaped.append(name)
+                released = sum(self.states[n].release(name) for n in info["held"])
+                self.reassigned += released
+                print(f"💀 Worker {name} went quiet; {released} leased links reassigned")
+
+    def _candidate_shards(self, current):
+        load = [0] * self.shards
+        for info in self.workers.values():
+            if info["shard"] is not None:
+                load[info["shard"]] += 1
+        order = sorted(range(self.shards), key=lambda n: (load[n], n))
+        if current is not None:
+            order.remove(current)
+            order.insert(0, current)
+        return order
+
+    def lease(self, worker, limit=1):
+        with self._lock:
+            info = self._touch(worker)
+            retry_in = None
+            for n in self._candidate_shards(info["shard"]):
+                items = self.states[n].lease(worker, limit)
+                if items:
+                    info["shard"] = n
+                    info["held"].add(n)
+                    return {"items": items, "shard": n, "finished": False, "retry_in": None}
+                due = self.states[n].next_due()
+                if due is not None:
+                    retry_in = due if retry_in is None else min(retry_in, due)
+            info["shard"] = None
+            finished = not self.has_work()
+            return {"items": [], "shard": None, "finished": finished,
+                    "retry_in": None if finished else min(retry_in or 1.0, 5.0)}
+
+    def complete(self, worker, url, record):
+        # A reaped worker's late result is dropped: its link was handed to someone else
+        accepted = self._state(url).complete(url, json.dumps(record, ensure_ascii=False), worker=worker)
+        with self._lock:
+            self._touch(worker)["done"] += accepted
+
+    def fail(self, worker, url, error):
+        accepted = self._state(url).fail(url, error, worker=worker)
+        with self._lock:
+            self._touch(worker)["failed"] += accepted
+
+    def heartbeat(self, worker):
+        with self._lock:
+            info = self._touch(worker)
+            return sum(self.states[n].renew(worker) for n in info["held"])
+
+    # ---- Progress ----
+    def has_work(self):
+        return any(state.has_work() for state in self.states)
+
+    def counts(self):
+        total = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        for state in self.states:
+            for key, value in state.counts().items():
+                total[key] += value
+        return total
+
+    def status(self):
+        with self._lock:
+            workers = {name: {"shard": info["shard"], "done": info["done"], "failed": info["failed"],
+                              "idle": round(time.time() - info["seen"], 1)}
+                       for name, info in self.workers.items()}
+        return {"kind": self.kind, "total": self.total, "counts": self.counts(),
+                "shards": [state.counts() for state in self.states],
+                "workers": workers, "reassigned": self.reassigned, "reaped": list(self.reaped),
+                "worker_timeout": self.worker_timeout, "lease_seconds": self.lease_seconds}
+
+    # ---- Output ----
+    def results(self):
+        # (idx, url, result) across all shards, merged back into link order
+        return heapq.merge(*(state.results() for state in self.states))
+
+    def merge(self, path):
+        tmp = path + ".tmp"
+        written = 0
+        with open(tmp, "w", encoding="utf-8") as f:
+            for _, _, result in self.results():
+                f.write(result + "\n")
+                written += 1
+        os.replace(tmp, path)
+        return written
+
+    def failed_urls(self):
+        return [url for _, url in heapq.merge(*(state.rows(FAILED) for state in self.states))]
+
+
+class CoordinatorServer:
+    def __init__(self, coordinator, host="0.0.0.0", port=8765):
+        self.coordinator = coordinator
+        self._server = ThreadingHTTPServer((host, port), _make_handler(coordinator))
+        self._server.daemon_threads = True
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        threading.Thread(target=self._reaper, daemon=True).start()
+        return self.base_url
+
+    def _reaper(self):
+        while not self._stop.wait(max(1.0, self.coordinator.worker_timeout / 4)):
+            self.coordinator.reap()
+
+    def stop(self):
+        self._stop.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _make_handler(coordinator):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # workers keep one connection open
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/status":
+                self._reply(coordinator.status())
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+                worker = body["worker"]
+                route = self.path.rstrip("/")
+                if route == "/lease":
+                    self._reply(coordinator.lease(worker, int(body.get("limit", 1))))
+                elif route == "/complete":
+                    coordinator.complete(worker, body["url"], body["record"])
+                    self._reply({"ok": True})
+                elif route == "/fail":
+                    coordinator.fail(worker, body["url"], body.get("error", ""))
+                    self._reply({"ok": True})
+                elif route == "/heartbeat":
+                    self._reply({"renewed": coordinator.heartbeat(worker)})
+                else:
+                    self.send_error(404)
+            except (ValueError, KeyError) as e:
+                self.send_error(400, f"{type(e).__name__}: {e}")
+
+        def _reply(self, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    # python coordinator.py shabda|dhatu [port]
+    kind = sys.argv[1] if len(sys.argv) > 1 else "shabda"
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+    with open(LINK_FILES[kind], "r", encoding="utf-8") as f:
+        links = json.load(f)
+
+    coordinator = Coordinator(kind, links, STATE_DIR)
+    with CoordinatorServer(coordinator, port=port) as server:
+        counts = coordinator.counts()
+        print(f"🧭 Coordinating {len(links)} {kind} links in {SHARDS} shards at {server.base_url} "
+              f"({counts['done']} already done)")
+        print(f"   Start workers with: python crawl_worker.py http://<this-host>:{port}")
+        while coordinator.has_work():
+            time.sleep(10)
+            status = coordinator.status()
+            c = status["counts"]
+            print(f"📊 {c['done']}/{len(links)} done, {c['in_flight']} in flight, {c['failed']} failed, "
+                  f"{len(status['workers'])} workers")
+        time.sleep(WORKER_TIMEOUT / 4)  # let workers see "finished" and exit
+
+    merged = os.path.join(MERGED_DIR, f"{kind}_records.jsonl")
+    written = coordinator.merge(merged)
+    print(f"🧩 Merged {written} records from {SHARDS} shards in link order → {merged}")
+    failed_links = coordinator.failed_urls()
+    if failed_links:
+        failed_file = os.path.join(MERGED_DIR, f"{kind}_failed.json")
+        with open(failed_file, "w", encoding="utf-8") as f:
+            json.dump(failed_links, f, indent=2, ensure_ascii=False)
+        print(f"⚠️ {len(failed_links)} links failed {MAX_ATTEMPTS} times: {failed_file}")
+    print(f"\n✅ Done. {coordinator.counts()['done']} of {len(links)} {kind} pages scraped")
@@ -0,0 +1,323 @@
+from legacy_text import iter_blocks, legacy_files
+from array import array
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zlib blocks only
+    zstandard = None
+
+# Random-access container for corpus entries (legacy text blocks or JSON
+# records): entries are packed into ~BLOCK_SIZE blocks, each compressed on its
+# own (zstd, or zlib without the zstandard package), followed by an index
+# sorted by key. The file is memory-mapped on open, so get(key) is a binary
+# search over the index plus decompressing the one block that holds the
+# entry, and scan() streams the corpus block by block in insertion order.
+#
+# File layout (native-endian arrays, each section 8-byte aligned):
+#   header        magic, version, codec, byte order, counts, section offsets
+#   blocks        compressed blocks, back to back
+#   block_offsets n_blocks + 1 (uint64)  file offsets of the compressed blocks
+#   block_sizes   n_blocks (uint32)      uncompressed size of each block
+#   key_offsets   n_entries + 1          byte offsets into key_blob (keys, UTF-8, sorted)
+#   locations     n_entries × 3          block, offset and length inside the block, per sorted key
+#   order         n_entries              sorted position of each entry, in insertion order
+#   key_blob
+#
+#   python corpus_store.py import                  # LEGACY_FILES -> STORE_FILE
+#   python corpus_store.py import-jsonl A.jsonl …  # JSONL records, keyed by url
+#   python corpus_store.py get https://ashtadhyayi.com/dhatu/01.0002
+#   python corpus_store.py scan | head
+#   python corpus_store.py stats
+
+# ----------- SETTINGS -------------
+STORE_FILE = os.path.expanduser("~/Desktop/corpus.cstore")
+LEGACY_FILES = (  # globs; shabda_output_{START}_{END}.txt and dhatus_{a}_{b}.txt batches
+    "~/Desktop/shabda_output_*_*.txt",
+    "~/Desktop/dhatu_scraped_chunks/dhatus_*_*.txt",
+)
+LINK_FILES = {  # block idx -> url for the keys; entries fall back to "<kind>/<idx>"
+    "shabda": os.path.expanduser("~/Desktop/all_shabda_links.json"),
+    "dhatu": os.path.expanduser("~/Desktop/all_dhatu_links.json"),
+}
+BLOCK_SIZE = 64 * 1024  # uncompressed bytes per block: bigger compresses better, smaller reads faster
+CODEC = "zstd" if zstandard is not None else "zlib"
+# ----------------------------------
+
+MAGIC = b"CSTORE\0\0"
+VERSION = 1
+CODECS = ("zlib", "zstd")
+SECTIONS = ("block_offsets", "block_sizes", "key_offsets", "locations", "order", "key_blob")
+_HEADER = struct.Struct("<8sIIIQQ" + "Q" * (2 * len(SECTIONS)))
+_BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+
+
+def _compressor(codec, level):
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("codec 'zstd' needs the zstandard package")
+        return zstandard.ZstdCompressor(level=level or 9).compress
+    return lambda data: zlib.compress(data, level or 6)
+
+
+def _decompressor(codec):
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("this store uses zstd blocks and needs the zstandard package")
+        dctx = zstandard.ZstdDecompressor()
+        return lambda data, size: dctx.decompress(data, max_output_size=size)
+    return lambda data, size: zlib.decompress(data)
+
+
+# ---- Writing ----
+class StoreWriter:
+    def __init__(self, path, codec=CODEC, block_size=BLOCK_SIZE, level=None):
+        self.path = path
+        self.codec = codec
+        self.block_size = block_size
+        self._compress = _compressor(codec, level)
+        self._tmp = path + ".tmp"
+        self._f = open(self._tmp, "wb")
+        self._f.write(b"\0" * _HEADER.size)
+        self._block = bytearray()
+        self._block_offsets = array("Q", [self._f.tell()])
+        self._block_sizes = array("I")
+        self._entries = {}  # key -> (block, offset, length, insertion position); a repeated key replaces
+        self.raw_bytes = 0
+
+    def add(self, key, payload):
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        if self._block and len(self._block) + len(payload) > self.block_size:
+            self._flush()
+        position = len(self._entries) if key not in self._entries else self._entries[key][3]
+        self._entries[key] = (len(self._block_sizes), len(self._block), len(payload), position)
+        self._block += payload
+        self.raw_bytes += len(payload)
+
+    def _flush(self):
+        self._f.write(self._compress(bytes(self._block)))
+        self._block_offsets.append(self._f.tell())
+        self._block_sizes.append(len(self._block))
+        self._block = bytearray()
+
+    def close(self):
+        if self._block:
+            self._flush()
+        keys = sorted(self._entries, key=lambda k: k.encode("utf-8"))
+        key_offsets, locations, key_blob = array("I", [0]), array("I"), bytearray()
+        order = array("I", bytes(4 * len(keys)))
+        for i, key in enumerate(keys):
+            block, offset, length, position = self._entries[key]
+            key_blob += key.encode("utf-8")
+            key_offsets.append(len(key_blob))
+            locations.extend((block, offset, length))
+            order[position] = i  # a replaced key keeps the position it was first added at
+
+        sections = {"block_offsets": self._block_offsets.tobytes(), "block_sizes": self._block_sizes.tobytes(),
+                    "key_offsets": key_offsets.tobytes(), "locations": locations.tobytes(),
+                    "order": order.tobytes(), "key_blob": bytes(key_blob)}
+        layout = []
+        for name in SECTIONS:
+            self._f.write(b"\0" * (-self._f.tell() % 8))
+            layout += [self._f.tell(), len(sections[name])]
+            self._f.write(sections[name])
+        self._f.seek(0)
+        self._f.write(_HEADER.pack(MAGIC, VERSION, CODECS.index(self.codec), _BYTE_ORDER,
+                                   len(self._block_sizes), len(keys), *layout))
+        self._f.close()
+        os.replace(self._tmp, self.path)
+        return {"entries": len(keys), "blocks": len(self._block_sizes), "raw_bytes": self.raw_bytes,
+                "file_bytes": os.path.getsize(self.path)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._f.close()
+            os.remove(self._tmp)
+
+
+# ---- Reading ----
+class _Keys:
+    # Sequence view over the sorted key table, so bisect can search the mmap directly
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+
+class CorpusStore:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, codec, order, self.n_blocks, self.n_entries, *layout = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a corpus store (version {VERSION})")
+        if order != _BYTE_ORDER:
+            raise ValueError(f"{path} was written on a machine with the other byte order")
+        self.codec = CODECS[codec]
+        self._decompress = _decompressor(self.codec)
+        view = memoryview(self._mm)
+        sections = {name: view[start:start + size] for name, start, size in zip(SECTIONS, layout[::2], layout[1::2])}
+        self._block_offsets = sections["block_offsets"].cast("Q")
+        self._block_sizes = sections["block_sizes"].cast("I")
+        self._locations = sections["locations"].cast("I")
+        self._order = sections["order"].cast("I")
+        self._keys = _Keys(sections["key_offsets"].cast("I"), sections["key_blob"])
+        self._cached = (None, None)  # the last block read: neighbours often come together
+        self.blocks_read = 0
+
+    def __len__(self):
+        return self.n_entries
+
+    def _block(self, b):
+        if self._cached[0] != b:
+            data = self._mm[self._block_offsets[b]:self._block_offsets[b + 1]]
+            self._cached = (b, self._decompress(data, self._block_sizes[b]))
+            self.blocks_read += 1
+        return self._cached[1]
+
+    def _find(self, key):
+        target = key.encode("utf-8")
+        i = bisect.bisect_left(self._keys, target)
+        return i if i < len(self._keys) and self._keys[i] == target else None
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def _payload(self, i):
+        block, offset, length = self._locations[3 * i:3 * i + 3]
+        return self._block(block)[offset:offset + length].decode("utf-8")
+
+    def get(self, key, default=None):
+        i = self._find(key)
+        return default if i is None else self._payload(i)
+
+    def keys(self, prefix=""):
+        # Sorted keys starting with `prefix`
+        target = prefix.encode("utf-8")
+        i = bisect.bisect_left(self._keys, target)
+        while i < len(self._keys):
+            key = self._keys[i]
+            if not key.startswith(target):
+                break
+            yield key.decode("utf-8")
+            i += 1
+
+    def scan(self):
+        # (key, payload) in insertion order; each block is decompressed once
+        for i in self._order:
+            yield self._keys[i].decode("utf-8"), self._payload(i)
+
+    def stats(self):
+        compressed = self._block_offsets[self.n_blocks] - self._block_offsets[0] if self.n_blocks else 0
+        return {"entries": self.n_entries, "blocks": self.n_blocks, "codec": self.codec,
+                "raw_bytes": sum(self._block_sizes), "compressed_bytes": compressed,
+                "file_bytes": len(self._mm)}
+
+    def close(self):
+        self._block_offsets.release()
+        self._block_sizes.release()
+        self._locations.release()
+        self._order.release()
+        self._keys.offsets.release()
+        self._keys.blob.release()
+        self._cached = (None, None)
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---- Importers ----
+def _load_links(link_files):
+    links = {}
+    for kind, path in (link_files or {}).items():
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                links[kind] = json.load(f)
+    return links
+
+
+def import_legacy(path, files, link_files=LINK_FILES, **writer_args):
+    # Legacy text blocks, streamed file by file; keyed by url when the block's link index is known
+    links = _load_links(link_files)
+    unkeyed = 0
+    with StoreWriter(path, **writer_args) as writer:
+        for source in files:
+            for n, (kind, idx, text) in enumerate(iter_blocks(source)):
+                kind_links = links.get(kind, ())
+                if idx is not None and idx < len(kind_links):
+                    key = kind_links[idx]
+                elif idx is not None:
+                    key = f"{kind}/{idx}"
+                else:
+                    key = f"{os.path.basename(source)}#{n}"  # position unknown (no START/END in the name)
+                    unkeyed += 1
+                writer.add(key, text)
+    stats = _final_stats(path)
+    stats["unkeyed"] = unkeyed
+    return stats
+
+
+def import_jsonl(path, files, **writer_args):
+    # JSONL records keyed by url; a later record for the same url replaces the earlier one
+    with StoreWriter(path, **writer_args) as writer:
+        for source in files:
+            with open(source, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        writer.add(json.loads(line)["url"], line.rstrip("\n"))
+    return _final_stats(path)
+
+
+def _final_stats(path):
+    with CorpusStore(path) as store:
+        return store.stats()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "import":
+        files = legacy_files(LEGACY_FILES)
+        stats = import_legacy(STORE_FILE, files)
+        print(f"📦 {stats['entries']} entries from {len(files)} files in {stats['blocks']} {stats['codec']} blocks: "
+              f"{stats['raw_bytes'] / 1024 ** 2:.1f} MB → {stats['file_bytes'] / 1024 ** 2:.1f} MB ({STORE_FILE})")
+        if stats["unkeyed"]:
+            print(f"⚠️ {stats['unkeyed']} blocks came from files without a batch range and are keyed by file position")
+    elif command == "import-jsonl":
+        stats = import_jsonl(STORE_FILE, sys.argv[2:])
+        print(f"📦 {stats['entries']} records in {stats['blocks']} {stats['codec']} blocks: "
+              f"{stats['raw_bytes'] / 1024 ** 2:.1f} MB → {stats['file_bytes'] / 1024 ** 2:.1f} MB ({STORE_FILE})")
+    elif command == "get":
+        with CorpusStore(STORE_FILE) as store:
+            text = store.get(sys.argv[2])
+            print(text if text is not None else f"❌ {sys.argv[2]} is not in the store")
+    elif command == "scan":
+        with CorpusStore(STORE_FILE) as store:
+            for key, text in store.scan():
+                print(f"{key}\t{len(text)}")
+    elif command == "stats":
+        with CorpusStore(STORE_FILE) as store:
+            print(json.dumps(store.stats(), indent=2))
+    else:
+        print(f"Unknown command {command!r}: use import, import-jsonl, get, scan or stats")
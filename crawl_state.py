@@ -0,0 +1,236 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# Durable per-URL crawl state and work queue (SQLite, WAL mode).
+#
+# Every link is a row in one of four states:
+#   pending   -> waiting to be leased (possibly not before next_attempt)
+#   in_flight -> leased by a worker until lease_expires
+#   done      -> scraped; the extracted block is kept in `result`
+#   failed    -> gave up after max_attempts
+#
+# Any number of threads or processes can lease from the same file. A crashed
+# worker only loses its in-flight rows, which go back to pending once their
+# lease expires; that lease still counts as one of the page's max_attempts.
+# Failures are retried automatically with exponential backoff.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    idx INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS pages_queue ON pages (state, next_attempt, idx);
+"""
+
+PENDING, IN_FLIGHT, DONE, FAILED = "pending", "in_flight", "done", "failed"
+
+# SET clause for a lease that ended without complete()/fail(): back to pending, or
+# failed once out of attempts. Parameters: max_attempts, FAILED, PENDING, max_attempts, error, now
+_RETURN_LEASE = (
+    "state = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+    "error = CASE WHEN attempts >= ? THEN ? ELSE error END, "
+    "lease_owner = NULL, lease_expires = NULL, updated = ?"
+)
+
+
+def worker_name():
+    return f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+
+
+class CrawlState:
+    def __init__(self, path, lease_seconds=300, max_attempts=4, retry_backoff=30):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        # One connection per thread; autocommit, transactions are explicit
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, sql, params=()):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(sql, params)
+            conn.execute("COMMIT")
+            return cur
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---- Queue ----
+    def seed(self, urls, start=0):
+        self.seed_indexed(enumerate(urls, start))
+
+    def seed_indexed(self, rows):
+        # rows: (idx, url) pairs; used when a shard holds a subset of the global list
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT OR IGNORE INTO pages (url, idx, updated) VALUES (?, ?, ?)",
+            [(url, idx, now) for idx, url in rows],
+        )
+        conn.execute("COMMIT")
+
+    def lease(self, worker=None, limit=1):
+        # Atomically hand out up to `limit` due rows as [(idx, url), ...]
+        worker = worker or worker_name()
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # An expired lease used up its attempt (counted when leased): a page that keeps
+            # killing its workers fails after max_attempts like any other
+            conn.execute(
+                "UPDATE pages SET " + _RETURN_LEASE + " WHERE state = ? AND lease_expires < ?",
+                (self.max_attempts, FAILED, PENDING, self.max_attempts, "lease expired", now, IN_FLIGHT, now),
+            )
+            rows = conn.execute(
+                "SELECT idx, url FROM pages WHERE state = ? AND next_attempt <= ? ORDER BY idx LIMIT ?",
+                (PENDING, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE pages SET state = ?, attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, updated = ? WHERE url = ?",
+                [(IN_FLIGHT, worker, now + self.lease_seconds, now, url) for _, url in rows],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    def complete(self, url, result, worker=None):
+        # True if recorded. With `worker`, only while that worker still holds the lease: a page
+        # that ran past its lease and was leased again is completed once, by whoever holds it
+        sql = ("UPDATE pages SET state = ?, result = ?, error = NULL, lease_owner = NULL, "
+               "lease_expires = NULL, updated = ? WHERE url = ?")
+        params = (DONE, result, time.time(), url)
+        if worker is not None:
+            sql += " AND state = ? AND lease_owner = ?"
+            params += (IN_FLIGHT, worker)
+        return self._write(sql, params).rowcount == 1
+
+    def fail(self, url, error, retry=True, worker=None):
+        # Back to pending with exponential backoff, or failed once out of attempts (at once
+        # with retry=False). Ignored if the lease already expired and the row moved on, or
+        # (with `worker`) is now held by someone else. True if recorded.
+        now = time.time()
+        max_attempts = self.max_attempts if retry else 0
+        sql = ("UPDATE pages SET "
+               "state = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+               "next_attempt = CASE WHEN attempts >= ? THEN 0 ELSE ? + ? * (1 << (attempts - 1)) END, "
+               "error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+               "WHERE url = ? AND state = ?")
+        params = (max_attempts, FAILED, PENDING, max_attempts, now, self.retry_backoff,
+                  str(error)[:1000], now, url, IN_FLIGHT)
+        if worker is not None:
+            sql += " AND lease_owner = ?"
+            params += (worker,)
+        return self._write(sql, params).rowcount == 1
+
+    def renew(self, worker):
+        # Heartbeat: push back the expiry of every lease `worker` holds
+        now = time.time()
+        return self._write(
+            "UPDATE pages SET lease_expires = ?, updated = ? WHERE state = ? AND lease_owner = ?",
+            (now + self.lease_seconds, now, IN_FLIGHT, worker),
+        ).rowcount
+
+    def release(self, worker):
+        # Hand a dead worker's leases back without waiting for them to expire (failed if out of attempts)
+        return self._write(
+            "UPDATE pages SET " + _RETURN_LEASE + " WHERE state = ? AND lease_owner = ?",
+            (self.max_attempts, FAILED, PENDING, self.max_attempts, "worker died holding the lease",
+             time.time(), IN_FLIGHT, worker),
+        ).rowcount
+
+    def retry_failed(self):
+        # Give permanently failed rows a fresh set of attempts
+        return self._write(
+            "UPDATE pages SET state = ?, attempts = 0, next_attempt = 0, updated = ? WHERE state = ?",
+            (PENDING, time.time(), FAILED),
+        ).rowcount
+
+    def requeue(self, urls):
+        # Put finished rows (done or failed) back to pending with fresh attempts, e.g. to re-parse them
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.executemany(
+                "UPDATE pages SET state = ?, attempts = 0, next_attempt = 0, error = NULL, updated = ? "
+                "WHERE url = ? AND state IN (?, ?)",
+                [(PENDING, now, url, DONE, FAILED) for url in urls],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount
+
+    def has_work(self):
+        row = self._conn().execute(
+            "SELECT 1 FROM pages WHERE state IN (?, ?) LIMIT 1", (PENDING, IN_FLIGHT)
+        ).fetchone()
+        return row is not None
+
+    def next_due(self):
+        # Seconds until the next pending row becomes leasable (0 if one is due now)
+        row = self._conn().execute(
+            "SELECT MIN(next_attempt) FROM pages WHERE state = ?", (PENDING,)
+        ).fetchone()
+        return max(0.0, row[0] - time.time()) if row[0] is not None else None
+
+    # ---- Reporting ----
+    def counts(self):
+        rows = self._conn().execute("SELECT state, COUNT(*) FROM pages GROUP BY state").fetchall()
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def results(self, start=None, end=None):
+        # Streams (idx, url, result) for done rows in link order, optionally within [start, end)
+        sql = "SELECT idx, url, result FROM pages WHERE state = ?"
+        params = [DONE]
+        if start is not None:
+            sql += " AND idx >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND idx < ?"
+            params.append(end)
+        return self._conn().execute(sql + " ORDER BY idx", params)
+
+    def urls(self, *states):
+        return [url for _, url in self.rows(*states)]
+
+    def rows(self, *states):
+        # (idx, url) in link order for the given states
+        return self._conn().execute(
+            f"SELECT idx, url FROM pages WHERE state IN ({', '.join('?' * len(states))}) ORDER BY idx", states
+        ).fetchall()
+
+    def failed_urls(self):
+        rows = self._conn().execute("SELECT url FROM pages WHERE state = ? ORDER BY idx", (FAILED,)).fetchall()
+        return [url for (url,) in rows]
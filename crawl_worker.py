@@ -0,0 +1,203 @@
+from concurrent.futures import ThreadPoolExecutor
+from crawl_state import worker_name
+from rate_control import AdaptiveThrottle
+from readiness import wait_for_rows
+from resource_blocking import ResourceBlocker, logged_options, template_pattern
+from shabda_parser import parse_shabda, parse_shabda_data
+from dhatu_parser import parse_dhatu, parse_dhatu_data
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Worker for a sharded crawl run by coordinator.py. Start one per machine (or
+# several per machine); each leases batches of links from the coordinator,
+# scrapes them with the same fetch/parse code as the single-machine scripts and
+# posts one record per page back. A background heartbeat keeps its leases
+# alive; if the process dies, the coordinator hands its links to the others.
+#
+#   python crawl_worker.py http://coordinator:8765 [HTTP_BASE_URL]   # the second switches to FETCH_BACKEND = "http"
+
+# ----------- SETTINGS -------------
+COORDINATOR_URL = "http://127.0.0.1:8765"
+MAX_THREADS = 5  # Upper bound on parallel pages in this process
+BATCH_SIZE = 10  # links leased per request
+HEARTBEAT = 15  # seconds between lease renewals; capped at a third of the coordinator's worker timeout and lease time
+START_CONCURRENCY = 2
+MAX_REQUESTS_PER_SEC = 2.0  # per worker process
+TARGET_LATENCY = 15.0
+WAIT_TIME = 40
+PAGES_PER_DRIVER = 200
+FETCH_BACKEND = "selenium"  # "selenium" or "http" (the entry's JSON data over HTTP, Selenium as fallback)
+HTTP_DATA_URLS = {"shabda": None, "dhatu": None}  # "http" backend: data request templates with {key} (see http_fetch.py)
+HTTP_BASE_URL = None  # e.g. a mirror or local fixture server; None = the link's own host
+PARSER_BACKEND = "lxml"
+BLOCK_TYPES = ("image", "font", "media", "stylesheet")  # cancelled via DevTools; () loads everything
+# ----------------------------------
+# Benchmarks and tests override settings with SCRAPER_SETTINGS='{"NAME": value, ...}'
+globals().update(json.loads(os.environ.get("SCRAPER_SETTINGS", "{}")))
+
+KINDS = {
+    "shabda": {
+        "parse": lambda html: parse_shabda(html, PARSER_BACKEND),
+        "data": parse_shabda_data,
+        "rows": ".table-bordered tbody tr",
+        "headers": None,
+    },
+    "dhatu": {
+        "parse": parse_dhatu,
+        "data": parse_dhatu_data,
+        "rows": ".card tbody tr",
+        "headers": ".card-header",
+    },
+}
+
+
+class CoordinatorClient:
+    def __init__(self, base_url, worker, retries=5):
+        self.base_url = base_url.rstrip("/")
+        self.worker = worker
+        self.retries = retries
+
+    def _call(self, route, payload=None):
+        data = None if payload is None else json.dumps({"worker": self.worker, **payload}).encode("utf-8")
+        request = urllib.request.Request(self.base_url + route, data=data,
+                                         headers={"Content-Type": "application/json"})
+        for attempt in range(self.retries + 1):
+            try:
+                with urllib.request.urlopen(request, timeout=30) as resp:
+                    return json.loads(resp.read())
+            except urllib.error.HTTPError as e:
+                # A 4xx is a bad route or payload and will not get better with retries
+                if e.code < 500 or attempt == self.retries:
+                    raise
+                time.sleep(min(2 ** attempt, 30))
+            except (urllib.error.URLError, OSError):
+                # Coordinator restarting or briefly unreachable
+                if attempt == self.retries:
+                    raise
+                time.sleep(min(2 ** attempt, 30))
+
+    def status(self):
+        return self._call("/status")
+
+    def lease(self, limit):
+        return self._call("/lease", {"limit": limit})
+
+    def complete(self, url, record):
+        self._call("/complete", {"url": url, "record": record})
+
+    def fail(self, url, error):
+        self._call("/fail", {"url": url, "error": error})
+
+    def heartbeat(self):
+        return self._call("/heartbeat", {})
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        COORDINATOR_URL = sys.argv[1]
+    if len(sys.argv) > 2:
+        FETCH_BACKEND, HTTP_BASE_URL = "http", sys.argv[2]
+
+    name = worker_name()
+    client = CoordinatorClient(COORDINATOR_URL, name)
+    status = client.status()
+    kind = status["kind"]
+    spec = KINDS[kind]
+    # Renew well within the coordinator's limits, or it reaps this worker while it is still busy
+    heartbeat_every = min([HEARTBEAT] + [status[k] / 3 for k in ("worker_timeout", "lease_seconds") if status.get(k)])
+    print(f"🛠️ Worker {name} scraping {kind} pages for {COORDINATOR_URL} ({FETCH_BACKEND} backend)")
+
+    # Chrome is only started if a page actually needs it
+    pool = None
+    allow = [template_pattern(HTTP_DATA_URLS[kind])] if HTTP_DATA_URLS.get(kind) else ()
+    blocker = ResourceBlocker(BLOCK_TYPES, allow=allow) if BLOCK_TYPES else None
+    pool_lock = threading.Lock()
+    throttle = AdaptiveThrottle(
+        rate=MAX_REQUESTS_PER_SEC, burst=START_CONCURRENCY,
+        initial=START_CONCURRENCY, maximum=MAX_THREADS, target_latency=TARGET_LATENCY,
+    )
+
+    def driver_pool():
+        global pool
+        with pool_lock:
+            if pool is None:
+                from driver_pool import DriverPool
+                pool = DriverPool(size=MAX_THREADS, max_pages=PAGES_PER_DRIVER,
+                                  **({"options_factory": logged_options, "on_start": blocker.install} if blocker else {}))
+            return pool
+
+    http = None
+    if FETCH_BACKEND == "http" and HTTP_DATA_URLS.get(kind):
+        from http_fetch import HttpFetcher
+        http = HttpFetcher(HTTP_DATA_URLS[kind], concurrency=MAX_THREADS, base_url=HTTP_BASE_URL,
+                           validate=spec["data"])
+
+    def scrape_one(idx, link):
+        try:
+            page_source = None
+            if http is not None:
+                with throttle.request():
+                    page_source = http.fetch(link)
+            if page_source is None:
+                with throttle.request(), driver_pool().driver() as driver:
+                    driver.get(link)
+                    try:
+                        wait_for_rows(driver, spec["rows"], timeout=WAIT_TIME, header_selector=spec["headers"])
+                        page_source = driver.page_source
+                    finally:
+                        if blocker is not None:
+                            blocker.page_stats(driver)
+            return idx, spec["parse"](page_source), None
+        except Exception as e:
+            return idx, None, f"{type(e).__name__}: {e}"
+
+    stopped = threading.Event()
+
+    def heartbeat():
+        while not stopped.wait(heartbeat_every):
+            try:
+                client.heartbeat()
+            except OSError:
+                pass
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    done = [0]
+    done_lock = threading.Lock()
+
+    def worker():
+        while True:
+            reply = client.lease(BATCH_SIZE)
+            if not reply["items"]:
+                if reply["finished"]:
+                    return
+                time.sleep(reply["retry_in"] or 1.0)
+                continue
+
+            for idx, link in reply["items"]:
+                _, parsed, error = scrape_one(idx, link)
+                if error:
+                    print(f"⚠️ [{idx}] {link}: {error}")
+                    client.fail(link, error)
+                else:
+                    client.complete(link, {"idx": idx, "url": link, **parsed})
+                    with done_lock:
+                        done[0] += 1
+
+    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
+        for future in [executor.submit(worker) for _ in range(MAX_THREADS)]:
+            future.result()
+    stopped.set()
+    if http is not None:
+        http.close()
+        print(http.summary())
+    if pool is not None:
+        pool.close()
+        if blocker is not None:
+            print(blocker.summary())
+    print(f"✅ Worker {name} finished: {done[0]} pages scraped")
@@ -0,0 +1,160 @@
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+except ImportError:  # only the BeautifulSoup backend is available
+    lxml = None
+
+# Extraction for the dhatu front list (https://ashtadhyayi.com/dhatu after the
+# list has been scrolled to the end). Each `div.href.d-inline` block is one
+# dhatu; the nearest preceding `div.badge` carries its number and gaṇa.
+#
+# parse_front_list(html, backend) returns [{"badge", "root", "forms", "english", "gloss"}]
+# in document order and format_front_entry() renders the line dhatufrontcontent.py
+# has always written.
+#
+# Both backends walk the document once, front to back, carrying the current
+# badge forward as they pass it, and read each block from its own children.
+# parse_front_list_find_previous() is the original extraction (a backwards
+# find_previous() search for the badge plus several find()/find_all() calls per
+# block); it is kept as the reference for bench_front_parser.py.
+#
+# Backends:
+#   "lxml"        lxml.html, one iteration over the tree (default)
+#   "html.parser" BeautifulSoup, one pass over its div elements (no lxml needed)
+
+BACKENDS = ("lxml", "html.parser")
+DEFAULT_BACKEND = "lxml" if lxml is not None else "html.parser"
+
+ROOT_CLASS = "list-item-title font-weight-bold"
+FORM_CLASS = "d-inline dark"
+ENGLISH_CLASS = "default-english-font"
+
+
+def parse_front_list(html, backend=DEFAULT_BACKEND):
+    if backend == "lxml":
+        return _parse_lxml(html)
+    if backend == "html.parser":
+        return _parse_soup(html)
+    raise ValueError(f"Unknown parser backend: {backend!r} (choose from {', '.join(BACKENDS)})")
+
+
+def _entry(badge, root, forms, english, gloss):
+    return {"badge": badge, "root": root, "forms": forms, "english": english, "gloss": gloss}
+
+
+# ---- lxml backend ----
+def _text(el):
+    # Same as BeautifulSoup's get_text(strip=True)
+    return "".join(s.strip() for s in el.itertext())
+
+
+def _is_block(classes):
+    return "href" in classes and "d-inline" in classes
+
+
+def _parse_lxml(html):
+    entries = []
+    badge = ""
+    for div in lxml.html.fromstring(html).iter("div"):
+        classes = (div.get("class") or "").split()
+        if "badge" in classes:
+            badge = " ".join(s.strip() for s in div.itertext() if s.strip())
+        elif _is_block(classes):
+            entries.append(_block_lxml(div, badge))
+    return entries
+
+
+def _block_lxml(block, badge):
+    root, forms, english_el = None, [], None
+    for div in block.iterdescendants("div"):
+        cls = " ".join((div.get("class") or "").split())
+        if cls == ROOT_CLASS and root is None:
+            root = _text(div)
+        elif cls == FORM_CLASS:
+            text = _text(div)
+            if text:
+                forms.append(text)
+        elif cls == ENGLISH_CLASS and english_el is None:
+            english_el = div
+    english = gloss = ""
+    if english_el is not None:
+        english = _text(english_el)
+        # The optional gloss (e.g. Hindi) is the next div sibling
+        sibling = english_el.getnext()
+        while sibling is not None and sibling.tag != "div":
+            sibling = sibling.getnext()
+        if sibling is not None:
+            gloss = _text(sibling)
+    return _entry(badge, root or "", forms, english, gloss)
+
+
+# ---- BeautifulSoup backend ----
+def _parse_soup(html):
+    entries = []
+    badge = ""
+    for div in BeautifulSoup(html, "html.parser").find_all("div"):
+        classes = div.get("class") or []
+        if "badge" in classes:
+            badge = " ".join(div.stripped_strings)
+        elif _is_block(classes):
+            entries.append(_block_soup(div, badge))
+    return entries
+
+
+def _block_soup(block, badge):
+    root_el = block.find("div", class_=ROOT_CLASS)
+    forms = [text for text in (div.get_text(strip=True) for div in block.find_all("div", class_=FORM_CLASS)) if text]
+    english_el = block.find("div", class_=ENGLISH_CLASS)
+    gloss_el = english_el.find_next_sibling("div") if english_el else None
+    return _entry(
+        badge,
+        root_el.get_text(strip=True) if root_el else "",
+        forms,
+        english_el.get_text(strip=True) if english_el else "",
+        gloss_el.get_text(strip=True) if gloss_el else "",
+    )
+
+
+# ---- Original extraction (reference for the benchmark) ----
+def parse_front_list_find_previous(html):
+    soup = BeautifulSoup(html, "html.parser")
+    entries = []
+    for block in soup.select('div.href.d-inline'):
+        try:
+            # Extract full badge (e.g., "०१.०९३३ घटादयो मितः भ्वादिः")
+            badge_el = block.find_previous("div", class_="badge")
+            badge_text = " ".join(badge_el.stripped_strings) if badge_el else ""
+
+            # Extract root word
+            root_el = block.find("div", class_="list-item-title font-weight-bold")
+            root = root_el.get_text(strip=True) if root_el else ""
+
+            # Extract all forms (even after blank siblings)
+            forms = [
+                div.get_text(strip=True)
+                for div in block.find_all("div", class_="d-inline dark")
+                if div.get_text(strip=True)
+            ]
+
+            # Extract English gloss
+            eng_el = block.find("div", class_="default-english-font")
+            english = eng_el.get_text(strip=True) if eng_el else ""
+
+            # Extract optional gloss (e.g. Hindi)
+            gloss = ""
+            if eng_el:
+                gloss_div = eng_el.find_next_sibling("div")
+                if gloss_div:
+                    gloss = gloss_div.get_text(strip=True)
+
+            entries.append({"badge": badge_text, "root": root, "forms": forms, "english": english, "gloss": gloss})
+
+        except Exception as e:
+            print(f"⚠️ Skipped a block due to error: {e}")
+    return entries
+
+
+def format_front_entry(entry):
+    forms_str = "; ".join(entry["forms"]) if entry["forms"] else ""
+    return f"{entry['badge']} | {entry['root']} | {forms_str} | {entry['english']} | {entry['gloss']}\n" + "-" * 80
@@ -0,0 +1,140 @@
+from bs4 import BeautifulSoup
+import json
+import re
+
+# Extraction for rendered dhatu pages.
+#
+# parse_dhatu(html) returns a plain dict record:
+#   heading: text of #dhatu-title-extra-info (whitespace-collapsed) or None
+#   cards:   [{"header": card header or None, "rows": [[[forms in cell], ...], ...]}]
+# Cards whose header is a loading/offline notice rather than a lakāra are
+# dropped, as the original scraper did. A JSON data payload (FETCH_BACKEND =
+# "http", see http_fetch.py) is read by parse_dhatu_data() instead.
+
+devanagari_re = re.compile(r'[\u0900-\u097F]')
+JUNK_HEADER_WORDS = ["loading", "offline", "please", "chrome", "update", "reset", "enable"]
+
+
+def is_junk_header(header_text):
+    return not devanagari_re.search(header_text) or any(j in header_text.lower() for j in JUNK_HEADER_WORDS)
+
+
+def parse_dhatu(html):
+    if html.lstrip().startswith("{"):
+        return parse_dhatu_data(html)
+    soup = BeautifulSoup(html, "html.parser")
+
+    heading_block = soup.select_one("#dhatu-title-extra-info")
+    heading = ' '.join(heading_block.get_text(separator=' ').split()) if heading_block else None
+
+    cards = []
+    for card in soup.select(".card"):
+        header = None
+        header_div = card.select_one(".card-header")
+        if header_div:
+            header = header_div.get_text(strip=True)
+            if is_junk_header(header):
+                continue
+
+        rows = []
+        for row in card.select("tbody tr"):
+            cells = [[span.get_text(strip=True) for span in td.select("span")] for td in row.select("td")]
+            if cells:
+                rows.append(cells)
+        cards.append({"header": header, "rows": rows})
+
+    return {"heading": heading, "cards": cards}
+
+
+def parse_dhatu_data(text):
+    # The entry's JSON data: heading and lakāra cards, keyed like the record.
+    # Anything else raises ValueError, so HttpFetcher can tell an unrecognised payload
+    # from a page and render it instead.
+    data = json.loads(text)
+    if not isinstance(data, dict) or set(data) - {"heading", "cards"} or not isinstance(data.get("cards"), list):
+        raise ValueError("not a dhatu data payload")
+    heading = data.get("heading")
+    if heading is not None and not isinstance(heading, str):
+        raise ValueError("data payload: heading is not text")
+    cards = []
+    for card in data["cards"]:
+        if not isinstance(card, dict) or set(card) - {"header", "rows"}:
+            raise ValueError("data payload: unknown card fields")
+        header = card.get("header")
+        if header is not None and not isinstance(header, str):
+            raise ValueError("data payload: card header is not text")
+        rows = card.get("rows") or []
+        if not isinstance(rows, list) or not all(
+                isinstance(row, list) and all(isinstance(cell, list) and all(isinstance(f, str) for f in cell)
+                                              for cell in row) for row in rows):
+            raise ValueError("data payload: rows are not lists of cells of forms")
+        if header is not None and is_junk_header(header):
+            continue
+        cards.append({"header": header, "rows": [row for row in rows if row]})
+    return {"heading": heading, "cards": cards}
+
+
+def format_block(idx, record):
+    # "[n] / Heading: / Table:" block written by dhatulinkscontent.py
+    table_lines = []
+    for card in record["cards"]:
+        if card["header"] is not None:
+            table_lines.append(card["header"])
+        for cells in card["rows"]:
+            table_lines.append("    " + " | ".join(" | ".join(forms) for forms in cells))
+        table_lines.append("")
+
+    heading = record["heading"] if record["heading"] is not None else "N/A"
+    return f"""
+[{idx + 1}]
+==============================
+Heading: {heading}
+Table:
+{chr(10).join(table_lines)}
+==============================
+""".strip()
+
+
+CELLS_PER_ROW = 3  # प्रथम/मध्यम/उत्तम rows of एक/द्वि/बहु-वचन cells
+
+
+def parse_block(text):
+    # Inverse of format_block(): (idx, record). The block joins cells and their forms with the
+    # same " | ", so a row is only split back into cells when it has one form per cell. Other
+    # rows keep their place as empty cells and their forms go to record["unassigned_forms"].
+    lines = text.strip().split("\n")
+    m = re.match(r"^\[(\d+)\]$", lines[0].strip())
+    if not m:
+        raise ValueError("block does not start with [n]")
+    if len(lines) < 4 or not lines[2].startswith("Heading: ") or lines[3] != "Table:":
+        raise ValueError("missing Heading:/Table: lines")
+    if lines[-1] != "=" * 30:
+        raise ValueError("block is not closed by =====")
+    heading = lines[2][len("Heading: "):]
+
+    cards = []
+    unassigned = []
+    card = None
+    for line in lines[4:-1]:
+        if not line.strip():
+            card = None
+            continue
+        if card is None:
+            card = {"header": None, "rows": []}
+            cards.append(card)
+            if not line.startswith("    "):
+                card["header"] = line
+                continue
+        if not line.startswith("    "):
+            raise ValueError(f"unindented line inside a card: {line[:60]!r}")
+        items = line[4:].split(" | ")
+        if len(items) == CELLS_PER_ROW:
+            card["rows"].append([[form] if form else [] for form in items])
+        else:
+            unassigned.append({"card": len(cards) - 1, "row": len(card["rows"]), "forms": items})
+            card["rows"].append([[] for _ in range(CELLS_PER_ROW)])
+
+    record = {"heading": None if heading == "N/A" else heading, "cards": cards}
+    if unassigned:
+        record["unassigned_forms"] = unassigned
+    return int(m.group(1)) - 1, record
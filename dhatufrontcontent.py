@@ -1,78 +1,60 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from scroll_driver import scroll_to_end, expected_from
+from dhatu_front_parser import parse_front_list, format_front_entry
+from network_capture import enable_network_log
+from resource_blocking import ResourceBlocker
+import json
 import os
-import time
+
+# ----------- SETTINGS -------------
+DHATU_URL = "https://ashtadhyayi.com/dhatu"
+LINK_FILE = os.path.expanduser("~/Desktop/all_dhatu_links.json")  # only used for the expected entry count
+OUTPUT_FILE = os.path.expanduser("~/Desktop/dhatu_page_all_visible_content.txt")
+BLOCK_TYPES = ("image", "font", "media")  # cancelled via DevTools; stylesheets stay, the list needs layout to scroll
+# ----------------------------------
+# Benchmarks and tests override settings with SCRAPER_SETTINGS='{"NAME": value, ...}'
+globals().update(json.loads(os.environ.get("SCRAPER_SETTINGS", "{}")))
 
 # Setup headless Chrome
 options = Options()
 options.add_argument("--headless")
 options.add_argument("--disable-gpu")
+blocker = ResourceBlocker(BLOCK_TYPES) if BLOCK_TYPES else None
+if blocker:
+    enable_network_log(options)
 driver = webdriver.Chrome(options=options)
+if blocker:
+    blocker.install(driver)
 
 # Step 1: Load dhatu page
-driver.get("https://ashtadhyayi.com/dhatu")
-time.sleep(2)
+driver.get(DHATU_URL)
+WebDriverWait(driver, 60).until(
+    EC.presence_of_element_located((By.CSS_SELECTOR, "div.href.d-inline"))
+)
 
-# Step 2: Scroll to load all entries
+# Step 2: Scroll until the list stops growing
 print("🔄 Scrolling to load all dhātu entries...")
-last_height = driver.execute_script("return document.body.scrollHeight")
-while True:
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(1.5)
-    new_height = driver.execute_script("return document.body.scrollHeight")
-    if new_height == last_height:
-        break
-    last_height = new_height
-print("✅ All entries loaded. Extracting...")
+scrolled = scroll_to_end(
+    driver, "div.href.d-inline", ".list-group-content",
+    expected=expected_from(LINK_FILE),
+)
+print(f"{'✅' if scrolled.complete else '⚠️'} Loaded {scrolled.summary()}. Extracting...")
 
 # Step 3: Parse page content
-soup = BeautifulSoup(driver.page_source, "html.parser")
-blocks = soup.select('div.href.d-inline')
-results = []
-
-for block in blocks:
-    try:
-        # Extract full badge (e.g., "०१.०९३३ घटादयो मितः भ्वादिः")
-        badge_el = block.find_previous("div", class_="badge")
-        badge_text = " ".join(badge_el.stripped_strings) if badge_el else ""
-
-        # Extract root word
-        root_el = block.find("div", class_="list-item-title font-weight-bold")
-        root = root_el.get_text(strip=True) if root_el else ""
-
-        # Extract all forms (even after blank siblings)
-        forms = [
-            div.get_text(strip=True)
-            for div in block.find_all("div", class_="d-inline dark")
-            if div.get_text(strip=True)
-        ]
-        forms_str = "; ".join(forms) if forms else ""
-
-        # Extract English gloss
-        eng_el = block.find("div", class_="default-english-font")
-        english = eng_el.get_text(strip=True) if eng_el else ""
-
-        # Extract optional gloss (e.g. Hindi)
-        gloss = ""
-        if eng_el:
-            gloss_div = eng_el.find_next_sibling("div")
-            if gloss_div:
-                gloss = gloss_div.get_text(strip=True)
-
-        # Final line
-        result_line = f"{badge_text} | {root} | {forms_str} | {english} | {gloss}\n" + "-" * 80
-        results.append(result_line)
-
-    except Exception as e:
-        print(f"⚠️ Skipped a block due to error: {e}")
+results = [format_front_entry(entry) for entry in parse_front_list(driver.page_source)]
 
+if blocker:
+    stats = blocker.page_stats(driver)
+    print(f"🧱 Blocked {stats['blocked']} of {stats['requests']} requests; {stats['loaded_bytes'] / 1024:.0f} KB loaded")
 driver.quit()
 
 # Step 4: Save output
-output_path = os.path.expanduser("~/Desktop/dhatu_page_all_visible_content.txt")
-with open(output_path, "w", encoding="utf-8") as f:
+with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
     f.write("\n".join(results))
 
 print(f"\n✅ Done! Extracted {len(results)} entries.")
-print(f"📄 Output saved to: {output_path}")
+print(f"📄 Output saved to: {OUTPUT_FILE}")
@@ -4,59 +4,100 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-import json, os, time
+from scroll_driver import scroll_to_end, expected_from
+from network_capture import enable_network_log, collect_json_responses, discover, DHATU_KEY_RE
+from resource_blocking import ResourceBlocker
+from metrics import Metrics
+import json, os
 
 # --------------- SETUP ----------------
+# "network" reads the list's JSON data from DevTools events; "scroll" scrolls and parses the DOM
+DISCOVERY_MODE = "network"
+# Cancelled via DevTools; stylesheets stay, the virtualized list needs layout to scroll
+BLOCK_TYPES = ("image", "font", "media")
+# Stage timings, Prometheus text (".json" for a JSON summary), rewritten every 10 s
+metrics_file = os.path.expanduser("~/Desktop/dhatu_links_metrics.prom")
+metrics = Metrics("dhatu_links")
+metrics.start_exporter(metrics_file, interval=10)
+
 # Headless Chrome browser setup
 options = Options()
 options.add_argument("--headless")
 options.add_argument("--disable-gpu")
-driver = webdriver.Chrome(options=options)
+blocker = ResourceBlocker(BLOCK_TYPES) if BLOCK_TYPES else None
+if DISCOVERY_MODE == "network" or blocker:
+    enable_network_log(options)
+with metrics.stage("chrome_startup"):
+    driver = webdriver.Chrome(options=options)
+    if blocker:
+        blocker.install(driver)
 
 # Target URL
 dhatu_url = "https://ashtadhyayi.com/dhatu"
 
-# Output file path
+# Output file paths
 output_file = os.path.expanduser("~/Desktop/all_dhatu_links.json")
+meta_file = os.path.expanduser("~/Desktop/all_dhatu_meta.json")
 # --------------------------------------
 
 # Load the main dhātu page
-driver.get(dhatu_url)
-WebDriverWait(driver, 60).until(
-    EC.presence_of_element_located((By.CLASS_NAME, "list-group-content"))
-)
-
-# Scroll until all dhātu entries load
-print("🔄 Scrolling to load all dhātu entries...")
-last_height = driver.execute_script("return document.body.scrollHeight")
-while True:
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(2)
-    new_height = driver.execute_script("return document.body.scrollHeight")
-    if new_height == last_height:
-        break
-    last_height = new_height
-
-print("✅ All dhātu entries should be loaded.")
-
-# Parse the page content
-soup = BeautifulSoup(driver.page_source, "html.parser")
-
-# Select all <a> tags with IDs like dhatulist-entry-...
-entries = soup.select('a[id^="dhatulist-entry-"]')
-
-# Extract links
+with metrics.stage("driver_get"):
+    driver.get(dhatu_url)
+with metrics.stage("wait_list"):
+    WebDriverWait(driver, 60).until(
+        EC.presence_of_element_located((By.CLASS_NAME, "list-group-content"))
+    )
+
 links = []
-for a in entries:
-    href = a.get("href")
-    if href:
-        full_link = "https://ashtadhyayi.com" + href
-        links.append(full_link)
+metadata = {}
+messages = []  # DevTools events seen while reading the list, for the blocking report
+if DISCOVERY_MODE == "network":
+    print("📡 Reading dhātu list data from network responses...")
+    with metrics.stage("collect_network"):
+        payloads = collect_json_responses(driver, messages=messages)
+    with metrics.stage("discover"):
+        links, metadata = discover(payloads, DHATU_KEY_RE, "https://ashtadhyayi.com/dhatu/")
+    if not links:
+        print("⚠️ No dhātu entries found in network responses, falling back to scrolling.")
+
+if not links:
+    # Scroll until the list stops growing
+    print("🔄 Scrolling to load all dhātu entries...")
+    with metrics.stage("scroll"):
+        scrolled = scroll_to_end(
+            driver, 'a[id^="dhatulist-entry-"]', ".list-group-content", expected=expected_from(output_file)
+        )
+    print(f"{'✅' if scrolled.complete else '⚠️'} Loaded {scrolled.summary()}")
+
+    with metrics.stage("parse"):
+        # Parse the page content
+        soup = BeautifulSoup(driver.page_source, "html.parser")
 
+        # Select all <a> tags with IDs like dhatulist-entry-...
+        entries = soup.select('a[id^="dhatulist-entry-"]')
+
+        # Extract links
+        for a in entries:
+            href = a.get("href")
+            if href:
+                full_link = "https://ashtadhyayi.com" + href
+                links.append(full_link)
+
+if blocker:
+    stats = blocker.page_stats(driver, messages)
+    print(f"🧱 Blocked {stats['blocked']} of {stats['requests']} requests; {stats['loaded_bytes'] / 1024:.0f} KB loaded")
 driver.quit()
 
 # Save to JSON file
-with open(output_file, "w", encoding="utf-8") as f:
-    json.dump(links, f, indent=2)
+with metrics.stage("write"):
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(links, f, indent=2)
+
+    if metadata:
+        with open(meta_file, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        print(f"🗂️ Per-entry metadata saved to:\n→ {meta_file}")
+metrics.close()
+print(metrics.report())
 
 print(f"✅ Extracted {len(links)} dhātu links. Saved to:\n→ {output_file}")
@@ -1,156 +1,300 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from driver_pool import DriverPool, build_options
+from page_cache import PageCache
+from rate_control import AdaptiveThrottle
+from readiness import wait_for_rows
+from spa_nav import SpaNavigator
+from resource_blocking import ResourceBlocker, logged_options, template_pattern
+from crawl_state import CrawlState, worker_name, DONE, FAILED
+from dhatu_parser import parse_dhatu, parse_dhatu_data, format_block
+from record_writer import JsonlWriter, export_parquet, replace_jsonl
+from metrics import Metrics
+from pipeline import Pipeline, start_parse_pool
+from hedging import Hedger, checkpoint, bound_checkpoint
 import os
 import json
 import time
-import re
-import tempfile
-import shutil
 
 # ----------- SETTINGS -------------
-START_INDEX = 0
-END_INDEX = 2260
 INPUT_JSON = os.path.expanduser("~/Desktop/all_dhatu_links.json")
-OUTPUT_DIR = os.path.expanduser("~/Desktop/dhatu_scraped_chunks")
-WAIT_TIMEOUT = 100
-SLEEP_BETWEEN_REQUESTS = 2.0
-MAX_THREADS = 5
+STATE_DB = os.path.expanduser("~/Desktop/dhatu_state.sqlite")  # progress lives here; re-run to resume
+RECORDS_JSONL = os.path.expanduser("~/Desktop/dhatu_records.jsonl")  # one record per page, appended as pages finish
+OUTPUT_DIR = os.path.expanduser("~/Desktop/dhatu_scraped_chunks")  # legacy text chunks; None skips them
+PARQUET_FILE = None  # e.g. "~/Desktop/dhatu_records.parquet" for a columnar export (needs pyarrow)
+WAIT_TIMEOUT = 45  # Known-broken pages fail within a few seconds regardless
+MAX_THREADS = 5  # Fetch threads: upper bound on parallel pages; the throttle decides how many are active
+PARSE_PROCESSES = os.cpu_count() or 1  # Parsing runs in this many processes; 0 parses on one in-process thread
+QUEUE_SIZE = 32  # Fetched pages waiting to be parsed before fetch threads block
+START_CONCURRENCY = 2
+MAX_REQUESTS_PER_SEC = 1.0  # Shared by all threads
+TARGET_LATENCY = 20.0  # Seconds per page above which the throttle backs off
 HEADLESS = True
-CHECKPOINT_INTERVAL = 250
+CHUNK_SIZE = 250  # dhatus per legacy text file
+MAX_ATTEMPTS = 4  # per link, retried automatically with backoff
+RETRY_FAILED = False  # True = give links that already used up their attempts another round
+PAGES_PER_DRIVER = 200  # Recycle each pooled Chrome after this many pages
+FETCH_BACKEND = "selenium"  # "selenium", "http" (the entry's JSON data over HTTP, Selenium as fallback) or "tabs"
+BROWSERS = 2  # "tabs" backend: Chrome processes, each driving TABS_PER_BROWSER tabs over DevTools
+TABS_PER_BROWSER = 16
+HEDGE_PERCENTILE = 0.95  # Re-issue a page on another driver/tab once it runs past this percentile of page times; None = never
+MAX_HEDGES = 2  # Duplicate attempts running at once
+PAGE_DEADLINE = 120  # Seconds per link across its attempts before it fails and is retried later; None = no limit
+NAVIGATION = "full"  # "full" = driver.get per entry; "spa" = move between entries with the app's router (Selenium backend)
+HTTP_DATA_URL = None  # "http" backend: the entry's data request from the DevTools network log, with {key}; e.g. fake_site.DATA_URLS["dhatu"]
+HTTP_BASE_URL = None  # e.g. a mirror or local fixture server; None = the link's own host
+HTTP_CONCURRENCY = 20  # keep-alive connections; the throttle decides how many are busy
+CACHE_DIR = os.path.expanduser("~/Desktop/page_cache/dhatu")  # None disables the raw-page cache
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+CACHE_ONLY = False  # True = re-parse every cached page (done ones too), never touch the site; RECORDS_JSONL is rebuilt
+BLOCK_TYPES = ("image", "font", "media", "stylesheet")  # cancelled via DevTools; () loads everything
+BLOCK_ANALYTICS = True
+METRICS_FILE = os.path.expanduser("~/Desktop/dhatu_metrics.prom")  # Prometheus text; ".json" for a JSON summary
+METRICS_INTERVAL = 30  # seconds between exports while running
 # ----------------------------------
+# Benchmarks and tests override settings with SCRAPER_SETTINGS='{"NAME": value, ...}'
+globals().update(json.loads(os.environ.get("SCRAPER_SETTINGS", "{}")))
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-devanagari_re = re.compile(r'[\u0900-\u097F]')
+# Parse processes are forked first, before any thread (metrics exporter, Chrome) exists
+parse_pool = start_parse_pool(PARSE_PROCESSES)
+# The "tabs" backend runs one fetch thread per tab
+fetch_workers = BROWSERS * TABS_PER_BROWSER if FETCH_BACKEND == "tabs" else MAX_THREADS
 
-# Load all links
+if OUTPUT_DIR:
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Load all links into the crawl state (links seen before keep their progress)
 with open(INPUT_JSON, "r", encoding="utf-8") as f:
     all_links = json.load(f)
-subset_links = all_links[START_INDEX:END_INDEX]
 
-print(f"🔍 Scraping dhatus {START_INDEX} to {END_INDEX} using {MAX_THREADS} threads")
+state = CrawlState(STATE_DB, max_attempts=MAX_ATTEMPTS)
+state.seed(all_links)
+cache = PageCache(CACHE_DIR, max_bytes=CACHE_MAX_BYTES) if CACHE_DIR else None
+if CACHE_ONLY:
+    # Finished pages are re-parsed from the cache; pages that are not cached fail without retries
+    requeued = state.requeue(url for url in state.urls(DONE, FAILED) if cache is not None and url in cache)
+    print(f"🗄️ Cache-only run: re-parsing {requeued} cached pages")
+if RETRY_FAILED:
+    print(f"🔁 Re-queued {state.retry_failed()} failed links")
+counts = state.counts()
+print(f"🔍 Scraping {counts['pending'] + counts['in_flight']} of {len(all_links)} dhatus using {fetch_workers} fetch threads ({counts['done']} already done)")
+
+metrics = Metrics("dhatu")
+metrics.start_exporter(METRICS_FILE, METRICS_INTERVAL)
+
+# Long-lived Chrome drivers with warm per-slot profiles, shared by all workers.
+# Images/fonts/CSS/analytics are blocked in each; the first one loads a page
+# unblocked once to learn what the blocked assets weigh and which URLs are of a blocked type.
+# The entry's data request (HTTP_DATA_URL) is never blocked.
+blocker = ResourceBlocker(
+    BLOCK_TYPES, block_analytics=BLOCK_ANALYTICS, calibrate_url=all_links[0],
+    allow=[template_pattern(HTTP_DATA_URL)] if HTTP_DATA_URL else (),
+) if BLOCK_TYPES else None
+
+def start_driver(driver):
+    # A load that hangs ends at the page deadline instead of holding its driver and hedge thread
+    if PAGE_DEADLINE:
+        driver.set_page_load_timeout(PAGE_DEADLINE)
+    if blocker is not None:
+        blocker.install(driver)
+    return driver
+
+pool = DriverPool(
+    size=MAX_THREADS + (MAX_HEDGES if HEDGE_PERCENTILE else 0), max_pages=PAGES_PER_DRIVER, headless=HEADLESS,
+    options_factory=logged_options if blocker else build_options,
+    on_start=start_driver,
+    metrics=metrics,
+)
+throttle = AdaptiveThrottle(
+    rate=MAX_REQUESTS_PER_SEC, burst=START_CONCURRENCY,
+    initial=START_CONCURRENCY, maximum=fetch_workers, target_latency=TARGET_LATENCY,
+)
+# "tabs" backend: BROWSERS Chrome processes driving TABS_PER_BROWSER tabs each over DevTools,
+# instead of one Chrome per fetch thread (no size calibration: blocked bytes are not estimated)
+tabs = None
+if FETCH_BACKEND == "tabs" and not CACHE_ONLY:
+    from tab_scheduler import TabFetcher
+    tabs = TabFetcher(
+        browsers=BROWSERS, tabs_per_browser=TABS_PER_BROWSER, headless=HEADLESS, pages_per_tab=PAGES_PER_DRIVER,
+        block_patterns=blocker.patterns if blocker else (), on_page=blocker.page_stats if blocker else None,
+        metrics=metrics,
+    )
 
-def scrape_one(idx, url):
-    options = Options()
-    if HEADLESS:
-        options.add_argument("--headless=new")
-        options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
+# "http" backend: the entry's JSON data over keep-alive HTTP, one page per throttle slot
+http = None
+if FETCH_BACKEND == "http" and not CACHE_ONLY:
+    if HTTP_DATA_URL:
+        from http_fetch import HttpFetcher
+        # Only payloads the parser recognises are used (and cached); anything else is rendered
+        http = HttpFetcher(HTTP_DATA_URL, concurrency=HTTP_CONCURRENCY, base_url=HTTP_BASE_URL, validate=parse_dhatu_data)
+    else:
+        print("⚠️ FETCH_BACKEND = \"http\" needs HTTP_DATA_URL; rendering every page in Chrome")
 
-    user_data_dir = tempfile.mkdtemp(prefix=f"chrome_thread_{idx}_")
-    options.add_argument(f"--user-data-dir={user_data_dir}")
+# In-app route changes, verified against the requested key; full loads as fallback
+spa = SpaNavigator("dhatu", ".card tbody tr", ".card-header", timeout=WAIT_TIMEOUT) if NAVIGATION == "spa" else None
 
-    try:
-        driver = webdriver.Chrome(options=options)
-        wait = WebDriverWait(driver, WAIT_TIMEOUT)
+def fetch_with_driver(idx, url):
+    # One page in a pooled Selenium Chrome
+    with ExitStack() as held:
+        with metrics.stage("acquire"):  # throttle wait + driver checkout (and Chrome startup)
+            held.enter_context(throttle.request())
+            driver = held.enter_context(pool.driver())
+        checkpoint()  # a hedged attempt that lost while waiting for a driver
         print(f"[{idx}] Scraping: {url}")
 
-        driver.get(url)
-
-        if not driver.page_source.strip():
-            raise Exception("❌ Empty page source. Likely failed to load.")
-
-        wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card tbody tr")))
-        time.sleep(1)
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-
-        heading_block = soup.select_one("#dhatu-title-extra-info")
-        heading = ' '.join(heading_block.get_text(separator=' ').split()) if heading_block else "N/A"
-
-        table_lines = []
-        for card in soup.select(".card"):
-            header_div = card.select_one(".card-header")
-            if header_div:
-                header_text = header_div.get_text(strip=True)
-                junk = ["loading", "offline", "please", "chrome", "update", "reset", "enable"]
-                if not devanagari_re.search(header_text) or any(j in header_text.lower() for j in junk):
-                    continue
-                table_lines.append(header_text)
-
-            for row in card.select("tbody tr"):
-                row_data = []
-                for td in row.select("td"):
-                    spans = [span.get_text(strip=True) for span in td.select("span")]
-                    combined = " | ".join(spans) if spans else ""
-                    row_data.append(combined)
-                if row_data:
-                    table_lines.append("    " + " | ".join(row_data))
-
-            table_lines.append("")
-
-        block = f"""
-[{idx + 1}]
-==============================
-Heading: {heading}
-Table:
-{chr(10).join(table_lines)}
-==============================
-""".strip()
-
-        driver.quit()
-        shutil.rmtree(user_data_dir)
-        time.sleep(SLEEP_BETWEEN_REQUESTS)
-        return (idx, block, None)
-
-    except Exception as e:
+        routed = False
+        if spa is not None:
+            with metrics.stage("spa_route"):
+                routed = spa.navigate(driver, url, checkpoint)
+        if not routed:
+            with metrics.stage("driver_get"):
+                driver.get(url)
         try:
-            driver.quit()
-        except:
-            pass
-        shutil.rmtree(user_data_dir)
-        return (idx, None, url)
-
-# ---- Auto-resuming with Checkpoints ----
-for batch_start in range(0, len(subset_links), CHECKPOINT_INTERVAL):
-    batch_end = min(batch_start + CHECKPOINT_INTERVAL, len(subset_links))
-    output_path = os.path.join(OUTPUT_DIR, f"dhatus_{START_INDEX + batch_start}_{START_INDEX + batch_end}.txt")
-
-    if os.path.exists(output_path):
-        print(f"✅ Skipping already completed batch: {START_INDEX + batch_start} to {START_INDEX + batch_end}")
-        continue
-
-    print(f"\n🚧 Processing batch: {START_INDEX + batch_start} to {START_INDEX + batch_end - 1}")
-
-    batch_links = subset_links[batch_start:batch_end]
-    results = []
-    batch_failed = []
-
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        futures = {
-            executor.submit(scrape_one, START_INDEX + idx, link): (START_INDEX + idx, link)
-            for idx, link in enumerate(batch_links, start=batch_start)
-        }
-
-        for future in as_completed(futures):
-            idx, link = futures[future]
-            try:
-                result_idx, content, failed = future.result()
-                if content:
-                    results.append((result_idx, content))
-                if failed:
-                    batch_failed.append(failed)
-            except Exception as exc:
-                batch_failed.append(link)
-
-    # Save checkpoint output
-    results.sort(key=lambda x: x[0])
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("\n\n".join(block for _, block in results))
-    print(f"✅ Checkpoint saved: {output_path}")
-
-    if batch_failed:
-        failed_file = os.path.join(
-            OUTPUT_DIR, f"dhatus_failed_{START_INDEX + batch_start}_{START_INDEX + batch_end}.json"
-        )
-        with open(failed_file, "w", encoding="utf-8") as f:
-            json.dump(batch_failed, f, indent=2, ensure_ascii=False)
-        print(f"⚠️ Failed links saved: {failed_file}")
-
-print(f"\n🎉 ALL DONE. Output stored in folder: {OUTPUT_DIR}")
+            if not routed:
+                with metrics.stage("wait_ready"):
+                    wait_for_rows(driver, ".card tbody tr", timeout=WAIT_TIMEOUT, header_selector=".card-header", checkpoint=checkpoint)
+            with metrics.stage("page_source"):
+                page_source = driver.page_source
+        finally:
+            if blocker is not None:
+                blocker.page_stats(driver)  # also drains the log for the next page
+    return page_source
+
+def fetch_in_tab(idx, url):
+    # One page in a scheduler tab (FETCH_BACKEND = "tabs")
+    with ExitStack() as held:
+        with metrics.stage("acquire"):
+            held.enter_context(throttle.request())
+        with metrics.stage("tab_load"):  # navigate, wait for stable rows, read the DOM
+            return tabs.fetch(url, ".card tbody tr", ".card-header", timeout=WAIT_TIMEOUT, checkpoint=bound_checkpoint())
+
+# Slow pages get a duplicate attempt past the observed p95; every link gets a deadline
+fetch_remote = fetch_in_tab if tabs is not None else fetch_with_driver
+if HEDGE_PERCENTILE or PAGE_DEADLINE:
+    fetch_remote = Hedger(fetch_remote, fetch_workers, HEDGE_PERCENTILE, MAX_HEDGES, PAGE_DEADLINE)
+
+def fetch_data(idx, url):
+    # The entry's JSON data (FETCH_BACKEND = "http"); None = not served there, render it instead
+    with throttle.request():
+        with metrics.stage("http_get"):
+            return http.fetch(url)
+
+def fetch_page(idx, url):
+    # Raw HTML (or the entry's JSON data); parsing happens in the parse processes
+    page_source = None
+    if cache is not None:
+        with metrics.stage("cache_get"):
+            page_source = cache.get(url)
+    if page_source is None:
+        if CACHE_ONLY:
+            raise Exception("Not in page cache (CACHE_ONLY mode)")
+        if http is not None:
+            page_source = fetch_data(idx, url)
+        if page_source is None:
+            page_source = fetch_remote(idx, url)
+        if cache is not None:
+            with metrics.stage("cache_put"):
+                cache.put(url, page_source)
+    return page_source
+
+# ---- Fetch threads lease links from the crawl state until nothing is left ----
+# A cache-only run writes a fresh file and swaps it in whole at the end, instead of
+# appending a second record for every re-parsed page
+records_path = RECORDS_JSONL + ".reparse" if CACHE_ONLY else RECORDS_JSONL
+if CACHE_ONLY and os.path.exists(records_path):
+    os.remove(records_path)
+writer = JsonlWriter(records_path)
+
+# One lease owner for the whole process: the writer thread completes pages on behalf of the fetch threads
+owner = worker_name()
+
+def next_link():
+    while True:
+        with metrics.stage("lease"):
+            leased = state.lease(owner)
+        if leased:
+            return leased[0]
+        if not state.has_work():
+            return None
+        time.sleep(min(state.next_due() or 1.0, 5.0))
+
+def write_result(idx, link, parsed, error):
+    # Runs on the single writer thread: the only place records are written and pages completed
+    if error:
+        print(f"⚠️ [{idx}] {link}: {error}")
+        state.fail(link, error, retry=not CACHE_ONLY, worker=owner)  # a re-parse gives the same answer every time
+    else:
+        record = {"idx": idx, "url": link, **parsed}
+        # Only the current lease holder writes: a page that outlived its lease and was leased
+        # again (here or by another process) must not get a second record
+        if state.complete(link, json.dumps(record, ensure_ascii=False), worker=owner):
+            writer.write(record)
+        else:
+            print(f"⚠️ [{idx}] {link}: lease expired before the page was written; left to its current holder")
+
+pipeline = Pipeline(
+    next_link, fetch_page, parse_dhatu, write_result,
+    fetch_workers=fetch_workers, parse_pool=parse_pool, queue_size=QUEUE_SIZE, metrics=metrics,
+).run()
+if parse_pool is not None:
+    parse_pool.close()
+writer.close()
+if CACHE_ONLY:
+    # Every completed page, re-parsed or not, once and in link order
+    replace_jsonl(RECORDS_JSONL, (result for _, _, result in state.results()))
+    os.remove(records_path)
+metrics.close()
+print(metrics.report())
+print(pipeline.summary())
+print(f"📈 Metrics: {METRICS_FILE}")
+
+def completed_records(start=None, end=None):
+    for _, _, result in state.results(start, end):
+        yield json.loads(result)
+
+# ---- Legacy text export as chunk files ----
+if OUTPUT_DIR:
+    for chunk_start in range(0, len(all_links), CHUNK_SIZE):
+        chunk_end = min(chunk_start + CHUNK_SIZE, len(all_links))
+        output_path = os.path.join(OUTPUT_DIR, f"dhatus_{chunk_start}_{chunk_end}.txt")
+        written = 0
+        with open(output_path, "w", encoding="utf-8") as f:
+            for record in completed_records(chunk_start, chunk_end):
+                f.write(("\n\n" if written else "") + format_block(record["idx"], record))
+                written += 1
+        if written:
+            print(f"✅ Saved {written} dhatus: {output_path}")
+        else:
+            os.remove(output_path)
+
+if PARQUET_FILE:
+    rows = export_parquet(completed_records(), os.path.expanduser(PARQUET_FILE), "dhatu")
+    print(f"📦 Parquet export: {rows} records → {PARQUET_FILE}")
+
+failed_links = state.failed_urls()
+if failed_links:
+    failed_file = os.path.join(os.path.dirname(RECORDS_JSONL), "dhatus_failed.json")
+    with open(failed_file, "w", encoding="utf-8") as f:
+        json.dump(failed_links, f, indent=2, ensure_ascii=False)
+    how = "(not in the page cache, or unparseable)" if CACHE_ONLY else f"{MAX_ATTEMPTS} times"
+    print(f"⚠️ {len(failed_links)} links failed {how}: {failed_file}")
+
+if isinstance(fetch_remote, Hedger):
+    fetch_remote.close()  # cancelled attempts let go of their drivers/tabs first
+pool.close()
+if tabs is not None:
+    tabs.close()
+    print(tabs.summary())
+if http is not None:
+    http.close()
+    print(http.summary())
+if spa is not None:
+    print(spa.summary())
+if isinstance(fetch_remote, Hedger):
+    print(fetch_remote.summary())
+stats = throttle.snapshot()
+print(f"🚦 Throttle: ended at {stats['limit']} parallel pages, {stats['decreases']} back-offs, {stats['failures']} unhealthy responses")
+if blocker is not None:
+    print(blocker.summary())
+if cache is not None:
+    print(f"🗄️ Page cache: {cache.hits} hits, {cache.misses} misses, {len(cache)} pages ({cache.total_bytes / 1024 ** 2:.1f} MB)")
+print(f"\n🎉 ALL DONE. {state.counts()['done']} dhatus in {RECORDS_JSONL} ({writer.written} written this run)")
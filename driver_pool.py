@@ -0,0 +1,150 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+from contextlib import contextmanager
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+# Fixed-size pool of long-lived Chrome drivers shared by the scraper threads.
+# Each slot keeps its own user-data-dir for the lifetime of the pool, so a
+# recycled driver comes back up with a warm disk cache for the site's assets.
+
+
+def build_options(headless=True, profile_dir=None, extra_args=()):
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    if profile_dir:
+        options.add_argument(f"--user-data-dir={profile_dir}")
+    for arg in extra_args:
+        options.add_argument(arg)
+    return options
+
+
+class _Slot:
+    def __init__(self, slot_id, profile_dir):
+        self.slot_id = slot_id
+        self.profile_dir = profile_dir
+        self.driver = None
+        self.pages = 0
+
+
+class DriverPool:
+    def __init__(self, size=5, max_pages=200, headless=True, profile_root=None,
+                 options_factory=build_options, on_start=None, metrics=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.headless = headless
+        self.options_factory = options_factory
+        self.on_start = on_start  # called with each new driver, e.g. to install DevTools settings
+        self.metrics = metrics  # optional metrics.Metrics; records "chrome_startup"
+        self.started = 0
+        self.recycled = 0
+
+        self._own_root = profile_root is None
+        self._profile_root = profile_root or tempfile.mkdtemp(prefix="chrome_pool_")
+        self._idle = queue.Queue()
+        self._busy = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+        for slot_id in range(size):
+            profile_dir = os.path.join(self._profile_root, f"slot_{slot_id}")
+            os.makedirs(profile_dir, exist_ok=True)
+            self._idle.put(_Slot(slot_id, profile_dir))
+
+    # ---- Driver lifecycle ----
+    def _start(self, slot):
+        start = time.perf_counter()
+        options = self.options_factory(headless=self.headless, profile_dir=slot.profile_dir)
+        slot.driver = webdriver.Chrome(options=options)
+        slot.pages = 0
+        if self.on_start is not None:
+            self.on_start(slot.driver)
+        if self.metrics is not None:
+            self.metrics.observe("chrome_startup", time.perf_counter() - start)
+        with self._lock:
+            self.started += 1
+
+    def _stop(self, slot):
+        if slot.driver is not None:
+            try:
+                slot.driver.quit()
+            except Exception:
+                pass
+        slot.driver = None
+        slot.pages = 0
+
+    def is_healthy(self, driver):
+        try:
+            driver.execute_script("return document.readyState")
+            return bool(driver.window_handles)
+        except WebDriverException:
+            return False
+
+    # ---- Checkout / return ----
+    def checkout(self, timeout=None):
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+        slot = self._idle.get(timeout=timeout)
+        try:
+            if slot.driver is not None and not self.is_healthy(slot.driver):
+                self._stop(slot)
+                with self._lock:
+                    self.recycled += 1
+            if slot.driver is None:
+                self._start(slot)
+        except Exception:
+            self._stop(slot)
+            self._idle.put(slot)
+            raise
+        with self._lock:
+            self._busy[id(slot.driver)] = slot
+        return slot.driver
+
+    def checkin(self, driver, failed=False):
+        with self._lock:
+            slot = self._busy.pop(id(driver))
+        slot.pages += 1
+        # A failed page only costs us the driver if Chrome itself is gone.
+        if (failed and not self.is_healthy(driver)) or slot.pages >= self.max_pages or self._closed:
+            self._stop(slot)
+            with self._lock:
+                self.recycled += 1
+        self._idle.put(slot)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        drv = self.checkout(timeout=timeout)
+        try:
+            yield drv
+        except BaseException:
+            self.checkin(drv, failed=True)
+            raise
+        self.checkin(drv)
+
+    # ---- Shutdown ----
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                slot = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._stop(slot)
+        if self._own_root:
+            shutil.rmtree(self._profile_root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,161 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote
+import os
+import random
+import sys
+import threading
+import time
+
+# Local stand-in for ashtadhyayi.com that serves recorded pages from fixtures/.
+# /shabda/<key> and /dhatu/<id> return fixtures/<kind>/<key>.html when it
+# exists and fall back to fixtures/<kind>_page.html, so any link from
+# all_shabda_links.json / all_dhatu_links.json resolves once rebased.
+# DATA_URLS[kind] (/data/<kind>/<key>.json) serves the JSON data payload the
+# HTTP backend reads (http_fetch.py): fixtures/<kind>/<key>.json, falling back
+# to fixtures/<kind>_data.json. These are written by hand in the endpoint's
+# format, independently of the parsers, and describe the same entries as the
+# HTML fixtures.
+#
+# Misbehaviour can be injected for load tests: `latency`/`jitter` delay every
+# response, `error_rate` answers with 503, `empty_rate` with an empty page, and
+# `capacity` makes the server overloaded (503s and doubled latency) whenever
+# more requests than that are in flight at once.
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DATA_URLS = {"shabda": "/data/shabda/{key}.json", "dhatu": "/data/dhatu/{key}.json"}
+
+
+class FakeSite:
+    def __init__(self, fixture_dir=FIXTURE_DIR, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, empty_rate=0.0, capacity=None):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.empty_rate = empty_rate
+        self.capacity = capacity
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---- Routing ----
+    def _read(self, name):
+        if name not in self._cache:
+            path = os.path.join(self.fixture_dir, name)
+            if not os.path.isfile(path):
+                return None
+            with open(path, "rb") as f:
+                self._cache[name] = f.read()
+        return self._cache[name]
+
+    def _data(self, kind, key):
+        return self._read(os.path.join(kind, f"{key}.json")) or self._read(f"{kind}_data.json")
+
+    def resolve(self, path):
+        path = unquote(path.split("?", 1)[0].rstrip("/"))
+        for kind in ("shabda", "dhatu"):
+            prefix, suffix = DATA_URLS[kind].split("{key}")
+            if path.startswith(prefix) and path.endswith(suffix):
+                return self._data(kind, path[len(prefix):len(path) - len(suffix)]), "application/json"
+            if path == f"/{kind}":
+                return self._read(f"{kind}_list.html"), "text/html; charset=utf-8"
+            if path.startswith(f"/{kind}/"):
+                key = path[len(kind) + 2:]
+                body = self._read(os.path.join(kind, f"{key}.html")) or self._read(f"{kind}_page.html")
+                return body, "text/html; charset=utf-8"
+        if path.endswith(".js"):
+            return b"", "application/javascript"
+        if path.endswith(".css"):
+            return b"", "text/css"
+        return None, None
+
+    def overloaded(self):
+        return self.capacity is not None and self.in_flight > self.capacity
+
+    def delay(self):
+        if self.latency or self.jitter:
+            latency = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+            time.sleep(latency * 2 if self.overloaded() else latency)
+
+
+def _make_handler(site):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def handle(self):
+            try:
+                super().handle()
+            except ConnectionResetError:
+                pass  # a killed client's idle keep-alive connection
+
+        def do_GET(self):
+            with site._lock:
+                site.requests += 1
+                site.in_flight += 1
+            try:
+                self._respond()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client went away mid-response (killed worker, cancelled request)
+            finally:
+                with site._lock:
+                    site.in_flight -= 1
+
+        def _respond(self):
+            site.delay()
+            if random.random() < site.error_rate or (site.overloaded() and random.random() < 0.5):
+                with site._lock:
+                    site.errors += 1
+                self.send_error(503)
+                return
+            body, content_type = site.resolve(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            if content_type.startswith("text/html") and random.random() < site.empty_rate:
+                body = b""
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    site = FakeSite(port=port)
+    print(f"🧪 Serving fixtures from {site.fixture_dir} at {site.base_url}")
+    try:
+        site._server.serve_forever()
+    except KeyboardInterrupt:
+        site.stop()
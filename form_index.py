@@ -0,0 +1,323 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from array import array
+import bisect
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import unicodedata
+
+# Inverted index from every inflected form in the scraped corpus to where it
+# occurs: which shabda/dhatu entry, which table cell (vibhakti × vacana, or
+# lakāra × puruṣa × vacana) and the entry's gloss. Built from the JSONL records
+# the scrapers write, stored as one flat file that is memory-mapped on open, so
+# loading costs nothing and exact/prefix lookups are a binary search over the
+# sorted form table.
+#
+# File layout (native-endian uint32 arrays, each section 8-byte aligned):
+#   header       magic, version, counts, section offsets
+#   key_offsets  n_keys + 1       byte offsets into key_blob (forms, UTF-8, sorted)
+#   post_offsets n_keys + 1       posting range of each form
+#   postings     n_postings × 4   entry, label string, row, column
+#   entries      n_entries × 5    kind, idx, url string, title string, gloss string
+#   str_offsets  n_strings + 1    byte offsets into str_blob
+#   key_blob, str_blob
+#
+#   python form_index.py build                 # from SHABDA_RECORDS / DHATU_RECORDS
+#   python form_index.py lookup रामेण
+#   python form_index.py prefix रामा
+#   python form_index.py serve [port]          # GET /lookup?form=…  /prefix?q=…&limit=…
+
+# ----------- SETTINGS -------------
+SHABDA_RECORDS = os.path.expanduser("~/Desktop/shabda_records.jsonl")
+DHATU_RECORDS = os.path.expanduser("~/Desktop/dhatu_records.jsonl")
+INDEX_FILE = os.path.expanduser("~/Desktop/forms.idx")
+PORT = 8766
+# ----------------------------------
+
+MAGIC = b"FORMIDX\0"
+VERSION = 1
+KINDS = ("shabda", "dhatu")
+VACANA = ("एकवचनम्", "द्विवचनम्", "बहुवचनम्")
+PURUSHA = ("प्रथमपुरुषः", "मध्यमपुरुषः", "उत्तमपुरुषः")
+SECTIONS = ("key_offsets", "post_offsets", "postings", "entries", "str_offsets", "key_blob", "str_blob")
+_HEADER = struct.Struct("<8sII" + "Q" * (2 * len(SECTIONS)))
+_ALTERNATIVES = re.compile(r"\s*[,/;]\s*")
+
+
+def normalize(form):
+    return unicodedata.normalize("NFC", form.strip())
+
+
+def cell_forms(text):
+    # "रामः" -> [रामः]; "हे राम" -> [हे राम, राम]; "a, b" -> [a, b]
+    forms = []
+    for part in _ALTERNATIVES.split(text):
+        part = normalize(part)
+        if not part or part == "-":
+            continue
+        forms.append(part)
+        if part.startswith("हे "):
+            forms.append(part[3:])
+    return forms
+
+
+def shabda_gloss(record):
+    for label, value in record.get("info") or []:
+        if label == "अर्थः":
+            return value
+    header = record.get("header") or {}
+    return header.get("extra") or ""
+
+
+# ---- Building ----
+def read_records(path):
+    # Last record per url wins: re-scrapes append to the JSONL
+    latest = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                latest[record["url"]] = record
+    return sorted(latest.values(), key=lambda r: r["idx"])
+
+
+class _Builder:
+    def __init__(self):
+        self.postings = {}  # form -> [(entry, label, row, col)]
+        self.entries = []
+        self.strings = {}
+
+    def string(self, text):
+        sid = self.strings.get(text)
+        if sid is None:
+            sid = self.strings[text] = len(self.strings)
+        return sid
+
+    def entry(self, kind, record, title, gloss):
+        self.entries.append((KINDS.index(kind), record["idx"], self.string(record["url"]),
+                             self.string(title or ""), self.string(gloss or "")))
+        return len(self.entries) - 1
+
+    def add(self, form, entry, label, row, col):
+        self.postings.setdefault(form.encode("utf-8"), []).append((entry, self.string(label), row, col))
+
+    def add_shabda(self, record):
+        header = record.get("header") or {}
+        entry = self.entry("shabda", record, header.get("word"), shabda_gloss(record))
+        for row, cells in enumerate(record.get("table") or []):
+            vibhakti = cells[0] if cells else ""
+            for col, text in enumerate(cells[1:]):
+                vacana = VACANA[col] if col < len(VACANA) else str(col + 1)
+                for form in cell_forms(text):
+                    self.add(form, entry, f"{vibhakti} {vacana}", row, col)
+
+    def add_dhatu(self, record):
+        heading = record.get("heading") or ""
+        parts = heading.split()
+        entry = self.entry("dhatu", record, parts[1] if len(parts) > 1 else heading, heading)
+        for card in record.get("cards") or []:
+            lakara = card.get("header") or ""
+            for row, cells in enumerate(card.get("rows") or []):
+                purusha = PURUSHA[row] if row < len(PURUSHA) else str(row + 1)
+                for col, forms in enumerate(cells):
+                    vacana = VACANA[col] if col < len(VACANA) else str(col + 1)
+                    for text in forms:
+                        for form in cell_forms(text):
+                            self.add(form, entry, f"{lakara} {purusha} {vacana}", row, col)
+
+    def write(self, path):
+        keys = sorted(self.postings)
+        key_offsets, post_offsets, postings = array("I", [0]), array("I", [0]), array("I")
+        key_blob = bytearray()
+        for key in keys:
+            key_blob += key
+            key_offsets.append(len(key_blob))
+            for posting in dict.fromkeys(self.postings[key]):  # drop exact duplicates, keep order
+                postings.extend(posting)
+            post_offsets.append(len(postings) // 4)
+        entries = array("I", [v for e in self.entries for v in e])
+        str_offsets, str_blob = array("I", [0]), bytearray()
+        for text in self.strings:  # insertion order == string id
+            str_blob += text.encode("utf-8")
+            str_offsets.append(len(str_blob))
+
+        sections = {"key_offsets": key_offsets.tobytes(), "post_offsets": post_offsets.tobytes(),
+                    "postings": postings.tobytes(), "entries": entries.tobytes(),
+                    "str_offsets": str_offsets.tobytes(), "key_blob": bytes(key_blob), "str_blob": bytes(str_blob)}
+        layout = []
+        offset = _HEADER.size
+        for name in SECTIONS:
+            offset += -offset % 8
+            layout += [offset, len(sections[name])]
+            offset += len(sections[name])
+
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, 0 if sys.byteorder == "little" else 1, *layout))
+            for name, start in zip(SECTIONS, layout[::2]):
+                f.write(b"\0" * (start - f.tell()))
+                f.write(sections[name])
+        os.replace(tmp, path)
+        return len(keys), len(postings) // 4, len(self.entries)
+
+
+def build(path, shabda_records=None, dhatu_records=None):
+    builder = _Builder()
+    if shabda_records and os.path.exists(shabda_records):
+        for record in read_records(shabda_records):
+            builder.add_shabda(record)
+    if dhatu_records and os.path.exists(dhatu_records):
+        for record in read_records(dhatu_records):
+            builder.add_dhatu(record)
+    return builder.write(path)
+
+
+# ---- Querying ----
+class _Keys:
+    # Sequence view over the sorted form table, so bisect can search the mmap directly
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+
+class FormIndex:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, order, *layout = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a form index (version {VERSION})")
+        if order != (0 if sys.byteorder == "little" else 1):
+            raise ValueError(f"{path} was built on a machine with the other byte order")
+        view = memoryview(self._mm)
+        sections = {name: view[start:start + size] for name, start, size in zip(SECTIONS, layout[::2], layout[1::2])}
+        as_uint32 = lambda name: sections[name].cast("I")
+        self._key_offsets = as_uint32("key_offsets")
+        self._post_offsets = as_uint32("post_offsets")
+        self._postings = as_uint32("postings")
+        self._entries = as_uint32("entries")
+        self._str_offsets = as_uint32("str_offsets")
+        self._str_blob = sections["str_blob"]
+        self._keys = _Keys(self._key_offsets, sections["key_blob"])
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _string(self, sid):
+        return str(self._str_blob[self._str_offsets[sid]:self._str_offsets[sid + 1]], "utf-8")
+
+    def entry(self, entry_id):
+        kind, idx, url, title, gloss = self._entries[entry_id * 5:entry_id * 5 + 5]
+        return {"kind": KINDS[kind], "idx": idx, "url": self._string(url),
+                "title": self._string(title), "gloss": self._string(gloss)}
+
+    def _hits(self, i):
+        hits = []
+        for p in range(self._post_offsets[i], self._post_offsets[i + 1]):
+            entry_id, label, row, col = self._postings[p * 4:p * 4 + 4]
+            hits.append({**self.entry(entry_id), "position": self._string(label), "row": row, "col": col})
+        return hits
+
+    def lookup(self, form):
+        key = normalize(form).encode("utf-8")
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._hits(i)
+        return []
+
+    def prefix_range(self, prefix):
+        key = normalize(prefix).encode("utf-8")
+        # 0xff never occurs in UTF-8, so it sorts after every continuation of the prefix
+        return bisect.bisect_left(self._keys, key), bisect.bisect_left(self._keys, key + b"\xff")
+
+    def prefix(self, prefix, limit=50):
+        lo, hi = self.prefix_range(prefix)
+        return [str(self._keys[i], "utf-8") for i in range(lo, min(hi, lo + limit))]
+
+    def close(self):
+        for section in (self._key_offsets, self._post_offsets, self._postings, self._entries, self._str_offsets):
+            section.release()
+        self._keys = self._str_blob = None
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---- Local query API ----
+def _make_handler(index):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            route = parts.path.rstrip("/")
+            if route == "/lookup" and "form" in query:
+                self._reply({"form": query["form"], "hits": index.lookup(query["form"])})
+            elif route == "/prefix" and "q" in query:
+                limit = query.get("limit", "50")
+                if not limit.isdecimal():
+                    return self.send_error(400, f"limit must be a non-negative integer, got {limit!r}")
+                limit = int(limit)
+                lo, hi = index.prefix_range(query["q"])
+                self._reply({"prefix": query["q"], "total": hi - lo, "forms": index.prefix(query["q"], limit)})
+            else:
+                self.send_error(404, "use /lookup?form=… or /prefix?q=…&limit=…")
+
+        def _reply(self, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(index, host="127.0.0.1", port=PORT):
+    server = ThreadingHTTPServer((host, port), _make_handler(index))
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if command == "build":
+        keys, postings, entries = build(INDEX_FILE, SHABDA_RECORDS, DHATU_RECORDS)
+        print(f"📚 Indexed {keys} forms ({postings} occurrences) from {entries} entries "
+              f"→ {INDEX_FILE} ({os.path.getsize(INDEX_FILE) / 1024 ** 2:.1f} MB)")
+    elif command in ("lookup", "prefix"):
+        with FormIndex(INDEX_FILE) as index:
+            result = index.lookup(sys.argv[2]) if command == "lookup" else index.prefix(sys.argv[2])
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif command == "serve":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else PORT
+        index = FormIndex(INDEX_FILE)
+        server = serve(index, port=port)
+        print(f"🔎 {len(index)} forms at http://127.0.0.1:{port}/lookup?form=… and /prefix?q=…")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+            index.close()
+    else:
+        print(f"Unknown command {command!r}: use build, lookup, prefix or serve")
@@ -0,0 +1,191 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+from rate_control import Abandoned
+import threading
+import time
+
+# Hedged page fetches with a per-URL deadline. A Hedger wraps a fetch(idx, url)
+# function: the first attempt runs as usual, and if it is still running once
+# it passes the observed `percentile` of recent page times, a duplicate attempt
+# starts on another driver/tab. The first attempt to succeed wins and the
+# other is cancelled. When neither attempt is done by `deadline` seconds after
+# the page started, both are cancelled and the page fails with TimeoutError,
+# so the crawl state retries it later instead of holding a fetch thread.
+#
+# Cancellation is cooperative. Each attempt runs on a thread with its own
+# cancel flag, and checkpoint() raises there once the attempt is cancelled:
+# rate_control.Abandoned for the loser of a race, which AdaptiveThrottle
+# frees without counting, and PageDeadline (a TimeoutError) past the page
+# deadline, which it counts as an unhealthy response, so pages that blow
+# their deadline slow the crawl down. wait_for_rows/RowWatch and SpaNavigator
+# take it as their `checkpoint` and stop at their next readiness poll. A
+# blocking driver.get() never reaches a checkpoint, so the scrapers also set
+# the drivers' page load timeout to the deadline (set_page_load_timeout).
+#
+# Only `max_hedges` duplicates run at once, so a site-wide slowdown (every page
+# past the threshold) cannot double the load.
+
+_local = threading.local()
+
+
+class PageDeadline(TimeoutError):
+    pass
+
+
+def bound_checkpoint():
+    # checkpoint() for the current attempt, callable from another thread (the tab scheduler's loop)
+    attempt = getattr(_local, "attempt", None)
+
+    def check():
+        if attempt is not None and attempt.cancel.is_set():
+            if attempt.deadline_missed:
+                raise PageDeadline("page deadline passed")
+            raise Abandoned("hedged attempt lost")
+    return check
+
+
+def checkpoint():
+    # Call from inside a hedged fetch; raises Abandoned once the attempt has lost
+    bound_checkpoint()()
+
+
+class _Attempt:
+    def __init__(self, hedge):
+        self.hedge = hedge
+        self.cancel = threading.Event()
+        self.deadline_missed = False
+        self.started = time.monotonic()
+        self.future = None
+
+
+class Hedger:
+    def __init__(self, fetch, workers, percentile=0.95, max_hedges=2, deadline=None,
+                 min_samples=20, window=500, min_delay=1.0):
+        self.fetch = fetch
+        self.percentile = percentile
+        self.max_hedges = max_hedges
+        self.deadline = deadline
+        self.min_samples = min_samples  # no hedging until this many page times are known
+        self.min_delay = min_delay  # never hedge sooner than this, however fast pages are
+        # Losing attempts may still be winding down while new pages start
+        self._executor = ThreadPoolExecutor(max_workers=workers + 4 * max_hedges, thread_name_prefix="hedge")
+        self._samples = deque(maxlen=window)  # seconds per successful attempt
+        self._lock = threading.Lock()
+        self._hedges_running = 0
+        self.pages = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_skips = 0  # past the threshold, but max_hedges duplicates were already running
+        self.deadline_misses = 0
+        self.saved_seconds = 0.0
+
+    def _run(self, attempt, idx, url):
+        _local.attempt = attempt
+        try:
+            html = self.fetch(idx, url)
+        finally:
+            _local.attempt = None
+            if attempt.hedge:
+                with self._lock:
+                    self._hedges_running -= 1
+        with self._lock:
+            self._samples.append(time.monotonic() - attempt.started)
+        return html
+
+    def _start(self, idx, url, hedge=False):
+        attempt = _Attempt(hedge)
+        attempt.future = self._executor.submit(self._run, attempt, idx, url)
+        return attempt
+
+    def threshold(self):
+        # Seconds after which a page gets a duplicate attempt; None while there are too few samples
+        if self.percentile is None:
+            return None
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))])
+
+    def _expected_remaining(self, elapsed):
+        # Mean extra time recent pages slower than `elapsed` took: the estimated saving of a hedge win
+        with self._lock:
+            slower = [s - elapsed for s in self._samples if s > elapsed]
+        return sum(slower) / len(slower) if slower else 0.0
+
+    def _take_hedge(self):
+        with self._lock:
+            if self._hedges_running >= self.max_hedges:
+                self.budget_skips += 1
+                return False
+            self._hedges_running += 1
+            self.hedged += 1
+            return True
+
+    def __call__(self, idx, url):
+        start = time.monotonic()
+        with self._lock:
+            self.pages += 1
+        delay = self.threshold()
+        live = [self._start(idx, url)]
+        errors = []
+        can_hedge = delay is not None
+        while live:
+            now = time.monotonic()
+            timeout = None
+            if can_hedge:
+                timeout = max(0.0, start + delay - now)
+            if self.deadline is not None:
+                remaining = max(0.0, start + self.deadline - now)
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            done, _ = wait([a.future for a in live], timeout, FIRST_COMPLETED)
+
+            for attempt in [a for a in live if a.future in done]:
+                live.remove(attempt)
+                try:
+                    html = attempt.future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                for loser in live:
+                    loser.cancel.set()
+                if attempt.hedge:
+                    saved = self._expected_remaining(time.monotonic() - start)
+                    with self._lock:
+                        self.hedge_wins += 1
+                        self.saved_seconds += saved
+                return html
+
+            # A failed attempt is not hedged: with nothing left running its error fails the page, as before
+            if done:
+                continue
+            if self.deadline is not None and time.monotonic() - start >= self.deadline:
+                for attempt in live:
+                    attempt.deadline_missed = True
+                    attempt.cancel.set()
+                with self._lock:
+                    self.deadline_misses += 1
+                raise TimeoutError(f"no attempt finished within the {self.deadline:g}s page deadline")
+            if can_hedge and time.monotonic() - start >= delay:
+                can_hedge = False  # one duplicate per page at most
+                if self._take_hedge():
+                    live.append(self._start(idx, url, hedge=True))
+        raise errors[0]
+
+    def summary(self):
+        threshold = self.threshold()
+        if self.percentile is None:
+            after = "(hedging off)"
+        elif threshold is None:
+            after = "(too few page times yet)"
+        else:
+            after = f"after {threshold:.1f}s (p{self.percentile * 100:.0f})"
+        rate = self.hedged / self.pages * 100 if self.pages else 0.0
+        return (f"⏩ Hedging: {self.hedged} of {self.pages} pages ({rate:.1f}%) re-issued {after}, "
+                f"{self.hedge_wins} won by the duplicate (~{self.saved_seconds:.0f}s of tail latency saved), "
+                f"{self.budget_skips} skipped at the {self.max_hedges}-duplicate cap, "
+                f"{self.deadline_misses} past the page deadline")
+
+    def close(self):
+        # Losers were told to stop; they return at their next checkpoint
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,129 @@
+import aiohttp
+import asyncio
+import threading
+from urllib.parse import urlsplit
+
+# Browserless fetch backend. The entry pages are a SPA shell whose HTML holds
+# no data, so instead of the page this fetches the JSON request the app makes
+# for the entry (its data endpoint, as seen in the DevTools network log; see
+# network_capture.py) over a small pool of keep-alive connections. The JSON is
+# handed to the same parse functions as the browser's HTML: parse_shabda() and
+# parse_dhatu() recognise a data payload and read it directly.
+#
+# HttpFetcher runs one aiohttp session on a background event loop, so the
+# synchronous fetch threads of the pipeline call fetch(url) one page at a time,
+# each inside their AdaptiveThrottle slot. fetch() returns None when the entry
+# has no data there (404, a body that is not JSON, or JSON that `validate` -
+# parse_shabda_data / parse_dhatu_data - does not recognise) so the caller
+# renders it in Chrome instead and never caches it. It raises HttpError on
+# 429/5xx and timeouts, which the throttle counts as unhealthy responses.
+#
+# data_url is a template with {key} for the last path segment of the link,
+# e.g. "/data/shabda/{key}.json". A path is resolved against base_url, or the
+# link's own origin when base_url is None.
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36"
+
+
+class HttpError(Exception):
+    pass
+
+
+def rebase_url(url, base_url):
+    # Point an ashtadhyayi.com link at another host (mirror, local fixture server)
+    if not base_url:
+        return url
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    return base_url.rstrip("/") + path
+
+
+def data_url(url, template, base_url=None):
+    parts = urlsplit(url)
+    target = template.format(key=parts.path.rstrip("/").rsplit("/", 1)[-1])
+    if target.startswith("/"):
+        origin = base_url.rstrip("/") if base_url else f"{parts.scheme}://{parts.netloc}"
+        target = origin + target
+    return target
+
+
+class HttpFetcher:
+    def __init__(self, data_url, concurrency=20, timeout=30, base_url=None, validate=None):
+        self.data_url = data_url
+        self.validate = validate  # raises ValueError on a payload of another shape
+        self.concurrency = concurrency  # connections kept open; the throttle decides how many are used
+        self.timeout = timeout
+        self.base_url = base_url
+        self.served = 0
+        self.missing = 0
+        self.unrecognised = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._session = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="http-fetch", daemon=True)
+        self._thread.start()
+        self._call(self._open())
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _open(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT, "Accept": "application/json"},
+        )
+
+    async def _get(self, target):
+        try:
+            async with self._session.get(target) as resp:
+                if resp.status == 429 or resp.status >= 500:
+                    raise HttpError(f"HTTP {resp.status} from {target}")
+                if resp.status != 200 or "json" not in resp.headers.get("Content-Type", "").lower():
+                    return None
+                return await resp.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise HttpError(f"{type(e).__name__} fetching {target}") from e
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def fetch(self, url):
+        # JSON text for `url`'s entry, or None = render it in the browser instead
+        try:
+            text = self._call(self._get(data_url(url, self.data_url, self.base_url)))
+        except HttpError:
+            self._count("errors")
+            raise
+        if text is None:
+            self._count("missing")
+            return None
+        if self.validate is not None:
+            try:
+                self.validate(text)
+            except ValueError:
+                self._count("unrecognised")
+                return None
+        self._count("served")
+        return text
+
+    def summary(self):
+        return (f"⚡ HTTP backend: {self.served} pages from the data endpoint, "
+                f"{self.missing + self.unrecognised} rendered in Chrome instead "
+                f"({self.unrecognised} unrecognised payloads), {self.errors} errors")
+
+    def close(self):
+        try:
+            self._call(self._session.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
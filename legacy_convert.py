@@ -0,0 +1,202 @@
+from legacy_text import iter_blocks, legacy_files
+from pipeline import start_parse_pool
+from record_writer import JsonlWriter
+from shabda_parser import parse_complete, parse_tagged
+from dhatu_parser import parse_block
+from collections import deque
+import json
+import os
+import re
+import sys
+import time
+
+# Turns the legacy text outputs back into the JSONL records the scrapers write
+# now ({"idx", "url", **parsed}), without re-scraping:
+#
+#   shabda_output_{START}_{END}.txt   ⟪HEADER⟫/⟪TABLE⟫/⟪INFO⟫ (shabdhas_complete.py)
+#   <<TABLE>>/<<INFO>> files          multishabdhas.py, failed.py ("[n] <link>" first)
+#   dhatus_{a}_{b}.txt                [n] / Heading: / Table: (dhatulinkscontent.py)
+#
+# A block that starts with a "[n] <link>" line (failed.py, and the "⚠️ Error:"
+# blocks of multishabdhas.py) takes its url from that line. Its idx is the
+# link's position in LINK_FILES when the link is listed there, and n otherwise,
+# because failed.py numbers its blocks within the retry list.
+#
+# The files are streamed block by block (legacy_text.iter_blocks) and parsed
+# in chunks of CHUNK_BLOCKS on the fork pool from pipeline.py, with at most
+# IN_FLIGHT chunks outstanding, so memory stays flat however large the inputs.
+# Results are written in input order to OUTPUT_DIR/<kind>_records.jsonl.
+#
+# A block that does not parse is written to PROBLEMS_FILE (file, block number,
+# idx, reason, first line) and the run goes on. So are the "⚠️ Timeout or
+# error loading table." blocks of shabdhas_complete.py and the "⚠️ Error:"
+# blocks of multishabdhas.py (scrape errors, not malformed text: re-run those
+# links), and dhatu rows whose cells held several
+# forms, which the text cannot split back (the record keeps the forms under
+# "unassigned_forms").
+#
+#   python legacy_convert.py                 # LEGACY_FILES
+#   python legacy_convert.py a.txt b.txt     # just these files
+
+# ----------- SETTINGS -------------
+LEGACY_FILES = (  # globs; batch files are converted in link order
+    "~/Desktop/shabda_output_*_*.txt",
+    "~/Desktop/dhatu_scraped_chunks/dhatus_*_*.txt",
+)
+LINK_FILES = {  # block idx -> url
+    "shabda": os.path.expanduser("~/Desktop/all_shabda_links.json"),
+    "dhatu": os.path.expanduser("~/Desktop/all_dhatu_links.json"),
+}
+OUTPUT_DIR = os.path.expanduser("~/Desktop/legacy_records")
+PROBLEMS_FILE = os.path.join(OUTPUT_DIR, "problems.jsonl")
+PROCESSES = os.cpu_count() or 1  # 0 = parse in this process
+CHUNK_BLOCKS = 500  # blocks per pool task
+IN_FLIGHT = 2 * PROCESSES + 2  # chunks submitted ahead of the writer
+# ----------------------------------
+globals().update(json.loads(os.environ.get("SCRAPER_SETTINGS", "{}")))
+
+TIMEOUT_LINE = "⚠️ Timeout or error loading table."
+ERROR_PREFIX = "⚠️ Error:"
+_LINK_LINE = re.compile(r"^\[(\d+)\] (\S+)$")
+
+
+def _first_line(text):
+    return text.split("\n", 1)[0][:120]
+
+
+def convert_block(kind, idx, text):
+    # -> ("record", idx, url, record, warning or None) or ("problem", idx, url, problem, reason);
+    # url is None unless the block names its link
+    url = None
+    try:
+        if kind == "dhatu":
+            idx, record = parse_block(text)
+            unassigned = record.get("unassigned_forms")
+            warning = f"{len(unassigned)} rows with several forms per cell" if unassigned else None
+            return "record", idx, url, record, warning
+        lines = text.split("\n")
+        m = _LINK_LINE.match(lines[0])
+        if m:
+            idx, url = int(m.group(1)), m.group(2)
+            lines = lines[1:]
+            text = "\n".join(lines)
+            if lines and lines[0].startswith(ERROR_PREFIX):
+                return "problem", idx, url, "scrape_error", lines[0]
+        if len(lines) > 1 and lines[1] == TIMEOUT_LINE:
+            return "problem", idx, url, "scrape_error", lines[0]
+        if text.startswith("⟪HEADER⟫"):
+            return "record", idx, url, parse_complete(text), None
+        if text.startswith("Sanskrit Header: "):
+            return "record", idx, url, parse_tagged(text), None
+        raise ValueError("unrecognised block")
+    except ValueError as e:
+        return "problem", idx, url, "malformed", str(e)
+
+
+def convert_chunk(chunk):
+    # Runs in a pool worker: [(kind, idx, text)] -> [convert_block(...)]
+    return [convert_block(kind, idx, text) for kind, idx, text in chunk]
+
+
+def _chunks(files, size):
+    # ([(kind, idx, text)], [(source, block number, first line)]) per `size` blocks, across files
+    blocks, where = [], []
+    for source in files:
+        for n, (kind, idx, text) in enumerate(iter_blocks(source)):
+            blocks.append((kind, idx, text))
+            where.append((source, n, _first_line(text)))
+            if len(blocks) >= size:
+                yield blocks, where
+                blocks, where = [], []
+    if blocks:
+        yield blocks, where
+
+
+def _load_links(link_files):
+    links = {}
+    for kind, path in (link_files or {}).items():
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                links[kind] = json.load(f)
+    return links
+
+
+def convert(files, output_dir=OUTPUT_DIR, problems_file=PROBLEMS_FILE, link_files=LINK_FILES,
+            processes=PROCESSES, chunk_blocks=CHUNK_BLOCKS, in_flight=IN_FLIGHT):
+    links = _load_links(link_files)
+    positions = {kind: {url: i for i, url in enumerate(urls)} for kind, urls in links.items()}
+    outputs = {kind: os.path.join(output_dir, f"{kind}_records.jsonl") for kind in ("shabda", "dhatu")}
+    for path in [*outputs.values(), problems_file]:
+        if os.path.exists(path):  # a re-run replaces the previous conversion instead of appending to it
+            os.remove(path)
+    writers = {}
+    problems = JsonlWriter(problems_file, fsync_every=500)
+    stats = {"blocks": 0, "records": 0, "malformed": 0, "scrape_error": 0, "warnings": 0, "unkeyed": 0}
+    pool = start_parse_pool(processes)
+
+    def write(chunk, where, results):
+        for (kind, _, _), (source, n, first), (status, idx, url, value, detail) in zip(chunk, where, results):
+            stats["blocks"] += 1
+            kind_links = links.get(kind, ())
+            if url is not None:
+                idx = positions.get(kind, {}).get(url, idx)
+            elif idx is not None and idx < len(kind_links):
+                url = kind_links[idx]
+            if status == "problem":
+                stats[value] += 1
+                problems.write({"file": source, "block": n, "kind": kind, "idx": idx, "url": url,
+                                "problem": value, "reason": detail, "first_line": first})
+                continue
+            if detail is not None:
+                stats["warnings"] += 1
+                problems.write({"file": source, "block": n, "kind": kind, "idx": idx, "url": url,
+                                "problem": "warning", "reason": detail, "first_line": first})
+            if idx is None:
+                stats["unkeyed"] += 1
+            if kind not in writers:
+                writers[kind] = JsonlWriter(outputs[kind], fsync_every=500)
+            writers[kind].write({"idx": idx, "url": url, **value})
+            stats["records"] += 1
+
+    start = time.perf_counter()
+    pending = deque()
+    try:
+        for chunk, where in _chunks(files, chunk_blocks):
+            if pool is None:
+                write(chunk, where, convert_chunk(chunk))
+                continue
+            pending.append((chunk, where, pool.submit(convert_chunk, chunk)))
+            while len(pending) >= in_flight:
+                chunk, where, future = pending.popleft()
+                write(chunk, where, future.result())
+        while pending:
+            chunk, where, future = pending.popleft()
+            write(chunk, where, future.result())
+    finally:
+        if pool is not None:
+            pool.close()
+        for writer in writers.values():
+            writer.close()
+        problems.close()
+    stats["seconds"] = time.perf_counter() - start
+    stats["outputs"] = {kind: outputs[kind] for kind in writers}
+    return stats
+
+
+if __name__ == "__main__":
+    files = sys.argv[1:] or legacy_files(LEGACY_FILES)
+    if not files:
+        print("❌ No legacy files found; check LEGACY_FILES")
+        sys.exit(1)
+    print(f"🔄 Converting {len(files)} files on {PROCESSES or 'no'} worker processes...")
+    stats = convert(files)
+    rate = stats["blocks"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(f"✅ {stats['records']} records from {stats['blocks']} blocks in {stats['seconds']:.1f}s "
+          f"({rate:.0f} blocks/s)")
+    for kind, path in stats["outputs"].items():
+        print(f"💾 {kind}: {path}")
+    if stats["malformed"] or stats["scrape_error"] or stats["warnings"]:
+        print(f"⚠️ {stats['malformed']} malformed blocks, {stats['scrape_error']} scrape errors, "
+              f"{stats['warnings']} records with unsplittable rows: see {PROBLEMS_FILE}")
+    if stats["unkeyed"]:
+        print(f"⚠️ {stats['unkeyed']} records came from files without a batch range and have no idx/url")
@@ -0,0 +1,70 @@
+import glob
+import os
+import re
+
+# Block splitting for the legacy text exports, without parsing them:
+#
+#   shabda  blocks ending in a line of 60 "-": the <<TABLE>>/<<INFO>> format
+#           (multishabdhas.py, failed.py) and the ⟪HEADER⟫/⟪TABLE⟫/⟪INFO⟫ format
+#           (shabdhas_complete.py, including its "<link> ⚠️ Timeout" blocks)
+#   dhatu   "[n]" / "=====" / "Heading:" / "Table:" blocks (dhatulinkscontent.py)
+#
+# iter_blocks() streams one file line by line and yields (kind, idx, text) per
+# block. idx is the entry's position in the link list when the file says so:
+# "[n]" in dhatu blocks, or the START of a shabda_output_{START}_{END}.txt
+# batch plus the block's position. Otherwise it is None.
+
+SEPARATOR = "-" * 60
+_DHATU_START = re.compile(r"^\[(\d+)\]$")
+_RANGE = re.compile(r"_(\d+)_(\d+)\.txt$")
+
+
+def detect_kind(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                return "dhatu" if _DHATU_START.match(line.strip()) else "shabda"
+    return None
+
+
+def batch_start(path):
+    m = _RANGE.search(os.path.basename(path))
+    return int(m.group(1)) if m else None
+
+
+def iter_blocks(path, kind=None):
+    kind = kind or detect_kind(path)
+    start = batch_start(path) if kind == "shabda" else None
+    lines = []
+    idx = None
+    n = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if kind == "dhatu":
+                m = _DHATU_START.match(line.strip())
+                if m:
+                    if lines:
+                        yield kind, idx, "\n".join(lines).strip()
+                    lines, idx = [line], int(m.group(1)) - 1
+                    continue
+                if lines:
+                    lines.append(line)
+            elif line == SEPARATOR:
+                lines.append(line)
+                text = "\n".join(lines).strip()
+                if text != SEPARATOR:
+                    yield kind, None if start is None else start + n, text
+                    n += 1
+                lines = []
+            else:
+                lines.append(line)
+    text = "\n".join(lines).strip()
+    if text:  # a truncated last block, e.g. from an interrupted run
+        yield kind, idx if kind == "dhatu" else (None if start is None else start + n), text
+
+
+def legacy_files(patterns):
+    # Expanded globs in link order: batch files by their START index, the rest by name
+    paths = sorted({p for pattern in patterns for p in glob.glob(os.path.expanduser(pattern))})
+    return sorted(paths, key=lambda p: (batch_start(p) is None, batch_start(p) or 0, p))
@@ -0,0 +1,207 @@
+from contextlib import contextmanager
+import bisect
+import json
+import os
+import threading
+import time
+
+# Per-stage timing for the scrapers. Wrap each step of a page in
+# `with metrics.stage("driver_get"):` and the run keeps a latency histogram per
+# stage, error counts by stage and cause, pages in flight and overall
+# throughput. Exports are a Prometheus text file (any path not ending in
+# .json) or a JSON summary with p50/p95/p99 per stage, written every
+# `interval` seconds while the run is going and once more at the end.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120)
+
+
+def error_cause(exc):
+    # PageNotReady and friends carry a short reason; everything else is its type
+    reason = getattr(exc, "reason", None)
+    return f"{type(exc).__name__}: {reason}" if reason else type(exc).__name__
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        # Linear interpolation inside the bucket holding the q-th observation
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = min(self.buckets[i] if i < len(self.buckets) else self.max, self.max)
+                lower = min(lower, upper)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    def __init__(self, namespace="scrape"):
+        self.namespace = namespace
+        self.started = time.time()
+        self.stages = {}  # stage -> Histogram
+        self.errors = {}  # (stage, cause) -> count
+        self.pages = {"ok": 0, "failed": 0}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._exporter = None
+
+    # ---- Recording ----
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def error(self, stage, cause):
+        with self._lock:
+            self.errors[(stage, cause)] = self.errors.get((stage, cause), 0) + 1
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(name, error_cause(e))
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def begin_page(self):
+        # For pages whose stages run on different threads; pair with end_page()
+        with self._lock:
+            self.in_flight += 1
+        return time.perf_counter()
+
+    def end_page(self, started, ok=True):
+        self.observe("page", time.perf_counter() - started)
+        with self._lock:
+            self.in_flight -= 1
+            self.pages["ok" if ok else "failed"] += 1
+
+    @contextmanager
+    def page(self):
+        # Whole-page timing plus the in-flight gauge; a raised error counts the page as failed.
+        # Set page["ok"] = False from inside for pages that fail without raising.
+        outcome = {"ok": True}
+        started = self.begin_page()
+        try:
+            yield outcome
+        except Exception:
+            outcome["ok"] = False
+            raise
+        finally:
+            self.end_page(started, outcome["ok"])
+
+    # ---- Reporting ----
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.time() - self.started
+            done = self.pages["ok"] + self.pages["failed"]
+            return {
+                "namespace": self.namespace,
+                "elapsed_seconds": round(elapsed, 3),
+                "pages": dict(self.pages),
+                "in_flight": self.in_flight,
+                "pages_per_second": done / elapsed if elapsed else 0.0,
+                "stages": {name: h.summary() for name, h in sorted(self.stages.items())},
+                "errors": [{"stage": s, "cause": c, "count": n} for (s, c), n in sorted(self.errors.items())],
+            }
+
+    def to_prometheus(self):
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            elapsed = time.time() - self.started
+            done = self.pages["ok"] + self.pages["failed"]
+            lines += [f"# HELP {ns}_stage_seconds Time spent in each scrape stage",
+                      f"# TYPE {ns}_stage_seconds histogram"]
+            for name, h in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, n in zip(h.buckets + ("+Inf",), h.counts):
+                    cumulative += n
+                    lines.append(f'{ns}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{ns}_stage_seconds_sum{{stage="{name}"}} {h.sum:.6f}')
+                lines.append(f'{ns}_stage_seconds_count{{stage="{name}"}} {h.count}')
+            lines += [f"# TYPE {ns}_errors_total counter"]
+            for (stage, cause), n in sorted(self.errors.items()):
+                cause = cause.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{ns}_errors_total{{stage="{stage}",cause="{cause}"}} {n}')
+            lines += [f"# TYPE {ns}_pages_total counter"]
+            for outcome, n in self.pages.items():
+                lines.append(f'{ns}_pages_total{{outcome="{outcome}"}} {n}')
+            lines += [f"# TYPE {ns}_in_flight gauge", f"{ns}_in_flight {self.in_flight}",
+                      f"# TYPE {ns}_pages_per_second gauge", f"{ns}_pages_per_second {done / elapsed if elapsed else 0.0:.4f}",
+                      f"# TYPE {ns}_elapsed_seconds gauge", f"{ns}_elapsed_seconds {elapsed:.3f}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        # Atomic, so a scraper of the file never sees half an export
+        if path.endswith(".json"):
+            text = json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+        else:
+            text = self.to_prometheus()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def report(self):
+        snap = self.snapshot()
+        lines = [f"⏱️ {snap['pages']['ok']} ok / {snap['pages']['failed']} failed pages, "
+                 f"{snap['pages_per_second']:.2f} pages/sec"]
+        for name, s in snap["stages"].items():
+            lines.append(f"   {name:<16} n={s['count']:<6} p50 {s['p50'] * 1000:8.0f} ms   "
+                         f"p95 {s['p95'] * 1000:8.0f} ms   max {s['max'] * 1000:8.0f} ms")
+        for e in snap["errors"]:
+            lines.append(f"   ⚠️ {e['stage']}: {e['cause']} × {e['count']}")
+        return "\n".join(lines)
+
+    # ---- Periodic export ----
+    def start_exporter(self, path, interval=30):
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.write(path)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self._exporter = (stop, thread, path)
+
+    def close(self):
+        # Stops the periodic exporter and writes the final export
+        if self._exporter is not None:
+            stop, thread, path = self._exporter
+            stop.set()
+            thread.join()
+            self.write(path)
+            self._exporter = None
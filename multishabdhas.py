@@ -1,128 +1,290 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from functools import partial
+from driver_pool import DriverPool, build_options
+from page_cache import PageCache
+from rate_control import AdaptiveThrottle
+from readiness import wait_for_rows
+from spa_nav import SpaNavigator
+from resource_blocking import ResourceBlocker, logged_options, template_pattern
+from crawl_state import CrawlState, worker_name, DONE, FAILED
+from shabda_parser import parse_shabda, parse_shabda_data, format_tagged
+from record_writer import JsonlWriter, export_parquet, replace_jsonl
+from metrics import Metrics
+from pipeline import Pipeline, start_parse_pool
+from hedging import Hedger, checkpoint, bound_checkpoint
 import os
 import time
 import json
 
 # ----------- SETTINGS -------------
-START_INDEX = 0
-END_INDEX = 50
 LINK_FILE = os.path.expanduser("~/Desktop/all_shabda_links.json")
-OUTPUT_FILE = os.path.expanduser(f"~/Desktop/shabda_output_{START_INDEX}_{END_INDEX}.txt")
+STATE_DB = os.path.expanduser("~/Desktop/shabda_state.sqlite")  # progress lives here; re-run to resume
+RECORDS_JSONL = os.path.expanduser("~/Desktop/shabda_records.jsonl")  # one record per page, appended as pages finish
+OUTPUT_FILE = os.path.expanduser("~/Desktop/shabda_output.txt")  # legacy text export; None skips it
+PARQUET_FILE = None  # e.g. "~/Desktop/shabda_records.parquet" for a columnar export (needs pyarrow)
+FAILED_JSON = os.path.expanduser("~/Desktop/shabda_failed.json")
+MAX_ATTEMPTS = 4  # per link, retried automatically with backoff
+RETRY_FAILED = False  # True = give links that already used up their attempts another round
 WAIT_TIME = 40
-SLEEP_BETWEEN_REQUESTS = 1.5
-MAX_THREADS = 10  # Adjust as per machine capacity
+MAX_THREADS = 10  # Fetch threads: upper bound on parallel pages; the throttle decides how many are active
+PARSE_PROCESSES = os.cpu_count() or 1  # Parsing runs in this many processes; 0 parses on one in-process thread
+QUEUE_SIZE = 32  # Fetched pages waiting to be parsed before fetch threads block
+START_CONCURRENCY = 2
+MAX_REQUESTS_PER_SEC = 2.0  # Shared by all threads
+TARGET_LATENCY = 15.0  # Seconds per page above which the throttle backs off
+PAGES_PER_DRIVER = 200  # Recycle each pooled Chrome after this many pages
+FETCH_BACKEND = "selenium"  # "selenium", "http" (the entry's JSON data over HTTP, Selenium as fallback) or "tabs"
+BROWSERS = 2  # "tabs" backend: Chrome processes, each driving TABS_PER_BROWSER tabs over DevTools
+TABS_PER_BROWSER = 16
+HEDGE_PERCENTILE = 0.95  # Re-issue a page on another driver/tab once it runs past this percentile of page times; None = never
+MAX_HEDGES = 2  # Duplicate attempts running at once
+PAGE_DEADLINE = 90  # Seconds per link across its attempts before it fails and is retried later; None = no limit
+NAVIGATION = "full"  # "full" = driver.get per entry; "spa" = move between entries with the app's router (Selenium backend)
+HTTP_DATA_URL = None  # "http" backend: the entry's data request from the DevTools network log, with {key}; e.g. fake_site.DATA_URLS["shabda"]
+HTTP_BASE_URL = None  # e.g. a mirror or local fixture server; None = the link's own host
+HTTP_CONCURRENCY = 20  # keep-alive connections; the throttle decides how many are busy
+PARSER_BACKEND = "lxml"  # "lxml", "bs4" (strained) or "html.parser"
+CACHE_DIR = os.path.expanduser("~/Desktop/page_cache/shabda")  # None disables the raw-page cache
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+CACHE_ONLY = False  # True = re-parse every cached page (done ones too), never touch the site; RECORDS_JSONL is rebuilt
+BLOCK_TYPES = ("image", "font", "media", "stylesheet")  # cancelled via DevTools; () loads everything
+BLOCK_ANALYTICS = True
+METRICS_FILE = os.path.expanduser("~/Desktop/shabda_metrics.prom")  # Prometheus text; ".json" for a JSON summary
+METRICS_INTERVAL = 30  # seconds between exports while running
 # ----------------------------------
+# Benchmarks and tests override settings with SCRAPER_SETTINGS='{"NAME": value, ...}'
+globals().update(json.loads(os.environ.get("SCRAPER_SETTINGS", "{}")))
 
-# Load full link list
+# Parse processes are forked first, before any thread (metrics exporter, Chrome) exists
+parse_pool = start_parse_pool(PARSE_PROCESSES)
+# The "tabs" backend runs one fetch thread per tab
+fetch_workers = BROWSERS * TABS_PER_BROWSER if FETCH_BACKEND == "tabs" else MAX_THREADS
+
+# Load full link list into the crawl state (links seen before keep their progress)
 with open(LINK_FILE, "r", encoding="utf-8") as f:
     all_links = json.load(f)
 
-subset_links = all_links[START_INDEX:END_INDEX]
-print(f"🔍 Scraping links {START_INDEX} to {END_INDEX} using {MAX_THREADS} threads (Total: {len(subset_links)})")
-
-def scrape_one(index, link):
-    result = f"[{index}] {link}\n"
-    try:
-        # Setup headless Chrome per thread
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--disable-gpu")
-        driver = webdriver.Chrome(options=options)
-        wait = WebDriverWait(driver, WAIT_TIME)
-
-        driver.get(link)
-        wait.until(EC.presence_of_element_located((By.CLASS_NAME, "table-bordered")))
-        time.sleep(1)
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-
-        # Header
-        header_div = soup.find("div", class_="pt-2 mb-2 d-flex justify-content-between")
-        header_info = "Sanskrit Header: "
-        if header_div:
-            parts = [
-                header_div.find("span", class_="text-font align-middle text-secondary"),
-                header_div.find("span", class_="title-font font-weight-bold"),
-                header_div.find("span", class_="align-middle ml-2 list-item-title-color text-font"),
-                header_div.find("div", class_="mt-2 mb-2 align-middle subtext-font grey")
-            ]
-            header_info += " ".join(p.get_text(strip=True) for p in parts if p)
-        else:
-            header_info += "❌ No header content found."
-
-        # Table
-        table = soup.find("table", class_="table table-layout-fixed bg-light table-bordered")
-        table_lines = []
-        if table:
-            rows = table.find("tbody").find_all("tr")
-            for row in rows:
-                cols = row.find_all("td")
-                line = "\t".join(col.get_text(strip=True) for col in cols)
-                if line:
-                    table_lines.append(line)
+state = CrawlState(STATE_DB, max_attempts=MAX_ATTEMPTS)
+state.seed(all_links)
+cache = PageCache(CACHE_DIR, max_bytes=CACHE_MAX_BYTES) if CACHE_DIR else None
+if CACHE_ONLY:
+    # Finished pages are re-parsed from the cache; pages that are not cached fail without retries
+    requeued = state.requeue(url for url in state.urls(DONE, FAILED) if cache is not None and url in cache)
+    print(f"🗄️ Cache-only run: re-parsing {requeued} cached pages")
+if RETRY_FAILED:
+    print(f"🔁 Re-queued {state.retry_failed()} failed links")
+counts = state.counts()
+print(f"🔍 Scraping {counts['pending'] + counts['in_flight']} of {len(all_links)} links using {fetch_workers} fetch threads ({counts['done']} already done)")
+
+metrics = Metrics("shabda")
+metrics.start_exporter(METRICS_FILE, METRICS_INTERVAL)
+
+# One long-lived headless Chrome per worker thread. Images/fonts/CSS/analytics
+# are blocked in each; the first one loads a page unblocked once to learn what
+# the blocked assets weigh and which URLs are of a blocked type.
+# The entry's data request (HTTP_DATA_URL) is never blocked.
+blocker = ResourceBlocker(
+    BLOCK_TYPES, block_analytics=BLOCK_ANALYTICS, calibrate_url=all_links[0],
+    allow=[template_pattern(HTTP_DATA_URL)] if HTTP_DATA_URL else (),
+) if BLOCK_TYPES else None
+
+def start_driver(driver):
+    # A load that hangs ends at the page deadline instead of holding its driver and hedge thread
+    if PAGE_DEADLINE:
+        driver.set_page_load_timeout(PAGE_DEADLINE)
+    if blocker is not None:
+        blocker.install(driver)
+    return driver
+
+pool = DriverPool(
+    size=MAX_THREADS + (MAX_HEDGES if HEDGE_PERCENTILE else 0), max_pages=PAGES_PER_DRIVER,
+    options_factory=logged_options if blocker else build_options,
+    on_start=start_driver,
+    metrics=metrics,
+)
+throttle = AdaptiveThrottle(
+    rate=MAX_REQUESTS_PER_SEC, burst=START_CONCURRENCY,
+    initial=START_CONCURRENCY, maximum=fetch_workers, target_latency=TARGET_LATENCY,
+)
+# "tabs" backend: BROWSERS Chrome processes driving TABS_PER_BROWSER tabs each over DevTools,
+# instead of one Chrome per fetch thread (no size calibration: blocked bytes are not estimated)
+tabs = None
+if FETCH_BACKEND == "tabs" and not CACHE_ONLY:
+    from tab_scheduler import TabFetcher
+    tabs = TabFetcher(
+        browsers=BROWSERS, tabs_per_browser=TABS_PER_BROWSER, pages_per_tab=PAGES_PER_DRIVER,
+        block_patterns=blocker.patterns if blocker else (), on_page=blocker.page_stats if blocker else None,
+        metrics=metrics,
+    )
+
+# "http" backend: the entry's JSON data over keep-alive HTTP, one page per throttle slot
+http = None
+if FETCH_BACKEND == "http" and not CACHE_ONLY:
+    if HTTP_DATA_URL:
+        from http_fetch import HttpFetcher
+        # Only payloads the parser recognises are used (and cached); anything else is rendered
+        http = HttpFetcher(HTTP_DATA_URL, concurrency=HTTP_CONCURRENCY, base_url=HTTP_BASE_URL, validate=parse_shabda_data)
+    else:
+        print("⚠️ FETCH_BACKEND = \"http\" needs HTTP_DATA_URL; rendering every page in Chrome")
+
+# Runs in the parse processes, so it has to be picklable
+parse_page = partial(parse_shabda, backend=PARSER_BACKEND)
+
+# In-app route changes, verified against the requested key; full loads as fallback
+spa = SpaNavigator("shabda", ".table-bordered tbody tr", timeout=WAIT_TIME) if NAVIGATION == "spa" else None
+
+def fetch_with_driver(index, link):
+    # One page in a pooled Selenium Chrome
+    with ExitStack() as held:
+        with metrics.stage("acquire"):  # throttle wait + driver checkout (and Chrome startup)
+            held.enter_context(throttle.request())
+            driver = held.enter_context(pool.driver())
+        checkpoint()  # a hedged attempt that lost while waiting for a driver
+        routed = False
+        if spa is not None:
+            with metrics.stage("spa_route"):
+                routed = spa.navigate(driver, link, checkpoint)
+        if not routed:
+            with metrics.stage("driver_get"):
+                driver.get(link)
+        try:
+            if not routed:
+                with metrics.stage("wait_ready"):
+                    wait_for_rows(driver, ".table-bordered tbody tr", timeout=WAIT_TIME, checkpoint=checkpoint)
+            with metrics.stage("page_source"):
+                page_source = driver.page_source
+        finally:
+            if blocker is not None:
+                blocker.page_stats(driver)  # also drains the log for the next page
+    return page_source
+
+def fetch_in_tab(index, link):
+    # One page in a scheduler tab (FETCH_BACKEND = "tabs")
+    with ExitStack() as held:
+        with metrics.stage("acquire"):
+            held.enter_context(throttle.request())
+        with metrics.stage("tab_load"):  # navigate, wait for stable rows, read the DOM
+            return tabs.fetch(link, ".table-bordered tbody tr", timeout=WAIT_TIME, checkpoint=bound_checkpoint())
+
+# Slow pages get a duplicate attempt past the observed p95; every link gets a deadline
+fetch_remote = fetch_in_tab if tabs is not None else fetch_with_driver
+if HEDGE_PERCENTILE or PAGE_DEADLINE:
+    fetch_remote = Hedger(fetch_remote, fetch_workers, HEDGE_PERCENTILE, MAX_HEDGES, PAGE_DEADLINE)
+
+def fetch_data(index, link):
+    # The entry's JSON data (FETCH_BACKEND = "http"); None = not served there, render it instead
+    with throttle.request():
+        with metrics.stage("http_get"):
+            return http.fetch(link)
+
+def fetch_page(index, link):
+    # Raw HTML (or the entry's JSON data); parsing happens in the parse processes
+    page_source = None
+    if cache is not None:
+        with metrics.stage("cache_get"):
+            page_source = cache.get(link)
+    if page_source is None:
+        if CACHE_ONLY:
+            raise Exception("Not in page cache (CACHE_ONLY mode)")
+        if http is not None:
+            page_source = fetch_data(index, link)
+        if page_source is None:
+            page_source = fetch_remote(index, link)
+        if cache is not None:
+            with metrics.stage("cache_put"):
+                cache.put(link, page_source)
+    return page_source
+
+# --- Fetch threads lease links from the crawl state until nothing is left ---
+# A cache-only run writes a fresh file and swaps it in whole at the end, instead of
+# appending a second record for every re-parsed page
+records_path = RECORDS_JSONL + ".reparse" if CACHE_ONLY else RECORDS_JSONL
+if CACHE_ONLY and os.path.exists(records_path):
+    os.remove(records_path)
+writer = JsonlWriter(records_path)
+
+# One lease owner for the whole process: the writer thread completes pages on behalf of the fetch threads
+owner = worker_name()
+
+def next_link():
+    while True:
+        with metrics.stage("lease"):
+            leased = state.lease(owner)
+        if leased:
+            return leased[0]
+        if not state.has_work():
+            return None
+        time.sleep(min(state.next_due() or 1.0, 5.0))
+
+def write_result(idx, link, parsed, error):
+    # Runs on the single writer thread: the only place records are written and pages completed
+    if error:
+        print(f"⚠️ [{idx}] {link}: {error}")
+        state.fail(link, error, retry=not CACHE_ONLY, worker=owner)  # a re-parse gives the same answer every time
+    else:
+        record = {"idx": idx, "url": link, **parsed}
+        # Only the current lease holder writes: a page that outlived its lease and was leased
+        # again (here or by another process) must not get a second record
+        if state.complete(link, json.dumps(record, ensure_ascii=False), worker=owner):
+            writer.write(record)
         else:
-            table_lines.append("❌ No table found.")
-
-        # Info Section
-        info_section = []
-        for label in soup.find_all("span", class_="list-item-title-color"):
-            sibling = label.find_next_sibling("span", class_="dark")
-            if sibling:
-                info_section.append(f"{label.get_text(strip=True)}: {sibling.get_text(strip=True)}")
-
-        for block in soup.find_all("div", class_="text-font"):
-            label = block.find("span", class_="list-item-title-color")
-            value = block.find("span", class_="dark")
-            if label and value:
-                info_section.append(f"{label.get_text(strip=True)}: {value.get_text(strip=True)}")
-
-        kosha_blocks = soup.find_all("div", class_="text-font default-english-font list-group-item p-2")
-        for block in kosha_blocks:
-            if not block.find("span", class_="dark"):
-                label = block.get_text(strip=True)
-                if label:
-                    info_section.append(f"Kosha Name: {label}")
-
-        sanskrit_details = soup.find_all("span", class_="default-sanskrit-font dark")
-        for span in sanskrit_details:
-            long_text = span.get_text(strip=True)
-            if long_text and len(long_text) > 20:
-                info_section.append(f"Sanskrit Detail: {long_text}")
-
-
-                full = f"{header_info}\n"
-                full += "<<TABLE>>\n" + "\n".join(table_lines) + "\n</TABLE>"
-                if info_section:
-                    full += "\n<<INFO>>\n" + "\n".join(info_section) + "\n</INFO>"
-                    full += "\n" + ("-" * 60)
-
-
-        driver.quit()
-        time.sleep(SLEEP_BETWEEN_REQUESTS)
-        return index, full
-
-    except Exception as e:
-        return index, f"[{index}] {link}\n⚠️ Error: {e}\n{'-'*60}"
-
-# --- Multithreading block with ordered output ---
-results_dict = {}
-with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-    futures = {
-        executor.submit(scrape_one, idx, link): idx for idx, link in enumerate(subset_links, START_INDEX)
-    }
-    for future in as_completed(futures):
-        idx, content = future.result()
-        results_dict[idx] = content
-
-# Sort and write output
-ordered_results = [results_dict[i] for i in sorted(results_dict)]
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    f.write("\n\n".join(ordered_results))
-
-print(f"\n✅ Done. Output saved to: {OUTPUT_FILE}")
+            print(f"⚠️ [{idx}] {link}: lease expired before the page was written; left to its current holder")
+
+pipeline = Pipeline(
+    next_link, fetch_page, parse_page, write_result,
+    fetch_workers=fetch_workers, parse_pool=parse_pool, queue_size=QUEUE_SIZE, metrics=metrics,
+).run()
+if parse_pool is not None:
+    parse_pool.close()
+writer.close()
+if CACHE_ONLY:
+    # Every completed page, re-parsed or not, once and in link order
+    replace_jsonl(RECORDS_JSONL, (result for _, _, result in state.results()))
+    os.remove(records_path)
+if isinstance(fetch_remote, Hedger):
+    fetch_remote.close()  # cancelled attempts let go of their drivers/tabs first
+pool.close()
+if tabs is not None:
+    tabs.close()
+    print(tabs.summary())
+if http is not None:
+    http.close()
+    print(http.summary())
+if spa is not None:
+    print(spa.summary())
+if isinstance(fetch_remote, Hedger):
+    print(fetch_remote.summary())
+metrics.close()
+print(metrics.report())
+print(pipeline.summary())
+print(f"📈 Metrics: {METRICS_FILE}")
+stats = throttle.snapshot()
+print(f"🚦 Throttle: ended at {stats['limit']} parallel pages, {stats['decreases']} back-offs, {stats['failures']} unhealthy responses")
+if blocker is not None:
+    print(blocker.summary())
+if cache is not None:
+    print(f"🗄️ Page cache: {cache.hits} hits, {cache.misses} misses, {len(cache)} pages ({cache.total_bytes / 1024 ** 2:.1f} MB)")
+
+def completed_records():
+    for _, _, result in state.results():
+        yield json.loads(result)
+
+# Legacy text export, streamed in link order
+if OUTPUT_FILE:
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        for n, record in enumerate(completed_records()):
+            f.write(("\n\n" if n else "") + format_tagged(record))
+    print(f"📝 Text export: {OUTPUT_FILE}")
+
+if PARQUET_FILE:
+    rows = export_parquet(completed_records(), os.path.expanduser(PARQUET_FILE), "shabda")
+    print(f"📦 Parquet export: {rows} records → {PARQUET_FILE}")
+
+failed_links = state.failed_urls()
+if failed_links:
+    with open(FAILED_JSON, "w", encoding="utf-8") as f:
+        json.dump(failed_links, f, indent=2, ensure_ascii=False)
+    how = "(not in the page cache, or unparseable)" if CACHE_ONLY else f"{MAX_ATTEMPTS} times"
+    print(f"⚠️ {len(failed_links)} links failed {how}: {FAILED_JSON}")
+
+print(f"\n✅ Done. {state.counts()['done']} pages in {RECORDS_JSONL} ({writer.written} written this run)")
@@ -0,0 +1,98 @@
+import base64
+import json
+import re
+import time
+
+# Link discovery from the list page's own data requests. Chrome's performance
+# log carries the DevTools Network.* events; we pick out JSON responses, read
+# their bodies over CDP and walk the payloads for entry ids, instead of
+# scrolling the virtualized list and serializing the whole DOM.
+
+SHABDA_KEY_RE = re.compile(r"^@[A-Za-z~^'|_]+\d+$")  # e.g. @akSa1, @atithInAM_saparyA1
+DHATU_KEY_RE = re.compile(r"^\d{2}\.\d{4}$")  # e.g. 01.0001
+
+
+def enable_network_log(options):
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def _is_json(response):
+    mime = (response.get("mimeType") or "").lower()
+    url = response.get("url", "").split("?", 1)[0]
+    return "json" in mime or url.endswith(".json")
+
+
+def collect_json_responses(driver, idle=1.5, timeout=60, messages=None):
+    # Drain the performance log until no new responses arrive for `idle` seconds.
+    # Every drained DevTools message is also appended to `messages` if given.
+    pending = {}
+    payloads = []
+    deadline = time.time() + timeout
+    last_activity = time.time()
+    while time.time() < deadline:
+        entries = driver.get_log("performance")
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            if messages is not None:
+                messages.append(message)
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived" and _is_json(params.get("response", {})):
+                pending[params["requestId"]] = params["response"]["url"]
+            elif method == "Network.loadingFinished" and params.get("requestId") in pending:
+                url = pending.pop(params["requestId"])
+                try:
+                    body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+                except Exception:
+                    continue
+                text = body["body"]
+                if body.get("base64Encoded"):
+                    text = base64.b64decode(text).decode("utf-8", errors="replace")
+                try:
+                    payloads.append((url, json.loads(text)))
+                except ValueError:
+                    continue
+        if entries:
+            last_activity = time.time()
+        elif not pending and time.time() - last_activity >= idle:
+            break
+        time.sleep(0.2)
+    return payloads
+
+
+def find_entries(payload, key_re, key_fields=None):
+    # Yields (key, record) for every dict that carries an id matching key_re.
+    # Bare id strings inside lists are yielded with an empty record.
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            if key_re.match(node):
+                yield node, {}
+        elif isinstance(node, dict):
+            key = None
+            for field, value in node.items():
+                if isinstance(value, str) and (key_fields is None or field in key_fields):
+                    candidate = value.rsplit("/", 1)[-1]
+                    if key_re.match(candidate):
+                        key = candidate
+                        break
+            if key:
+                yield key, {k: v for k, v in node.items() if not isinstance(v, (dict, list))}
+            stack.extend(reversed([v for v in node.values() if isinstance(v, (dict, list))]))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def discover(payloads, key_re, link_prefix, key_fields=None):
+    # Returns (links, metadata) in first-seen order with duplicates dropped
+    links = []
+    metadata = {}
+    for url, payload in payloads:
+        for key, record in find_entries(payload, key_re, key_fields):
+            link = link_prefix + key
+            if link not in metadata:
+                links.append(link)
+                metadata[link] = record
+    return links, metadata
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import tempfile
+import threading
+import zlib
+
+# On-disk cache of raw rendered HTML so extraction can be re-run without
+# touching the site. Entries live at <root>/<ab>/<sha256(url)>.z and hold the
+# URL on the first line followed by the page, zlib-compressed. Reads bump the
+# file's mtime; when the cache grows past max_bytes the least recently used
+# entries are evicted.
+
+
+class PageCache:
+    def __init__(self, root, max_bytes=None, level=6):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.level = level
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._sizes = {}
+        for path in self._paths():
+            self._sizes[path] = os.path.getsize(path)
+        self._total = sum(self._sizes.values())
+
+    def _paths(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".z"):
+                    yield os.path.join(dirpath, name)
+
+    def path_for(self, url):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], digest + ".z")
+
+    def __contains__(self, url):
+        return os.path.exists(self.path_for(url))
+
+    def __len__(self):
+        return len(self._sizes)
+
+    @property
+    def total_bytes(self):
+        return self._total
+
+    # ---- Read / write ----
+    def _load(self, path):
+        with open(path, "rb") as f:
+            data = zlib.decompress(f.read()).decode("utf-8")
+        url, _, html = data.partition("\n")
+        return url, html
+
+    def get(self, url):
+        path = self.path_for(url)
+        try:
+            _, html = self._load(path)
+        except (FileNotFoundError, zlib.error):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return html
+
+    def put(self, url, html):
+        path = self.path_for(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(f"{url}\n{html}".encode("utf-8"), self.level)
+        # Write-then-rename so a crash never leaves a truncated entry behind
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._total += len(data) - self._sizes.get(path, 0)
+            self._sizes[path] = len(data)
+            if self.max_bytes is not None and self._total > self.max_bytes:
+                self._evict()
+
+    def items(self):
+        # (url, html) for every cached page, in no particular order
+        for path in list(self._paths()):
+            try:
+                yield self._load(path)
+            except (FileNotFoundError, zlib.error):
+                continue
+
+    # ---- Eviction ----
+    def _evict(self):
+        # Drop least recently used entries until we are 10% under the cap
+        target = self.max_bytes * 0.9
+        by_age = sorted(self._sizes, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        for path in by_age:
+            if self._total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._total -= self._sizes.pop(path)
@@ -0,0 +1,196 @@
+from record_writer import read_jsonl
+import numpy as np
+import os
+import re
+import sys
+
+# Dhatu paradigms as fixed-shape arrays, for queries across the whole corpus
+# without looping over text. Every form string is dictionary-encoded once
+# (vocab[code] == form) and each dhatu's cards land in
+#
+#   forms[dhatu, lakāra, pada, puruṣa, vacana, variant] -> int32 code, -1 = no form
+#
+# so "all प्रथमपुरुष बहुवचन लट् forms" is one slice and "dhatus with no
+# आत्मनेपद forms" one reduction. Lakāras and padas keep the site's order;
+# headers outside the usual ten lakāras / two padas (e.g. कर्मणि) get their own
+# slot rather than being dropped.
+#
+#   python paradigm.py build                   # DHATU_RECORDS -> PARADIGM_FILE (.npz)
+#   python paradigm.py forms लट् 0 2           # lakāra, puruṣa (0 = प्रथम), vacana (2 = बहु)
+#   python paradigm.py missing आत्मनेपदम्
+
+# ----------- SETTINGS -------------
+DHATU_RECORDS = os.path.expanduser("~/Desktop/dhatu_records.jsonl")
+PARADIGM_FILE = os.path.expanduser("~/Desktop/dhatu_paradigms.npz")
+# ----------------------------------
+
+LAKARAS = ("लट्", "लिट्", "लुट्", "लृट्", "लोट्", "लङ्", "विधिलिङ्", "आशीर्लिङ्", "लुङ्", "लृङ्")
+PADAS = ("परस्मैपदम्", "आत्मनेपदम्")
+PURUSHA = ("प्रथमपुरुषः", "मध्यमपुरुषः", "उत्तमपुरुषः")
+VACANA = ("एकवचनम्", "द्विवचनम्", "बहुवचनम्")
+MISSING = -1
+_HEADER = re.compile(r"^(?P<lakara>\S+)(?:\s+लकारः)?\s*(?:\((?P<pada>[^)]*)\))?")
+
+
+def split_header(header):
+    # "लट् लकारः (आत्मनेपदम्)" -> ("लट्", "आत्मनेपदम्")
+    m = _HEADER.match((header or "").strip())
+    if not m:
+        return None, None
+    return m.group("lakara"), (m.group("pada") or "").strip() or None
+
+
+def dhatu_key(url):
+    return url.rstrip("/").rsplit("/", 1)[1]
+
+
+def _axis(value, names):
+    # Index by position or by (a prefix of) the Devanagari name
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    for i, name in enumerate(names):
+        if name == value or name.startswith(value):
+            return i
+    raise KeyError(f"{value!r} is not one of {', '.join(names)}")
+
+
+class Paradigms:
+    def __init__(self, keys, headings, forms, vocab, lakaras, padas):
+        self.keys = np.asarray(keys)
+        self.headings = np.asarray(headings)
+        self.forms = forms
+        self.vocab = np.asarray(vocab)
+        self.lakaras = tuple(lakaras)
+        self.padas = tuple(padas)
+        self._codes = {form: code for code, form in enumerate(self.vocab.tolist())}
+        self._rows = {key: i for i, key in enumerate(self.keys.tolist())}
+
+    # ---- Building ----
+    @classmethod
+    def from_records(cls, records):
+        # records: dhatu JSONL records (or a path to them); the last record per url wins
+        if isinstance(records, str):
+            records = read_jsonl(records)
+        latest = {}
+        for record in records:
+            latest[record["url"]] = record
+        records = sorted(latest.values(), key=lambda r: r["idx"])
+
+        lakaras, padas = list(LAKARAS), list(PADAS)
+        vocab, codes = [], {}
+        cells = []  # (dhatu, lakāra, pada, puruṣa, vacana, variant, code)
+        variants = 1
+        for d, record in enumerate(records):
+            for card in record.get("cards") or []:
+                lakara, pada = split_header(card.get("header"))
+                if lakara is None:
+                    continue
+                pada = pada or PADAS[0]
+                if lakara not in lakaras:
+                    lakaras.append(lakara)
+                if pada not in padas:
+                    padas.append(pada)
+                l, p = lakaras.index(lakara), padas.index(pada)
+                for row, row_cells in enumerate((card.get("rows") or [])[:len(PURUSHA)]):
+                    for col, forms in enumerate(row_cells[:len(VACANA)]):
+                        for k, form in enumerate(forms):
+                            code = codes.get(form)
+                            if code is None:
+                                code = codes[form] = len(vocab)
+                                vocab.append(form)
+                            cells.append((d, l, p, row, col, k, code))
+                            variants = max(variants, k + 1)
+
+        forms = np.full((len(records), len(lakaras), len(padas), len(PURUSHA), len(VACANA), variants),
+                        MISSING, dtype=np.int32)
+        if cells:
+            index = np.array(cells, dtype=np.int32).T
+            forms[tuple(index[:6])] = index[6]
+        keys = [dhatu_key(r["url"]) for r in records]
+        headings = [r.get("heading") or "" for r in records]
+        return cls(keys, headings, forms, vocab, lakaras, padas)
+
+    # ---- Persistence ----
+    def save(self, path):
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, keys=self.keys, headings=self.headings, forms=self.forms, vocab=self.vocab,
+                            lakaras=np.asarray(self.lakaras), padas=np.asarray(self.padas))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            return cls(z["keys"], z["headings"], z["forms"], z["vocab"], z["lakaras"].tolist(), z["padas"].tolist())
+
+    # ---- Queries ----
+    def __len__(self):
+        return len(self.keys)
+
+    def slot(self, lakara=None, pada=None, purusha=None, vacana=None):
+        # Codes for one cell across every dhatu; axes left as None stay whole
+        return self.forms[
+            slice(None),
+            slice(None) if lakara is None else _axis(lakara, self.lakaras),
+            slice(None) if pada is None else _axis(pada, self.padas),
+            slice(None) if purusha is None else _axis(purusha, PURUSHA),
+            slice(None) if vacana is None else _axis(vacana, VACANA),
+        ]
+
+    def has_forms(self, lakara=None, pada=None, purusha=None, vacana=None):
+        # bool per dhatu: any form in the selected slots
+        present = self.slot(lakara, pada, purusha, vacana) != MISSING
+        return present.reshape(len(self), -1).any(axis=1)
+
+    def missing(self, pada, lakara=None):
+        # Dhatus with no forms at all for `pada` (in `lakara`, if given)
+        return self.keys[~self.has_forms(lakara=lakara, pada=pada)]
+
+    def forms_at(self, lakara, purusha, vacana, pada=None):
+        # [(dhatu key, form)] for one paradigm cell across the corpus, in corpus order
+        codes = self.slot(lakara, pada, purusha, vacana).reshape(len(self), -1)
+        rows, cols = np.nonzero(codes != MISSING)
+        return list(zip(self.keys[rows].tolist(), self.vocab[codes[rows, cols]].tolist()))
+
+    def where(self, form):
+        # Every (dhatu key, lakāra, pada, puruṣa, vacana) cell holding `form`
+        code = self._codes.get(form)
+        if code is None:
+            return []
+        hits = np.argwhere(self.forms == code)
+        return [(str(self.keys[d]), self.lakaras[l], self.padas[p], PURUSHA[r], VACANA[c]) for d, l, p, r, c, _ in hits.tolist()]
+
+    def paradigm(self, key, lakara, pada=None):
+        # One dhatu's 3 × 3 table as lists of forms; pada defaults to the first one it has
+        cards = self.forms[self._rows[key], _axis(lakara, self.lakaras)]
+        if pada is None:
+            filled = (cards != MISSING).reshape(len(self.padas), -1).any(axis=1)
+            p = int(np.argmax(filled))
+        else:
+            p = _axis(pada, self.padas)
+        return [[[str(self.vocab[c]) for c in cell if c != MISSING] for cell in row] for row in cards[p].tolist()]
+
+    def coverage(self):
+        # Dhatus with at least one form, per (lakāra, pada)
+        present = (self.forms != MISSING).reshape(*self.forms.shape[:3], -1).any(axis=3)
+        return {(self.lakaras[l], self.padas[p]): int(n) for (l, p), n in np.ndenumerate(present.sum(axis=0))}
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if command == "build":
+        paradigms = Paradigms.from_records(DHATU_RECORDS)
+        paradigms.save(PARADIGM_FILE)
+        print(f"📐 {len(paradigms)} dhatus, {len(paradigms.vocab)} distinct forms, "
+              f"array {paradigms.forms.shape} → {PARADIGM_FILE}")
+    elif command == "forms":
+        paradigms = Paradigms.load(PARADIGM_FILE)
+        lakara, purusha, vacana = sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+        for key, form in paradigms.forms_at(lakara, purusha, vacana):
+            print(f"{key}\t{form}")
+    elif command == "missing":
+        paradigms = Paradigms.load(PARADIGM_FILE)
+        keys = paradigms.missing(sys.argv[2])
+        print("\n".join(keys.tolist()))
+        print(f"📐 {len(keys)} of {len(paradigms)} dhatus have no {sys.argv[2]} forms")
+    else:
+        print(f"Unknown command {command!r}: use build, forms or missing")
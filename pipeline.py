@@ -0,0 +1,198 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from multiprocessing import get_all_start_methods, get_context
+import queue
+import threading
+import time
+
+# Staged scrape pipeline: fetch threads only collect raw HTML, a process pool
+# parses it on every core, and a single writer thread persists the records.
+#
+#   fetch threads --raw queue--> dispatcher --process pool--> writer
+#
+# Backpressure is end to end: at most `in_flight` pages can be between the
+# dispatcher and the writer (parsing, or parsed and waiting to be written), so a
+# slow writer stalls the dispatcher, the raw queue fills up and fetch threads
+# block on put() instead of piling pages up in memory. Time spent blocked is
+# recorded as the "queue_wait" stage.
+#
+# The pool uses fork so the scraper scripts (plain top-level code) are not
+# re-imported in each child, and start_parse_pool() must run before the
+# script starts any thread (metrics exporter, drivers). Without fork, or with
+# 0 processes, pages are parsed on the dispatcher thread instead.
+
+_DONE = object()
+
+
+class ParsePool:
+    def __init__(self, processes):
+        self.processes = processes
+        self.executor = ProcessPoolExecutor(max_workers=processes, mp_context=get_context("fork"))
+        self.executor.submit(int).result()  # forks every worker now, while the process is still single-threaded
+
+    def submit(self, fn, *args):
+        return self.executor.submit(fn, *args)
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def start_parse_pool(processes):
+    # None means "parse in-process": no fork on this platform, or processes <= 0
+    if processes <= 0 or "fork" not in get_all_start_methods():
+        return None
+    return ParsePool(processes)
+
+
+def _timed(parse, html):
+    start = time.perf_counter()
+    return parse(html), time.perf_counter() - start
+
+
+class Pipeline:
+    def __init__(self, next_job, fetch, parse, write, fetch_workers=5, parse_pool=None,
+                 queue_size=32, in_flight=None, metrics=None):
+        # next_job() -> (idx, url) or None when there is nothing left (called by each fetch thread)
+        # fetch(idx, url) -> html; raising fails the page
+        # parse(html) -> parsed dict; must be picklable (a module-level function or a partial of one)
+        # write(idx, url, parsed, error) runs on the single writer thread, in completion order
+        self.next_job = next_job
+        self.fetch = fetch
+        self.parse = parse
+        self.write = write
+        self.fetch_workers = fetch_workers
+        self.parse_pool = parse_pool
+        self.metrics = metrics
+        self.in_flight = in_flight or 2 * (parse_pool.processes if parse_pool is not None else 1)
+        self._raw = queue.Queue(maxsize=queue_size)
+        self._parsed = queue.Queue()  # bounded by the in-flight slots
+        self._slots = threading.Semaphore(self.in_flight)
+        self.fetched = self.written = self.failed = 0
+        self.max_raw_depth = 0
+        self.blocked_seconds = 0.0
+        self._lock = threading.Lock()
+        self._error = None
+
+    def _stage(self, name):
+        return self.metrics.stage(name) if self.metrics is not None else nullcontext()
+
+    def _guarded(self, target):
+        # A stage thread that dies must not leave the others blocked forever
+        def run():
+            try:
+                target()
+            except BaseException as e:
+                self._error = self._error or e
+                raise
+        return run
+
+    # ---- Fetch stage ----
+    def _fetcher(self):
+        while True:
+            job = self.next_job()
+            if job is None:
+                return
+            idx, url = job
+            started = self.metrics.begin_page() if self.metrics is not None else time.perf_counter()
+            try:
+                html, error = self.fetch(idx, url), None
+            except Exception as e:
+                html, error = None, f"{type(e).__name__}: {e}"
+            wait_start = time.perf_counter()
+            self._raw.put((idx, url, started, html, error))
+            waited = time.perf_counter() - wait_start
+            with self._lock:
+                self.fetched += html is not None
+                self.blocked_seconds += waited
+                self.max_raw_depth = max(self.max_raw_depth, self._raw.qsize())
+            if self.metrics is not None:
+                self.metrics.observe("queue_wait", waited)
+
+    # ---- Parse stage ----
+    def _dispatcher(self):
+        while True:
+            item = self._raw.get()
+            if item is _DONE:
+                break
+            idx, url, started, html, error = item
+            self._slots.acquire()
+            if error is not None:
+                self._parsed.put((idx, url, started, None, error))
+            elif self.parse_pool is None:
+                self._parsed.put((idx, url, started, *self._parse_here(html)))
+            else:
+                try:
+                    future = self.parse_pool.submit(_timed, self.parse, html)
+                except Exception as e:  # the pool is broken (a worker was killed)
+                    self._parsed.put((idx, url, started, None, f"{type(e).__name__}: {e}"))
+                    continue
+                future.add_done_callback(lambda f, idx=idx, url=url, started=started:
+                                         self._parsed.put((idx, url, started, *self._parse_result(f))))
+        # Every slot back means every page has been written
+        for _ in range(self.in_flight):
+            self._slots.acquire()
+        self._parsed.put(_DONE)
+
+    def _parse_here(self, html):
+        try:
+            parsed, seconds = _timed(self.parse, html)
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
+        if self.metrics is not None:
+            self.metrics.observe("parse", seconds)
+        return parsed, None
+
+    def _parse_result(self, future):
+        try:
+            parsed, seconds = future.result()
+        except Exception as e:  # parse error, or the worker process died
+            return None, f"{type(e).__name__}: {e}"
+        if self.metrics is not None:
+            self.metrics.observe("parse", seconds)
+        return parsed, None
+
+    # ---- Write stage ----
+    def _writer(self):
+        while True:
+            item = self._parsed.get()
+            if item is _DONE:
+                return
+            idx, url, started, parsed, error = item
+            try:
+                with self._stage("write"):
+                    self.write(idx, url, parsed, error)
+            except Exception as e:
+                # Keep draining so nothing upstream blocks; run() re-raises the first failure
+                self._error = self._error or e
+            finally:
+                self._slots.release()
+            with self._lock:
+                if error is None:
+                    self.written += 1
+                else:
+                    self.failed += 1
+            if self.metrics is not None:
+                self.metrics.end_page(started, error is None)
+
+    def run(self):
+        dispatcher = threading.Thread(target=self._guarded(self._dispatcher), name="parse-dispatch", daemon=True)
+        writer = threading.Thread(target=self._guarded(self._writer), name="writer", daemon=True)
+        fetchers = [threading.Thread(target=self._guarded(self._fetcher), name=f"fetch-{n}", daemon=True)
+                    for n in range(self.fetch_workers)]
+        for thread in (dispatcher, writer, *fetchers):
+            thread.start()
+        for thread in fetchers:
+            thread.join()
+        self._raw.put(_DONE)
+        dispatcher.join()
+        writer.join()
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def summary(self):
+        where = f"{self.parse_pool.processes} parse processes" if self.parse_pool is not None else "in-process parsing"
+        return (f"🧵 Pipeline: {self.fetch_workers} fetch threads → {where}, {self.written} written, "
+                f"{self.failed} failed, raw queue peaked at {self.max_raw_depth}/{self._raw.maxsize}, "
+                f"fetchers blocked {self.blocked_seconds:.1f}s on backpressure")
+
@@ -0,0 +1,148 @@
+from contextlib import contextmanager
+import threading
+import time
+
+# Adaptive politeness for the scrapers, replacing fixed sleeps and thread counts.
+#
+# TokenBucket caps the request rate shared by all workers. AimdController caps
+# how many requests are in flight: it adds one slot after a full window of
+# healthy responses and halves the limit on a timeout, an empty page or a
+# latency spike. AdaptiveThrottle puts the two together behind one context
+# manager.
+
+
+class Abandoned(Exception):
+    # Raised inside AdaptiveThrottle.request() when the caller no longer wants the
+    # response (a hedged attempt that lost): the slot is freed without counting
+    # the response as healthy or unhealthy
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AimdController:
+    def __init__(self, initial=2, minimum=1, maximum=10, target_latency=10.0,
+                 decrease_factor=0.5, cooldown=None, ewma_alpha=0.2):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.cooldown = target_latency if cooldown is None else cooldown
+        self.ewma_alpha = ewma_alpha
+
+        self.in_flight = 0
+        self.latency_ewma = None
+        self.successes = 0
+        self.failures = 0
+        self.decreases = 0
+        self._healthy_streak = 0
+        self._last_decrease = None
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency, ok=True):
+        with self._cond:
+            self.in_flight -= 1
+            if latency is not None:
+                if self.latency_ewma is None:
+                    self.latency_ewma = latency
+                else:
+                    self.latency_ewma += self.ewma_alpha * (latency - self.latency_ewma)
+
+            slow = self.latency_ewma is not None and self.latency_ewma > self.target_latency
+            if ok:
+                self.successes += 1
+            else:
+                self.failures += 1
+
+            if not ok or slow:
+                self._healthy_streak = 0
+                now = time.monotonic()
+                # One cut per cooldown: a burst of failures from the same overload counts once
+                if self._last_decrease is None or now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+                    self.decreases += 1
+            else:
+                self._healthy_streak += 1
+                if self._healthy_streak >= int(self.limit) and self.limit < self.maximum:
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self._healthy_streak = 0
+            self._cond.notify_all()
+
+    def abandon(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "latency_ewma": self.latency_ewma,
+                "successes": self.successes,
+                "failures": self.failures,
+                "decreases": self.decreases,
+            }
+
+
+class _Ticket:
+    def __init__(self):
+        self.ok = True
+        self.reason = None
+
+    def failed(self, reason=None):
+        # Mark a response as unhealthy (e.g. an empty page) without raising
+        self.ok = False
+        self.reason = reason
+
+
+class AdaptiveThrottle:
+    def __init__(self, rate=2.0, burst=2, **aimd):
+        self.bucket = TokenBucket(rate, burst)
+        self.controller = AimdController(**aimd)
+
+    @contextmanager
+    def request(self):
+        self.controller.acquire()
+        self.bucket.acquire()
+        ticket = _Ticket()
+        start = time.monotonic()
+        try:
+            yield ticket
+        except Abandoned:
+            self.controller.abandon()
+            raise
+        except BaseException:
+            self.controller.release(time.monotonic() - start, ok=False)
+            raise
+        self.controller.release(time.monotonic() - start, ok=ticket.ok)
+
+    def snapshot(self):
+        return self.controller.snapshot()
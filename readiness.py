@@ -0,0 +1,84 @@
+import json
+import time
+
+# Page readiness for the rendered shabda/dhatu pages. wait_for_rows() returns
+# as soon as the table rows exist and have stopped changing for `stable_for`
+# seconds, instead of "element present + sleep(1)". Known dead ends (an empty
+# document, or only offline/"update Chrome" notices where the tables should
+# be) raise PageNotReady after a short grace period so the worker is freed
+# instead of waiting out the full timeout.
+
+# Card headers that mean the page will never render its tables
+FAILURE_MARKERS = ("offline", "update", "chrome", "enable", "reset")
+
+_PROBE_JS = """
+const rows = document.querySelectorAll(arguments[0]);
+let textLength = 0;
+for (const row of rows) textLength += row.textContent.length;
+const headers = arguments[1]
+    ? Array.from(document.querySelectorAll(arguments[1]), h => h.textContent.trim().toLowerCase())
+    : [];
+const body = document.body ? document.body.innerText.trim().length : 0;
+return [rows.length, textLength, body, headers];
+"""
+
+
+class PageNotReady(Exception):
+    def __init__(self, reason, elapsed):
+        super().__init__(f"{reason} after {elapsed:.1f}s")
+        self.reason = reason
+        self.elapsed = elapsed
+
+
+class RowWatch:
+    # The readiness decision, fed one probe result at a time, so the Selenium
+    # loop below and the DevTools tab scheduler (tab_scheduler.py) agree on it
+    def __init__(self, row_selector, timeout=30, stable_for=0.3, header_selector=None, failure_grace=3.0,
+                 checkpoint=None):
+        self.row_selector = row_selector
+        self.timeout = timeout
+        self.stable_for = stable_for
+        self.header_selector = header_selector
+        self.failure_grace = failure_grace
+        self.checkpoint = checkpoint  # called every probe; may raise to abandon the wait (hedging.checkpoint)
+        self.start = time.monotonic()
+        self.last_signature = None
+        self.stable_since = None
+
+    def update(self, probe):
+        # probe = [rows, textLength, bodyLength, headers]; returns the row count once stable, else None
+        if self.checkpoint is not None:
+            self.checkpoint()
+        rows, text_length, body_length, headers = probe
+        elapsed = time.monotonic() - self.start
+        if rows:
+            signature = (rows, text_length)
+            if signature != self.last_signature:
+                self.last_signature = signature
+                self.stable_since = time.monotonic()
+            elif time.monotonic() - self.stable_since >= self.stable_for:
+                return rows
+        elif elapsed >= self.failure_grace:
+            if body_length == 0:
+                raise PageNotReady("empty page", elapsed)
+            if headers and all(any(m in h for m in FAILURE_MARKERS) for h in headers):
+                raise PageNotReady("offline/unsupported-browser notice", elapsed)
+
+        if elapsed >= self.timeout:
+            raise PageNotReady(f"no stable '{self.row_selector}' rows", elapsed)
+        return None
+
+
+def probe_expression(row_selector, header_selector=None):
+    # _PROBE_JS as a standalone expression, for DevTools Runtime.evaluate
+    return f"(function() {{{_PROBE_JS}}}).apply(null, {json.dumps([row_selector, header_selector])})"
+
+
+def wait_for_rows(driver, row_selector, timeout=30, stable_for=0.3, poll=0.1,
+                  header_selector=None, failure_grace=3.0, checkpoint=None):
+    watch = RowWatch(row_selector, timeout, stable_for, header_selector, failure_grace, checkpoint)
+    while True:
+        rows = watch.update(driver.execute_script(_PROBE_JS, row_selector, header_selector))
+        if rows:
+            return rows
+        time.sleep(poll)
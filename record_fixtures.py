@@ -0,0 +1,57 @@
+from driver_pool import DriverPool
+from readiness import wait_for_rows
+from scroll_driver import scroll_to_end
+import os
+import sys
+
+# Refreshes fixtures/ from the live site: saves the rendered HTML of a few
+# shabda and dhatu pages (fixtures/<kind>/<key>.html) and of both list pages
+# after scrolling them to the end (fixtures/<kind>_list.html). fake_site.py and
+# bench_suite.py pick the files up as-is. Run rarely; it is the only part of
+# the benchmark tooling that touches ashtadhyayi.com.
+#
+#   python record_fixtures.py [shabda-key-or-dhatu-id ...]
+
+# ----------- SETTINGS -------------
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAGES = {
+    "shabda": ["@rAma1", "@hari1", "@ramA1"],
+    "dhatu": ["01.0001", "01.0002"],
+}
+LISTS = {
+    "shabda": ('div[id^="shabdalist-entry-"]', ".list-group-content"),
+    "dhatu": ("div.href.d-inline", ".list-group-content"),
+}
+ROWS = {
+    "shabda": (".table-bordered tbody tr", None),
+    "dhatu": (".card tbody tr", ".card-header"),
+}
+RECORD_LISTS = True
+# ----------------------------------
+
+
+def save(path, html):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+    print(f"💾 {os.path.relpath(path, FIXTURE_DIR)} ({len(html.encode('utf-8')) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        PAGES = {kind: [k for k in sys.argv[1:] if k.startswith("@") == (kind == "shabda")] for kind in PAGES}
+
+    with DriverPool(size=1) as pool, pool.driver() as driver:
+        for kind, keys in PAGES.items():
+            row_selector, header_selector = ROWS[kind]
+            for key in keys:
+                driver.get(f"https://ashtadhyayi.com/{kind}/{key}")
+                wait_for_rows(driver, row_selector, header_selector=header_selector)
+                save(os.path.join(FIXTURE_DIR, kind, f"{key}.html"), driver.page_source)
+
+        if RECORD_LISTS:
+            for kind, (entry_selector, container) in LISTS.items():
+                driver.get(f"https://ashtadhyayi.com/{kind}")
+                scrolled = scroll_to_end(driver, entry_selector, container)
+                print(f"📜 {kind} list: {scrolled.summary()}")
+                save(os.path.join(FIXTURE_DIR, f"{kind}_list.html"), driver.page_source)
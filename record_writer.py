@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+
+# Incremental structured output. JsonlWriter appends one JSON record per
+# scraped page the moment it is done, flushing every line and fsyncing every
+# `fsync_every` records, so a crash loses at most the last few lines and
+# memory stays flat however long the run. export_parquet() turns any record
+# iterator into a columnar file in fixed-size batches (needs pyarrow).
+
+
+class JsonlWriter:
+    def __init__(self, path, fsync_every=50):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.written = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._f.write(line)
+            self._f.flush()
+            self.written += 1
+            if self.written % self.fsync_every == 0:
+                os.fsync(self._f.fileno())
+
+    def close(self):
+        with self._lock:
+            if not self._f.closed:
+                self._f.flush()
+                os.fsync(self._f.fileno())
+                self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replace_jsonl(path, lines):
+    # Swap in a new JSONL file built from already-serialized records; readers never see half of it
+    tmp = path + ".tmp"
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line + "\n")
+            count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return count
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# ---- Parquet ----
+def _schemas():
+    import pyarrow as pa
+
+    strings = pa.list_(pa.string())
+    return {
+        "shabda": pa.schema([
+            ("idx", pa.int64()),
+            ("url", pa.string()),
+            ("header", pa.struct([(k, pa.string()) for k in ("number", "word", "extra", "subtext")])),
+            ("table", pa.list_(strings)),
+            ("info", pa.list_(strings)),
+        ]),
+        "dhatu": pa.schema([
+            ("idx", pa.int64()),
+            ("url", pa.string()),
+            ("heading", pa.string()),
+            ("cards", pa.list_(pa.struct([("header", pa.string()), ("rows", pa.list_(pa.list_(strings)))]))),
+        ]),
+    }
+
+
+def export_parquet(records, path, kind, batch_size=1000):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _schemas()[kind]
+    names = schema.names
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        batch = []
+        for record in records:
+            batch.append({name: record.get(name) for name in names})
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
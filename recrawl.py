@@ -0,0 +1,302 @@
+from record_writer import JsonlWriter, read_jsonl
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Incremental refresh of the scraped corpus. Each refresh diffs a freshly
+# discovered link list (Shabdhaslinks.py / dhatulinks.py output) against the
+# link list of the current corpus version and scrapes only
+#
+#   - added links, and
+#   - a sample of SAMPLE_FRACTION of the kept links, rotating with every
+#     version so repeated refreshes cover the whole corpus over time.
+#
+# A sampled entry counts as changed when the content hash of its extracted
+# record (everything but idx/url) differs from the stored one. The result is a
+# new version directory; entries that were not re-scraped are carried over,
+# and links that have no record yet (failed last time) are tried again:
+#
+#   CORPUS_DIR/<kind>/v0002/records.jsonl   full corpus, in the new link order
+#                           links.json      the link list this version was built from
+#                           hashes.tsv      url <TAB> content hash
+#                           changes.jsonl   added / recovered / removed / changed / failed entries
+#                           manifest.json   counts, parent version, timings
+#   CORPUS_DIR/<kind>/CURRENT               name of the latest version
+#
+# Scraping runs the normal scraper script with its settings pointed at a work
+# directory (v0002.partial/), so an interrupted refresh resumes from its crawl
+# state, and the plan (what to scrape) is kept there so a re-run does not
+# re-sample. The page cache is disabled for the refresh: a cached page would
+# hide exactly the changes being looked for.
+#
+#   python recrawl.py shabda import   # current RECORDS_JSONL + link file -> v0001
+#   python recrawl.py shabda          # refresh against the latest discovered links
+
+# ----------- SETTINGS -------------
+CORPUS_DIR = os.path.expanduser("~/Desktop/corpus")
+SAMPLE_FRACTION = 0.05  # share of kept entries re-scraped to detect changes; 0 = only new links
+KINDS = {
+    "shabda": {
+        "script": "multishabdhas.py",
+        "link_file": os.path.expanduser("~/Desktop/all_shabda_links.json"),
+        "records": os.path.expanduser("~/Desktop/shabda_records.jsonl"),
+    },
+    "dhatu": {
+        "script": "dhatulinkscontent.py",
+        "link_file": os.path.expanduser("~/Desktop/all_dhatu_links.json"),
+        "records": os.path.expanduser("~/Desktop/dhatu_records.jsonl"),
+    },
+}
+SCRAPER_OVERRIDES = {}  # extra settings for the scraper run, e.g. {"MAX_THREADS": 4}
+# ----------------------------------
+globals().update(json.loads(os.environ.get("SCRAPER_SETTINGS", "{}")))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def content_hash(record):
+    # Hash of what was extracted, independent of where it sits in the link list
+    content = {k: v for k, v in record.items() if k not in ("idx", "url")}
+    blob = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def sample_kept(kept, fraction, version):
+    # Deterministic per version, different across versions: order by a hash of (version, url)
+    count = round(len(kept) * fraction)
+    ranked = sorted(kept, key=lambda url: hashlib.blake2b(f"{version}\n{url}".encode("utf-8"), digest_size=8).digest())
+    return ranked[:count]
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _dump_json(obj, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class Corpus:
+    def __init__(self, root, kind):
+        self.kind = kind
+        self.dir = os.path.join(root, kind)
+        os.makedirs(self.dir, exist_ok=True)
+
+    # ---- Versions ----
+    def current(self):
+        path = os.path.join(self.dir, "CURRENT")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+
+    def next_version(self):
+        current = self.current()
+        return "v0001" if current is None else f"v{int(current[1:]) + 1:04d}"
+
+    def path(self, version, name=""):
+        return os.path.join(self.dir, version, name)
+
+    def links(self, version):
+        return _load_json(self.path(version, "links.json"))
+
+    def hashes(self, version):
+        hashes = {}
+        with open(self.path(version, "hashes.tsv"), "r", encoding="utf-8") as f:
+            for line in f:
+                url, digest = line.rstrip("\n").split("\t")
+                hashes[url] = digest
+        return hashes
+
+    def records(self, version):
+        return read_jsonl(self.path(version, "records.jsonl"))
+
+    def publish(self, version, links, records, changes, manifest):
+        # records: {url: record} for every entry of the new version; written in link order
+        partial = os.path.join(self.dir, version + ".partial")
+        os.makedirs(partial, exist_ok=True)
+        for name in ("records.jsonl.tmp", "hashes.tsv.tmp", "changes.jsonl"):  # left by an interrupted publish
+            if os.path.exists(os.path.join(partial, name)):
+                os.remove(os.path.join(partial, name))
+        with JsonlWriter(os.path.join(partial, "records.jsonl.tmp"), fsync_every=1000) as writer, \
+                open(os.path.join(partial, "hashes.tsv.tmp"), "w", encoding="utf-8") as hashes:
+            for idx, url in enumerate(links):
+                record = records.get(url)
+                if record is None:
+                    continue
+                record = {**record, "idx": idx, "url": url}
+                writer.write(record)
+                hashes.write(f"{url}\t{content_hash(record)}\n")
+        for name in ("records.jsonl", "hashes.tsv"):
+            os.replace(os.path.join(partial, name + ".tmp"), os.path.join(partial, name))
+        with JsonlWriter(os.path.join(partial, "changes.jsonl"), fsync_every=1000) as writer:
+            for change in changes:
+                writer.write(change)
+        _dump_json(links, os.path.join(partial, "links.json"))
+        _dump_json(manifest, os.path.join(partial, "manifest.json"))
+        os.replace(partial, self.path(version))
+        tmp = os.path.join(self.dir, "CURRENT.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+        os.replace(tmp, os.path.join(self.dir, "CURRENT"))
+
+
+def import_existing(corpus, link_file, records_file):
+    # First version from an existing full scrape; the last record per url wins
+    links = _load_json(link_file)
+    records = {}
+    for record in read_jsonl(records_file):
+        records[record["url"]] = record
+    listed = set(links)
+    version = corpus.next_version()
+    manifest = {"version": version, "parent": None, "created": time.time(), "link_file": link_file,
+                "imported_from": records_file, "entries": sum(1 for url in links if url in records),
+                "links": len(links), "unlisted_records_dropped": sum(1 for url in records if url not in listed)}
+    corpus.publish(version, links, records, [], manifest)
+    return manifest
+
+
+def plan_refresh(corpus, new_links, sample_fraction):
+    previous = corpus.current()
+    old_links = corpus.links(previous)
+    old = set(old_links)
+    new = set(new_links)
+    stored = corpus.hashes(previous)
+    version = corpus.next_version()
+    added = [url for url in new_links if url not in old]
+    kept = [url for url in new_links if url in old]
+    sampled = sample_kept([url for url in kept if url in stored], sample_fraction, version)
+    return {
+        "version": version,
+        "parent": previous,
+        "added": added,
+        "missing": [url for url in kept if url not in stored],  # listed before but never scraped successfully
+        "removed": [url for url in old_links if url not in new],
+        "sampled": sampled,
+        "kept": len(kept),
+    }
+
+
+def run_scraper(script, settings):
+    env = dict(os.environ, SCRAPER_SETTINGS=json.dumps(settings), PYTHONUNBUFFERED="1")
+    return subprocess.run([sys.executable, os.path.join(HERE, script)], cwd=HERE, env=env).returncode
+
+
+def scrape(kind, urls, work_dir):
+    # Runs the scraper over just `urls`; returns {url: record} for the ones that succeeded
+    records_file = os.path.join(work_dir, "records.jsonl")
+    if urls:
+        link_file = os.path.join(work_dir, "links.json")
+        _dump_json(urls, link_file)
+        link_setting = "LINK_FILE" if kind == "shabda" else "INPUT_JSON"
+        settings = {
+            link_setting: link_file,
+            "STATE_DB": os.path.join(work_dir, "state.sqlite"),
+            "RECORDS_JSONL": records_file,
+            "CACHE_DIR": None,
+            "METRICS_FILE": os.path.join(work_dir, "metrics.prom"),
+            "PARQUET_FILE": None,
+            **({"OUTPUT_FILE": None, "FAILED_JSON": os.path.join(work_dir, "failed.json")}
+               if kind == "shabda" else {"OUTPUT_DIR": None}),
+            **SCRAPER_OVERRIDES,
+        }
+        code = run_scraper(KINDS[kind]["script"], settings)
+        if code != 0:
+            print(f"⚠️ Scraper exited with {code}; keeping whatever it finished")
+    scraped = {}
+    if os.path.exists(records_file):
+        for record in read_jsonl(records_file):
+            scraped[record["url"]] = record
+    return scraped
+
+
+def refresh(corpus, kind, new_links, sample_fraction=SAMPLE_FRACTION):
+    start = time.time()
+    version = corpus.next_version()
+    work_dir = os.path.join(corpus.dir, version + ".partial", "work")
+    os.makedirs(work_dir, exist_ok=True)
+    plan_file = os.path.join(work_dir, "plan.json")
+    if os.path.exists(plan_file):
+        plan = _load_json(plan_file)
+        print(f"🔁 Resuming refresh {version}")
+    else:
+        plan = plan_refresh(corpus, new_links, sample_fraction)
+        _dump_json(plan, plan_file)
+    parent = plan["parent"]
+    to_scrape = plan["added"] + plan["missing"] + plan["sampled"]
+    print(f"🆕 {len(plan['added'])} added, 🩹 {len(plan['missing'])} missing from {parent}, 🗑️ {len(plan['removed'])} removed, "
+          f"🎲 {len(plan['sampled'])} of {plan['kept']} kept entries sampled → scraping {len(to_scrape)}")
+
+    scraped = scrape(kind, to_scrape, work_dir)
+
+    old_hashes = corpus.hashes(parent)
+    records = {}
+    for record in corpus.records(parent):
+        records[record["url"]] = record
+    changes = []
+    changed = unchanged = failed = 0
+    for change, urls in (("added", plan["added"]), ("recovered", plan["missing"])):
+        for url in urls:
+            if url in scraped:
+                records[url] = scraped[url]
+                changes.append({"url": url, "change": change, "hash": content_hash(scraped[url])})
+            else:
+                failed += 1
+                changes.append({"url": url, "change": "failed", "was": None})
+    for url in plan["sampled"]:
+        if url not in scraped:
+            failed += 1
+            changes.append({"url": url, "change": "failed", "was": old_hashes.get(url)})
+            continue
+        new_hash = content_hash(scraped[url])
+        if new_hash != old_hashes.get(url):
+            changed += 1
+            records[url] = scraped[url]
+            changes.append({"url": url, "change": "changed", "was": old_hashes.get(url), "hash": new_hash})
+        else:
+            unchanged += 1
+    for url in plan["removed"]:
+        records.pop(url, None)
+        changes.append({"url": url, "change": "removed", "was": old_hashes.get(url)})
+
+    checked = changed + unchanged
+    manifest = {
+        "version": version, "parent": parent, "created": time.time(), "seconds": round(time.time() - start, 1),
+        "links": len(new_links), "entries": sum(1 for url in new_links if url in records),
+        "added": len(plan["added"]), "missing": len(plan["missing"]), "removed": len(plan["removed"]), "sampled": len(plan["sampled"]),
+        "changed": changed, "unchanged": unchanged, "failed": failed, "scraped": len(scraped),
+        # Share of sampled entries that changed, projected onto the entries that were not re-scraped
+        "estimated_unseen_changes": round(changed / checked * (plan["kept"] - checked)) if checked else None,
+    }
+    corpus.publish(version, new_links, records, changes, manifest)
+    return manifest
+
+
+if __name__ == "__main__":
+    kind = sys.argv[1] if len(sys.argv) > 1 else "shabda"
+    command = sys.argv[2] if len(sys.argv) > 2 else "refresh"
+    settings = KINDS[kind]
+    corpus = Corpus(CORPUS_DIR, kind)
+    if command == "import":
+        manifest = import_existing(corpus, settings["link_file"], settings["records"])
+        print(f"📥 {manifest['version']}: {manifest['entries']} of {manifest['links']} entries imported "
+              f"from {settings['records']}")
+    elif command == "refresh":
+        if corpus.current() is None:
+            sys.exit(f"No corpus version in {corpus.dir} yet: run `python recrawl.py {kind} import` first")
+        manifest = refresh(corpus, kind, _load_json(settings["link_file"]))
+        estimate = manifest["estimated_unseen_changes"]
+        print(f"✅ {manifest['version']} (from {manifest['parent']}) in {manifest['seconds']:.0f}s: "
+              f"{manifest['added']} added, {manifest['removed']} removed, {manifest['changed']} of "
+              f"{manifest['sampled']} sampled changed, {manifest['failed']} failed"
+              + (f"; ~{estimate} more changes likely among entries not sampled" if estimate else ""))
+        print(f"📝 Change log: {corpus.path(manifest['version'], 'changes.jsonl')}")
+    else:
+        print(f"Unknown command {command!r}: use import or refresh")
@@ -0,0 +1,221 @@
+from driver_pool import build_options
+from network_capture import enable_network_log
+import json
+import re
+import threading
+import time
+
+# DevTools-level request blocking for the Selenium scrapers. We only ever read
+# text out of the DOM, so images, fonts, media, stylesheets and third-party
+# analytics are cancelled before they hit the network (Network.setBlockedURLs)
+# and pages render with just their scripts and data.
+#
+# With the performance log enabled (network_capture.enable_network_log) each
+# page's Network.* events are tallied: requests made, bytes loaded, requests
+# blocked and an estimate of the bytes those would have cost. Sizes come from
+# calibrate(), which loads one page unblocked and records what every blockable
+# asset weighs; the site serves the same assets on every page, so the estimate
+# is per-URL rather than a guess.
+#
+# Blocking goes by resource type. Each type starts from its usual file
+# extensions (TYPE_PATTERNS), and calibrate() adds the exact URLs that Chrome
+# reported as a blocked type (Network.requestWillBeSent "type"). That covers
+# extensionless assets such as "/img?id=3". The ALLOW patterns plus `allow`
+# (the data API, e.g. the HTTP_DATA_URL template through template_pattern())
+# are never blocked. No pattern is learned for a URL they match, and a
+# configured block pattern that would catch a sample data URL is an error.
+
+TYPE_PATTERNS = {
+    "image": ["png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "avif", "bmp"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "stylesheet": ["css"],
+    "media": ["mp4", "webm", "mp3", "ogg", "wav"],
+}
+ANALYTICS_PATTERNS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*hotjar.com*", "*clarity.ms*",
+    "*cloudflareinsights.com*", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+]
+DEFAULT_TYPES = ("image", "font", "media", "stylesheet")
+# DevTools ResourceType of each blockable type
+CDP_TYPES = {"image": "Image", "font": "Font", "stylesheet": "Stylesheet", "media": "Media"}
+# The app's own data requests; the pages are empty without them
+ALLOW = ("*.json", "*.json?*", "*/api/*")
+
+
+def logged_options(**kwargs):
+    # build_options() with the performance log on, so page_stats() sees Network.* events
+    return enable_network_log(build_options(**kwargs))
+
+
+def template_pattern(template):
+    # A data URL template with {key} (http_fetch.data_url) as a wildcard pattern for `allow`
+    pattern = template.replace("{key}", "*")
+    return pattern if "://" in pattern else "*" + pattern
+
+
+def _wildcard_re(pattern):
+    return re.compile("^" + ".*".join(re.escape(part) for part in pattern.split("*")) + "$")
+
+
+class ResourceBlocker:
+    def __init__(self, types=DEFAULT_TYPES, patterns=(), block_analytics=True, calibrate_url=None, allow=()):
+        self.cdp_types = {CDP_TYPES[kind] for kind in types}
+        self.allow = list(ALLOW) + list(allow)
+        self._allow_matchers = [_wildcard_re(p) for p in self.allow]
+        self.patterns = []
+        for kind in types:
+            for ext in TYPE_PATTERNS[kind]:
+                self.patterns += [f"*.{ext}", f"*.{ext}?*"]
+        if block_analytics:
+            self.patterns += ANALYTICS_PATTERNS
+        self.patterns += list(patterns)
+        self._matchers = [_wildcard_re(p) for p in self.patterns]
+        # setBlockedURLs has no exceptions, so a block pattern must not reach the data API itself
+        for sample in self.allow:
+            url = sample.replace("*", "x")
+            if any(m.match(url) for m in self._matchers):
+                raise ValueError(f"block patterns would cancel data requests like {url}")
+        self.calibrate_url = calibrate_url
+        self.learned = 0  # exact asset URLs added by calibrate()
+        self.leaked = {}  # CDP type -> requests of a blocked type that still loaded
+        self.sizes = {}  # asset url -> bytes, from calibrate()
+        self.pages = 0
+        self.requests = 0
+        self.loaded_bytes = 0
+        self.blocked = 0
+        self.saved_bytes = 0
+        self._lock = threading.Lock()
+        self._calibrated = False
+        self._calibration_done = threading.Event()  # installers wait for the learned patterns
+        if not calibrate_url:
+            self._calibration_done.set()
+
+    def allowed(self, url):
+        return any(m.match(url) for m in self._allow_matchers)
+
+    def matches(self, url):
+        return not self.allowed(url) and any(m.match(url) for m in self._matchers)
+
+    def _learn(self, url):
+        # Block one asset Chrome reported as a blocked type, query and all
+        if "*" in url or self.allowed(url) or self.matches(url):
+            return
+        with self._lock:
+            self.patterns.append(url)
+            self._matchers.append(_wildcard_re(url))
+            self.learned += 1
+
+    # ---- Driver setup ----
+    def install(self, driver):
+        # Per browser session; survives navigation. Pass as DriverPool(on_start=...).
+        # The first driver installed also calibrates asset sizes if calibrate_url is set;
+        # the others wait for it, so every session blocks the learned asset URLs too.
+        with self._lock:
+            calibrate, self._calibrated = self.calibrate_url and not self._calibrated, True
+        if calibrate:
+            try:
+                self.calibrate(driver, self.calibrate_url)
+            except Exception as e:
+                print(f"⚠️ Resource size calibration failed ({type(e).__name__}); saved bytes will not be estimated")
+            finally:
+                self._calibration_done.set()
+        self._calibration_done.wait()
+        with self._lock:
+            patterns = list(self.patterns)
+        self._block(driver, patterns)
+        return driver
+
+    def _block(self, driver, patterns):
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+    def calibrate(self, driver, url, settle=2.0, timeout=30):
+        # Load `url` once without blocking and the cache off to learn asset sizes
+        self._block(driver, [])
+        driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+        try:
+            driver.get_log("performance")
+            driver.get(url)
+            messages = []
+            quiet_since = time.monotonic()
+            deadline = quiet_since + timeout
+            while time.monotonic() - quiet_since < settle and time.monotonic() < deadline:
+                entries = driver.get_log("performance")
+                if entries:
+                    messages += [json.loads(e["message"])["message"] for e in entries]
+                    quiet_since = time.monotonic()
+                time.sleep(0.2)
+            for asset, (kind, size) in _loaded_assets(messages).items():
+                if kind in self.cdp_types:
+                    self._learn(asset)
+                if self.matches(asset):
+                    self.sizes[asset] = size
+        finally:
+            driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
+            self._block(driver, list(self.patterns))
+        return sum(self.sizes.values())
+
+    # ---- Accounting ----
+    def page_stats(self, driver=None, messages=()):
+        # Tally one page from its DevTools messages: the ones given plus whatever is
+        # still in the driver's performance log (drained here)
+        messages = list(messages)
+        if driver is not None:
+            messages += [json.loads(e["message"])["message"] for e in driver.get_log("performance")]
+        urls = {}
+        kinds = {}
+        leaked = {}
+        requests = loaded = blocked = saved = 0
+        for message in messages:
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                urls[params["requestId"]] = params["request"]["url"]
+                kinds[params["requestId"]] = params.get("type")
+                requests += 1
+            elif method == "Network.loadingFinished":
+                loaded += int(params.get("encodedDataLength") or 0)
+                kind = kinds.get(params.get("requestId"))
+                if kind in self.cdp_types and not self.allowed(urls.get(params["requestId"], "")):
+                    leaked[kind] = leaked.get(kind, 0) + 1
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                blocked += 1
+                saved += self.sizes.get(urls.get(params["requestId"]), 0)
+        stats = {"requests": requests, "loaded_bytes": loaded, "blocked": blocked, "saved_bytes": saved}
+        with self._lock:
+            self.pages += 1
+            self.requests += requests
+            self.loaded_bytes += loaded
+            self.blocked += blocked
+            self.saved_bytes += saved
+            for kind, n in leaked.items():
+                self.leaked[kind] = self.leaked.get(kind, 0) + n
+        return stats
+
+    def summary(self):
+        n = self.pages
+        if not n:
+            return "🧱 Resource blocking: no pages measured"
+        saved = f" and ~{self.saved_bytes / n / 1024:.0f} KB" if self.sizes else ""
+        line = (f"🧱 Resource blocking: {self.blocked / n:.1f} of {self.requests / n:.1f} requests{saved} "
+                f"saved per page ({self.loaded_bytes / n / 1024:.0f} KB still loaded, {n} pages)")
+        if self.learned:
+            line += f"; {self.learned} asset URLs learned by type"
+        if self.leaked:
+            line += "; still loading: " + ", ".join(f"{c} {kind}" for kind, c in sorted(self.leaked.items()))
+        return line
+
+
+def _loaded_assets(messages):
+    # url -> (DevTools resource type, bytes) for every request that finished loading
+    requests = {}
+    assets = {}
+    for message in messages:
+        params = message.get("params", {})
+        if message.get("method") == "Network.requestWillBeSent":
+            requests[params["requestId"]] = (params["request"]["url"], params.get("type"))
+        elif message.get("method") == "Network.loadingFinished" and params.get("requestId") in requests:
+            url, kind = requests[params["requestId"]]
+            assets[url] = (kind, int(params.get("encodedDataLength") or 0))
+    return assets
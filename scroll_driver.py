@@ -0,0 +1,77 @@
+import json
+import os
+import time
+
+# Scrolls an infinite list only as fast as the page appends entries. Each step
+# scrolls to the bottom and waits in-page on a MutationObserver until the entry
+# count grows, returning as soon as it does; the list is considered complete
+# once `idle_rounds` consecutive steps see no growth within `idle` seconds.
+# Replaces "scroll, sleep 2 s, compare scrollHeight".
+
+_STEP_JS = """
+const [entrySelector, containerSelector, idleMs] = arguments;
+const done = arguments[arguments.length - 1];
+const count = () => document.querySelectorAll(entrySelector).length;
+const before = count();
+const container = (containerSelector && document.querySelector(containerSelector)) || document.body;
+let finished = false;
+let timer = null;
+const observer = new MutationObserver(() => {
+    if (!finished && count() !== before) finish(true);
+});
+function finish(grew) {
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done([count(), grew]);
+}
+observer.observe(container, {childList: true, subtree: true});
+timer = setTimeout(() => finish(false), idleMs);
+window.scrollTo(0, document.body.scrollHeight);
+if (container !== document.body) container.scrollTop = container.scrollHeight;
+"""
+
+
+class ScrollResult:
+    def __init__(self, count, expected, steps, elapsed):
+        self.count = count
+        self.expected = expected
+        self.steps = steps
+        self.elapsed = elapsed
+
+    @property
+    def complete(self):
+        return self.expected is None or self.count >= self.expected
+
+    def summary(self):
+        expected = f" of {self.expected} expected" if self.expected is not None else ""
+        return f"{self.count} entries{expected} after {self.steps} scroll steps in {self.elapsed:.1f}s"
+
+
+def scroll_to_end(driver, entry_selector, container_selector=None, expected=None,
+                  idle=1.5, idle_rounds=2, timeout=900):
+    driver.set_script_timeout(idle + 30)
+    start = time.monotonic()
+    steps = 0
+    quiet = 0
+    count = 0
+    while time.monotonic() - start < timeout:
+        count, grew = driver.execute_async_script(_STEP_JS, entry_selector, container_selector, int(idle * 1000))
+        steps += 1
+        if grew:
+            quiet = 0
+            continue
+        if expected is not None and count >= expected:
+            break
+        quiet += 1
+        if quiet >= idle_rounds:
+            break
+    return ScrollResult(count, expected, steps, time.monotonic() - start)
+
+
+def expected_from(path):
+    # Entry count of a previous link file, used as the "expected" figure
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return len(json.load(f))
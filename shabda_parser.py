@@ -0,0 +1,340 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from translit import to_deva
+import json
+import re
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # only the BeautifulSoup backends are available
+    lxml = None
+
+# Shared extraction for rendered shabda pages.
+#
+# parse_shabda(html, backend) returns a plain dict record:
+#   header: {"number", "word", "extra", "subtext"} or None
+#   table:  list of rows (list of cell texts) or None
+#   info:   list of [label, value] pairs, in the order the old scripts wrote them
+#
+# Backends:
+#   "lxml"        lxml.html + targeted XPath (fastest, default)
+#   "bs4"         BeautifulSoup restricted by a SoupStrainer to the regions we read
+#   "html.parser" full-tree BeautifulSoup, the behaviour of the original scripts
+#
+# A JSON data payload (FETCH_BACKEND = "http", see http_fetch.py) is read by
+# parse_shabda_data() whatever the backend.
+
+BACKENDS = ("lxml", "bs4", "html.parser")
+DEFAULT_BACKEND = "lxml"
+
+HEADER_CLASS = "pt-2 mb-2 d-flex justify-content-between"
+TABLE_CLASS = "table table-layout-fixed bg-light table-bordered"
+KOSHA_CLASS = "text-font default-english-font list-group-item p-2"
+DETAIL_CLASS = "default-sanskrit-font dark"
+HEADER_PARTS = (
+    ("number", "span", "text-font align-middle text-secondary"),
+    ("word", "span", "title-font font-weight-bold"),
+    ("extra", "span", "align-middle ml-2 list-item-title-color text-font"),
+    ("subtext", "div", "mt-2 mb-2 align-middle subtext-font grey"),
+)
+MIN_DETAIL_LENGTH = 20
+
+# Classes whose elements (with their subtrees) survive the "bs4" strainer
+STRAINER_CLASSES = {"justify-content-between", "table-bordered", "text-font",
+                    "list-item-title-color", "dark", "default-sanskrit-font"}
+
+
+def parse_shabda(html, backend=DEFAULT_BACKEND):
+    if html.lstrip().startswith("{"):
+        return parse_shabda_data(html)
+    if backend == "lxml":
+        return _parse_lxml(html)
+    if backend == "bs4":
+        return _parse_soup(_strained_soup(html))
+    if backend == "html.parser":
+        return _parse_soup(BeautifulSoup(html, "html.parser"))
+    raise ValueError(f"Unknown parser backend: {backend!r} (choose from {', '.join(BACKENDS)})")
+
+
+# ---- BeautifulSoup backends ----
+def _strained_soup(html):
+    features = "lxml" if lxml is not None else "html.parser"
+    strainer = SoupStrainer(class_=lambda c: c is not None and not STRAINER_CLASSES.isdisjoint(c.split()))
+    return BeautifulSoup(html, features, parse_only=strainer)
+
+
+def _parse_soup(soup):
+    record = {"header": None, "table": None, "info": []}
+
+    header_div = soup.find("div", class_=HEADER_CLASS)
+    if header_div:
+        record["header"] = {}
+        for key, tag, cls in HEADER_PARTS:
+            el = header_div.find(tag, class_=cls)
+            record["header"][key] = el.get_text(strip=True) if el else None
+
+    table = soup.find("table", class_=TABLE_CLASS)
+    if table:
+        tbody = table.find("tbody")
+        rows = tbody.find_all("tr") if tbody else []
+        record["table"] = [[td.get_text(strip=True) for td in row.find_all("td")] for row in rows]
+
+    info = record["info"]
+    for label in soup.find_all("span", class_="list-item-title-color"):
+        sibling = label.find_next_sibling("span", class_="dark")
+        if sibling:
+            info.append([label.get_text(strip=True), sibling.get_text(strip=True)])
+
+    for block in soup.find_all("div", class_="text-font"):
+        label = block.find("span", class_="list-item-title-color")
+        value = block.find("span", class_="dark")
+        if label and value:
+            info.append([label.get_text(strip=True), value.get_text(strip=True)])
+
+    for block in soup.find_all("div", class_=KOSHA_CLASS):
+        if not block.find("span", class_="dark"):
+            name = block.get_text(strip=True)
+            if name:
+                info.append(["Kosha Name", name])
+
+    for span in soup.find_all("span", class_=DETAIL_CLASS):
+        text = span.get_text(strip=True)
+        if text and len(text) > MIN_DETAIL_LENGTH:
+            info.append(["Sanskrit Detail", text])
+
+    return record
+
+
+# ---- lxml backend ----
+def _has_class(cls):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+def _text(el):
+    # Same result as BeautifulSoup's get_text(strip=True)
+    return "".join(s.strip() for s in el.xpath(".//text()"))
+
+
+_XPATHS = {}
+
+
+def _xpath(expr):
+    if expr not in _XPATHS:
+        _XPATHS[expr] = etree.XPath(expr)
+    return _XPATHS[expr]
+
+
+def _parse_lxml(html):
+    if lxml is None:
+        raise ImportError("The 'lxml' parser backend needs lxml installed (pip install lxml)")
+    root = lxml.html.fromstring(html)
+    record = {"header": None, "table": None, "info": []}
+
+    header_div = _xpath(f'(//div[@class="{HEADER_CLASS}"])[1]')(root)
+    if header_div:
+        record["header"] = {}
+        for key, tag, cls in HEADER_PARTS:
+            el = _xpath(f'(.//{tag}[@class="{cls}"])[1]')(header_div[0])
+            record["header"][key] = _text(el[0]) if el else None
+
+    table = _xpath(f'(//table[@class="{TABLE_CLASS}"])[1]')(root)
+    if table:
+        tbody = _xpath("(.//tbody)[1]")(table[0])
+        rows = _xpath(".//tr")(tbody[0]) if tbody else []
+        record["table"] = [[_text(td) for td in _xpath(".//td")(row)] for row in rows]
+
+    info = record["info"]
+    for label in _xpath(f"//span[{_has_class('list-item-title-color')}]")(root):
+        sibling = _xpath(f"following-sibling::span[{_has_class('dark')}][1]")(label)
+        if sibling:
+            info.append([_text(label), _text(sibling[0])])
+
+    for block in _xpath(f"//div[{_has_class('text-font')}]")(root):
+        label = _xpath(f"(.//span[{_has_class('list-item-title-color')}])[1]")(block)
+        value = _xpath(f"(.//span[{_has_class('dark')}])[1]")(block)
+        if label and value:
+            info.append([_text(label[0]), _text(value[0])])
+
+    for block in _xpath(f'//div[@class="{KOSHA_CLASS}"]')(root):
+        if not _xpath(f".//span[{_has_class('dark')}]")(block):
+            name = _text(block)
+            if name:
+                info.append(["Kosha Name", name])
+
+    for span in _xpath(f'//span[@class="{DETAIL_CLASS}"]')(root):
+        text = _text(span)
+        if text and len(text) > MIN_DETAIL_LENGTH:
+            info.append(["Sanskrit Detail", text])
+
+    return record
+
+
+# ---- Data endpoint payloads ----
+def _strings(value, what):
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"data payload: {what} is not a list of strings")
+    return value
+
+
+def parse_shabda_data(text):
+    # The entry's JSON data: the fields the page renders, keyed like the record.
+    # Anything else raises ValueError, so HttpFetcher can tell an unrecognised payload
+    # from a page and render it instead.
+    data = json.loads(text)
+    if not isinstance(data, dict) or set(data) - {"header", "table", "info"} or "table" not in data:
+        raise ValueError("not a shabda data payload")
+    header = data.get("header")
+    if header is not None:
+        if not isinstance(header, dict) or set(header) - {key for key, _, _ in HEADER_PARTS}:
+            raise ValueError("data payload: unknown header fields")
+        if not all(isinstance(v, str) or v is None for v in header.values()):
+            raise ValueError("data payload: header values are not text")
+        header = {key: header.get(key) for key, _, _ in HEADER_PARTS}
+    table = data["table"]
+    if table is not None:
+        if not isinstance(table, list):
+            raise ValueError("data payload: table is not a list of rows")
+        table = [_strings(row, "table row") for row in table]
+    info = [_strings(pair, "info entry") for pair in data.get("info") or []]
+    if any(len(pair) != 2 for pair in info):
+        raise ValueError("data payload: info entries are not [label, value] pairs")
+    return {"header": header, "table": table, "info": info}
+
+
+# ---- Legacy text formats ----
+NO_HEADER = "❌ No header content found."
+NO_TABLE = "❌ No table found."
+
+
+def _info_lines(record):
+    return [f"{label}: {value}" for label, value in record["info"]]
+
+
+def format_tagged(record):
+    # <<TABLE>>/<<INFO>> block written by multishabdhas.py and failed.py
+    header = record["header"]
+    if header:
+        parts = [header[key] for key in ("number", "word", "extra", "subtext") if header[key] is not None]
+        header_info = "Sanskrit Header: " + " ".join(parts)
+    else:
+        header_info = "Sanskrit Header: " + NO_HEADER
+
+    if record["table"] is None:
+        table_lines = [NO_TABLE]
+    else:
+        table_lines = [line for line in ("\t".join(row) for row in record["table"]) if line]
+
+    full = f"{header_info}\n<<TABLE>>\n" + "\n".join(table_lines) + "\n</TABLE>"
+    info_lines = _info_lines(record)
+    if info_lines:
+        full += "\n<<INFO>>\n" + "\n".join(info_lines) + "\n</INFO>"
+    full += "\n" + ("-" * 60)
+    return full
+
+
+def format_complete(record):
+    # ⟪HEADER⟫/⟪TABLE⟫/⟪INFO⟫ block written by shabdhas_complete.py
+    header = record["header"]
+    if header:
+        header_info = "Sanskrit Header: "
+        for key in ("number", "word", "extra"):
+            if header[key] is not None:
+                header_info += header[key] + " "
+        if header["subtext"] is not None:
+            header_info += "| " + header["subtext"]
+    else:
+        header_info = NO_HEADER
+
+    if record["table"] is None:
+        table_lines = [NO_TABLE]
+    else:
+        table_lines = ["\t".join(row) for row in record["table"] if row]
+
+    combined = f"⟪HEADER⟫ {header_info}\n"
+    combined += "⟪TABLE⟫\n" + "\n".join(table_lines) + "\n⟪/TABLE⟫\n"
+    info_lines = _info_lines(record)
+    if info_lines:
+        combined += "\n⟪INFO⟫\n" + "\n".join(info_lines) + "\n⟪/INFO⟫"
+    combined += "\n" + ("-" * 60) + "\n"
+    return combined
+
+
+# ---- Reading the legacy text formats back ----
+_DEVA_NUMBER = re.compile(r"^[०-९0-9]+$")
+_ROMAN = re.compile(r"[A-Za-z]")
+
+
+def _split_header(left, subtext):
+    # "१ हरि इकारान्तः पुंलिङ्गः" + "hari | इ पुं" -> number, word, extra, subtext. The word can be
+    # several tokens (keys with "_"), so its length comes from the HK spelling in the subtext.
+    tokens = left.split()
+    number = tokens.pop(0) if tokens and _DEVA_NUMBER.match(tokens[0]) else None
+    size = 1
+    if subtext:
+        roman = subtext.split("|")[0].strip()
+        word = to_deva(roman)
+        if roman and tokens[:len(word.split())] == word.split():
+            size = len(word.split())
+    word = " ".join(tokens[:size]) or None
+    extra = " ".join(tokens[size:]) or None
+    return {"number": number, "word": word, "extra": extra, "subtext": subtext}
+
+
+def _section(lines, start, end):
+    # Lines strictly between the `start` and `end` marker lines; None if `start` is absent
+    if start not in lines:
+        return None
+    i = lines.index(start)
+    if end not in lines[i + 1:]:
+        raise ValueError(f"{start} without {end}")
+    return lines[i + 1:lines.index(end, i + 1)]
+
+
+def _legacy_record(header, lines, table_markers, info_markers):
+    table = _section(lines, *table_markers)
+    if table is None:
+        raise ValueError(f"no {table_markers[0]} section")
+    if table == [NO_TABLE]:
+        table = None
+    else:
+        table = [line.split("\t") for line in table if line]
+    info = []
+    for line in _section(lines, *info_markers) or []:
+        if not line:
+            continue
+        label, sep, value = line.partition(": ")
+        if not sep:
+            raise ValueError(f"info line without 'label: value': {line[:60]!r}")
+        info.append([label, value])
+    return {"header": header, "table": table, "info": info}
+
+
+def parse_complete(block):
+    # Inverse of format_complete()
+    lines = block.strip().split("\n")
+    if not lines[0].startswith("⟪HEADER⟫ "):
+        raise ValueError("block does not start with ⟪HEADER⟫")
+    text = lines[0][len("⟪HEADER⟫ "):]
+    if text == NO_HEADER:
+        header = None
+    elif text.startswith("Sanskrit Header: "):
+        left, sep, subtext = text[len("Sanskrit Header: "):].partition("| ")
+        header = _split_header(left, subtext.strip() if sep else None)
+    else:
+        raise ValueError(f"unrecognised header line: {lines[0][:60]!r}")
+    return _legacy_record(header, lines, ("⟪TABLE⟫", "⟪/TABLE⟫"), ("⟪INFO⟫", "⟪/INFO⟫"))
+
+
+def parse_tagged(block):
+    # Inverse of format_tagged(); the subtext is where the first roman token starts
+    lines = block.strip().split("\n")
+    if not lines[0].startswith("Sanskrit Header: "):
+        raise ValueError("block does not start with 'Sanskrit Header:'")
+    text = lines[0][len("Sanskrit Header: "):]
+    if text == NO_HEADER:
+        header = None
+    else:
+        tokens = text.split()
+        at = next((i for i, t in enumerate(tokens) if _ROMAN.search(t)), len(tokens))
+        header = _split_header(" ".join(tokens[:at]), " ".join(tokens[at:]) or None)
+    return _legacy_record(header, lines, ("<<TABLE>>", "</TABLE>"), ("<<INFO>>", "</INFO>"))
@@ -0,0 +1,135 @@
+from readiness import RowWatch, PageNotReady, probe_expression
+from translit import split_key, to_deva, deva_digits_to_ascii
+from urllib.parse import urlsplit
+import threading
+import time
+
+# Moves a driver between entries through ashtadhyayi.com's client-side router
+# instead of a full driver.get() per entry, so the JS bundle is loaded and run
+# once per Chrome session rather than ~12k times.
+#
+# navigate() pushes the entry's path onto the history and fires popstate, which
+# the app's router answers by rendering the new entry in place. The old DOM is
+# not trusted: the page must first show the requested entry (shabda word and
+# homonym number, or the dhatu number in the heading, checked against the link
+# key via translit.py) and its rows must differ from the ones on screen before
+# the route (the heading can update before the table does), and only then are
+# they watched until stable. When
+# the driver is not on the app yet (fresh or recycled Chrome), or the entry and
+# its new rows do not show up within `route_timeout`, navigate() returns False
+# and the caller does the usual full load.
+
+_ROUTE_JS = """
+const [url] = arguments;
+const target = new URL(url, location.href);
+if (location.origin !== target.origin || document.readyState !== "complete") return false;
+if (location.pathname === target.pathname) return "here";
+history.pushState({}, "", target.pathname + target.search);
+window.dispatchEvent(new PopStateEvent("popstate", {state: history.state}));
+return true;
+"""
+
+# Row fingerprint and identity texts, appended to the readiness probe:
+# [rows, textLength, body, headers, fingerprint, identity]
+_IDENTITY_JS = """
+const probe = %s;
+let fingerprint = 0;
+for (const row of document.querySelectorAll(arguments[1])) {
+    for (const ch of row.textContent) fingerprint = (fingerprint * 31 + ch.codePointAt(0)) | 0;
+    fingerprint = (fingerprint * 31 + 10) | 0;
+}
+probe.push(fingerprint);
+probe.push(arguments[0].map(s => {
+    const el = document.querySelector(s);
+    return el ? el.textContent.replace(/\\s+/g, " ").trim() : null;
+}));
+return probe;
+"""
+
+SHABDA_IDENTITY = (
+    ".justify-content-between .title-font.font-weight-bold",  # word, e.g. रमा
+    ".justify-content-between .text-secondary",  # homonym number, e.g. १
+    ".justify-content-between .subtext-font",  # "ramA | आ स्त्री", the key in HK
+)
+DHATU_IDENTITY = ("#dhatu-title-extra-info",)  # "०१.०००२ एधँ॒ वृद्धौ ..."
+
+
+def entry_key(url):
+    return urlsplit(url).path.rstrip("/").rsplit("/", 1)[1]
+
+
+def shabda_matches(key, identity):
+    word, number, subtext = identity
+    base, homonym = split_key(key)
+    if number and homonym and deva_digits_to_ascii(number).strip() != str(homonym):
+        return False
+    roman = (subtext or "").split("|")[0].strip()
+    return word == to_deva(base) or (roman and roman == base)
+
+
+def dhatu_matches(key, identity):
+    heading = identity[0]
+    return bool(heading) and deva_digits_to_ascii(heading.split()[0]) == key
+
+
+KINDS = {"shabda": (SHABDA_IDENTITY, shabda_matches), "dhatu": (DHATU_IDENTITY, dhatu_matches)}
+
+
+class SpaNavigator:
+    def __init__(self, kind, row_selector, header_selector=None, route_timeout=10, timeout=30, poll=0.1):
+        self.identity_selectors, self.matches = KINDS[kind]
+        self.row_selector = row_selector
+        self.header_selector = header_selector
+        self.route_timeout = route_timeout  # for the requested entry to appear
+        self.timeout = timeout  # for its rows to settle, as in wait_for_rows
+        self.poll = poll
+        self._probe = _IDENTITY_JS % probe_expression(row_selector, header_selector)
+        self.routed = 0
+        self.fallbacks = {}  # reason -> count
+        self._lock = threading.Lock()
+
+    def _fallback(self, reason):
+        with self._lock:
+            self.fallbacks[reason] = self.fallbacks.get(reason, 0) + 1
+        return False
+
+    def navigate(self, driver, url, checkpoint=None):
+        # True once `url`'s entry is rendered and its rows are stable; False = do a full load.
+        # checkpoint() runs every poll and may raise to abandon the page (hedging.checkpoint)
+        # The rows on screen before the route; the new entry's must differ from them
+        *probe, before, _ = driver.execute_script(self._probe, list(self.identity_selectors), self.row_selector)
+        routed = driver.execute_script(_ROUTE_JS, url)
+        if not routed:
+            return self._fallback("not on the app")
+        if routed == "here" or not probe[0]:
+            before = None
+        key = entry_key(url)
+        deadline = time.monotonic() + self.route_timeout
+        watch = None
+        while True:
+            if checkpoint is not None:
+                checkpoint()
+            *probe, fingerprint, identity = driver.execute_script(self._probe, list(self.identity_selectors),
+                                                                  self.row_selector)
+            if watch is None:
+                entry_shown = self.matches(key, identity)
+                if entry_shown and probe[0] and fingerprint != before:
+                    # Rows only count from here, so stale ones from the last entry cannot pass as stable
+                    watch = RowWatch(self.row_selector, self.timeout, header_selector=self.header_selector)
+                elif time.monotonic() > deadline:
+                    return self._fallback("rows did not re-render" if entry_shown else "entry did not render")
+            if watch is not None:
+                try:
+                    if watch.update(probe):
+                        break
+                except PageNotReady:
+                    return self._fallback("rows not ready")
+            time.sleep(self.poll)
+        with self._lock:
+            self.routed += 1
+        return True
+
+    def summary(self):
+        total = self.routed + sum(self.fallbacks.values())
+        reasons = ", ".join(f"{n} {reason}" for reason, n in sorted(self.fallbacks.items())) or "none"
+        return f"🧭 SPA navigation: {self.routed}/{total} entries routed in-app; full loads: {reasons}"
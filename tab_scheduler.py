@@ -0,0 +1,449 @@
+from driver_pool import build_options
+from functools import partial
+from readiness import RowWatch, probe_expression
+import aiohttp
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Many tabs in a few Chrome processes, driven directly over the DevTools
+# protocol from one asyncio loop. A page costs one renderer and one coroutine
+# instead of one Chrome plus one OS thread, so a handful of browsers can keep
+# dozens of pages in flight.
+#
+# Every tab is attached to its browser's single WebSocket as a flattened
+# session (Target.attachToTarget flatten=true). Idle tabs wait in a FIFO queue
+# and callers wait FIFO for them, so URLs go out first come first served and the
+# least recently used tab (spread across browsers) takes the next one. A tab
+# whose renderer crashes (Target.targetCrashed) is closed and replaced and its
+# URL retried. A CDP error saying the session or target is gone counts as a
+# crash too. If the whole browser dies it is restarted and all of its tabs are
+# rebuilt: tabs from before the restart still waiting in the idle queue are
+# dropped when they come up, so no page goes to a dead session. A tab that
+# cannot be replaced after `replace_attempts` tries is given up instead of
+# retrying forever; the page it was on moves to another tab, and a page that
+# had already loaded is still returned. Tabs are recycled after
+# `pages_per_tab` pages to keep renderer memory flat.
+#
+# TabFetcher runs a scheduler on a background event loop, so the synchronous
+# fetch threads of the pipeline (pipeline.py) can call fetch(url) directly.
+
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+MAC_CHROME = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+# What ResourceBlocker.page_stats() tallies
+NETWORK_EVENTS = ("Network.requestWillBeSent", "Network.loadingFinished", "Network.loadingFailed")
+# CDPError messages meaning the tab's session or target no longer exists
+DEAD_SESSION_ERRORS = ("no session", "session with given id not found", "target closed", "no target with given id")
+
+
+def find_chrome():
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    if os.path.exists(MAC_CHROME):
+        return MAC_CHROME
+    raise FileNotFoundError("No Chrome/Chromium binary found; pass chrome=...")
+
+
+class CDPError(Exception):
+    pass
+
+
+class TabCrashed(Exception):
+    pass
+
+
+def _read_port_file(path):
+    # [port, browser endpoint path] once Chrome has written both, else fewer
+    try:
+        with open(path, "r") as f:
+            return f.read().split()
+    except FileNotFoundError:
+        return []
+
+
+def is_dead_tab(error):
+    if isinstance(error, (TabCrashed, ConnectionError)):
+        return True
+    return isinstance(error, CDPError) and any(m in str(error).lower() for m in DEAD_SESSION_ERRORS)
+
+
+# ---- One DevTools WebSocket ----
+class _Connection:
+    def __init__(self, ws):
+        self.ws = ws
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._listeners = {}  # method -> [callback(params, session_id)]
+        self.closed = asyncio.Event()
+        self._reader = asyncio.ensure_future(self._read())
+
+    def on(self, method, callback):
+        self._listeners.setdefault(method, []).append(callback)
+
+    async def send(self, method, params=None, session_id=None, timeout=30):
+        if self.closed.is_set():
+            raise ConnectionError("DevTools connection closed")
+        msg_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = future
+        message = {"id": msg_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        try:
+            await self.ws.send_str(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(msg_id, None)
+
+    async def _read(self):
+        try:
+            async for msg in self.ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+                data = json.loads(msg.data)
+                if "id" in data:
+                    future = self._pending.get(data["id"])
+                    if future is not None and not future.done():
+                        if "error" in data:
+                            future.set_exception(CDPError(data["error"].get("message", str(data["error"]))))
+                        else:
+                            future.set_result(data.get("result", {}))
+                else:
+                    for callback in self._listeners.get(data.get("method"), ()):
+                        callback(data.get("params", {}), data.get("sessionId"))
+        finally:
+            self.closed.set()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("DevTools connection closed"))
+
+    async def close(self):
+        await self.ws.close()
+        await self._reader
+
+
+class _Tab:
+    def __init__(self, browser, target_id, session_id):
+        self.browser = browser
+        self.target_id = target_id
+        self.session_id = session_id
+        self.generation = browser.generation  # tabs from before a browser restart are stale
+        self.pages = 0
+        self.crashed = asyncio.Event()
+        self.messages = []  # Network events of the current page, for ResourceBlocker.page_stats
+
+    async def send(self, method, params=None, timeout=30):
+        # Fails fast with TabCrashed instead of waiting out the timeout on a dead renderer
+        if self.crashed.is_set():
+            raise TabCrashed(self.target_id)
+        call = asyncio.ensure_future(self.browser.conn.send(method, params, self.session_id, timeout))
+        crash = asyncio.ensure_future(self.crashed.wait())
+        try:
+            done, _ = await asyncio.wait({call, crash}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            crash.cancel()
+        if call in done:
+            return call.result()
+        call.cancel()
+        raise TabCrashed(self.target_id)
+
+    async def evaluate(self, expression, timeout=30):
+        result = await self.send("Runtime.evaluate", {"expression": expression, "returnByValue": True}, timeout)
+        if "exceptionDetails" in result:
+            raise CDPError(result["exceptionDetails"].get("text", "script error"))
+        return result["result"].get("value")
+
+
+# ---- One Chrome process ----
+class _Browser:
+    def __init__(self, browser_id, chrome, headless, profile_dir, block_patterns):
+        self.browser_id = browser_id
+        self.chrome = chrome
+        self.headless = headless
+        self.profile_dir = profile_dir
+        self.block_patterns = list(block_patterns)
+        self.proc = None
+        self.conn = None
+        self.tabs = {}  # target id -> _Tab
+        self.sessions = {}  # session id -> _Tab, for routing events
+        self.restarts = 0
+        self.generation = 0  # bumped on every (re)start
+        self.lock = asyncio.Lock()
+
+    @property
+    def alive(self):
+        return self.conn is not None and not self.conn.closed.is_set() and self.proc.returncode is None
+
+    async def start(self, http, timeout=30):
+        port_file = os.path.join(self.profile_dir, "DevToolsActivePort")
+        if os.path.exists(port_file):
+            os.remove(port_file)
+        args = build_options(headless=self.headless, profile_dir=self.profile_dir).arguments
+        self.proc = await asyncio.create_subprocess_exec(
+            self.chrome, *args, "--remote-debugging-port=0", "--no-first-run", "--no-default-browser-check",
+            "about:blank", stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+        )
+        # Chrome writes the port it picked and the browser endpoint path once it is listening
+        deadline = time.monotonic() + timeout
+        while len(_read_port_file(port_file)) < 2:
+            if self.proc.returncode is not None or time.monotonic() > deadline:
+                await self.stop()
+                raise ConnectionError(f"Chrome {self.browser_id} did not open a DevTools port")
+            await asyncio.sleep(0.05)
+        port, path = _read_port_file(port_file)[:2]
+        ws = await http.ws_connect(f"ws://127.0.0.1:{port}{path}", max_msg_size=0)
+        self.conn = _Connection(ws)
+        self.tabs, self.sessions = {}, {}
+        self.generation += 1
+        self.conn.on("Target.targetCrashed", self._on_crash)
+        self.conn.on("Target.detachedFromTarget", self._on_detach)
+        for method in NETWORK_EVENTS:
+            self.conn.on(method, partial(self._on_network, method))
+        await self.conn.send("Target.setDiscoverTargets", {"discover": True})
+
+    def _on_crash(self, params, _session):
+        tab = self.tabs.get(params.get("targetId"))
+        if tab is not None:
+            tab.crashed.set()
+
+    def _on_detach(self, params, _session):
+        tab = self.sessions.get(params.get("sessionId"))
+        if tab is not None:
+            tab.crashed.set()
+
+    def _on_network(self, method, params, session_id):
+        tab = self.sessions.get(session_id)
+        if tab is not None:
+            tab.messages.append({"method": method, "params": params})
+
+    async def new_tab(self):
+        target = await self.conn.send("Target.createTarget", {"url": "about:blank"})
+        attached = await self.conn.send("Target.attachToTarget", {"targetId": target["targetId"], "flatten": True})
+        tab = _Tab(self, target["targetId"], attached["sessionId"])
+        self.tabs[tab.target_id] = tab
+        self.sessions[tab.session_id] = tab
+        await tab.send("Page.enable")
+        await tab.send("Network.enable")
+        if self.block_patterns:
+            await tab.send("Network.setBlockedURLs", {"urls": self.block_patterns})
+        return tab
+
+    async def close_tab(self, tab):
+        self.tabs.pop(tab.target_id, None)
+        self.sessions.pop(tab.session_id, None)
+        if self.alive:
+            try:
+                await self.conn.send("Target.closeTarget", {"targetId": tab.target_id}, timeout=5)
+            except (CDPError, ConnectionError, asyncio.TimeoutError):
+                pass
+
+    async def stop(self):
+        if self.conn is not None:
+            try:
+                await self.conn.send("Browser.close", timeout=5)
+            except (CDPError, ConnectionError, asyncio.TimeoutError):
+                pass
+            await self.conn.close()
+            self.conn = None
+        if self.proc is not None and self.proc.returncode is None:
+            self.proc.terminate()
+            try:
+                await asyncio.wait_for(self.proc.wait(), 10)
+            except asyncio.TimeoutError:
+                self.proc.kill()
+                await self.proc.wait()
+
+
+class TabScheduler:
+    def __init__(self, browsers=2, tabs_per_browser=16, headless=True, block_patterns=(), pages_per_tab=200,
+                 retries=2, replace_attempts=5, chrome=None, profile_root=None, on_page=None, metrics=None):
+        self.browser_count = browsers
+        self.tabs_per_browser = tabs_per_browser
+        self.max_tabs = browsers * tabs_per_browser
+        self.headless = headless
+        self.block_patterns = block_patterns
+        self.pages_per_tab = pages_per_tab
+        self.retries = retries
+        self.replace_attempts = replace_attempts  # tries to get a working tab back before giving it up
+        self.chrome = chrome
+        self.on_page = on_page  # called with each page's Network events, e.g. ResourceBlocker.page_stats
+        self.metrics = metrics  # optional metrics.Metrics; records "chrome_startup"
+        self.crashes = 0
+        self.browser_restarts = 0
+        self.recycled = 0
+        self.lost_tabs = 0
+        self.pages = 0
+        self._own_root = profile_root is None
+        self._profile_root = profile_root or tempfile.mkdtemp(prefix="chrome_tabs_")
+        self._browsers = []
+        self._idle = None
+        self._http = None
+
+    async def start(self):
+        self.chrome = self.chrome or find_chrome()
+        self._idle = asyncio.Queue()
+        self._http = aiohttp.ClientSession()
+        for n in range(self.browser_count):
+            profile_dir = os.path.join(self._profile_root, f"browser_{n}")
+            os.makedirs(profile_dir, exist_ok=True)
+            browser = _Browser(n, self.chrome, self.headless, profile_dir, self.block_patterns)
+            await self._start_browser(browser)
+            self._browsers.append(browser)
+        # Interleave so consecutive idle tabs belong to different browsers
+        for _ in range(self.tabs_per_browser):
+            for browser in self._browsers:
+                self._idle.put_nowait(await browser.new_tab())
+        return self
+
+    async def _start_browser(self, browser):
+        start = time.perf_counter()
+        await browser.start(self._http)
+        if self.metrics is not None:
+            self.metrics.observe("chrome_startup", time.perf_counter() - start)
+
+    async def _replace(self, tab):
+        # A fresh tab in place of `tab`, or None when a browser restart has already rebuilt it
+        browser = tab.browser
+        async with browser.lock:
+            if tab.generation != browser.generation:
+                return None
+            if not browser.alive:
+                await self._restart(browser, tab)
+            else:
+                await browser.close_tab(tab)
+            return await browser.new_tab()
+
+    async def _restart(self, browser, failing):
+        # Relaunch a dead browser and rebuild every tab it had; the caller makes the one for `failing`
+        old = [tab for tab in browser.tabs.values() if tab is not failing]
+        for tab in old:
+            tab.crashed.set()  # pages still running on them fail now instead of at their timeout
+        await browser.stop()
+        await self._start_browser(browser)
+        browser.restarts += 1
+        self.browser_restarts += 1
+        for _ in old:
+            self._idle.put_nowait(await browser.new_tab())
+
+    async def _checkout(self):
+        # Next idle tab, skipping stale ones from before a browser restart (already replaced)
+        while True:
+            tab = await self._idle.get()
+            if tab is None:  # every tab has been given up; wake the next waiter too
+                self._idle.put_nowait(None)
+                raise ConnectionError(f"all {self.max_tabs} tabs were given up")
+            if tab.generation == tab.browser.generation:
+                return tab
+
+    def _release(self, tab):
+        if tab is not None:
+            self._idle.put_nowait(tab)
+
+    async def fetch(self, url, row_selector, header_selector=None, timeout=40, poll=0.1, checkpoint=None):
+        # Rendered HTML of `url` once its rows are stable; PageNotReady as for wait_for_rows
+        for attempt in range(self.retries + 1):
+            tab = await self._checkout()
+            try:
+                html = await self._load(tab, url, row_selector, header_selector, timeout, poll, checkpoint)
+            except BaseException as e:
+                if not is_dead_tab(e):
+                    self._release(tab)
+                    raise
+                self.crashes += 1
+                error = e
+                try:
+                    self._release(await self._replace_or_give_up(tab))
+                except ConnectionError:
+                    pass  # counted in lost_tabs; the next attempt takes another tab
+                continue
+            tab.pages += 1
+            self.pages += 1
+            if self.on_page is not None:
+                self.on_page(messages=tab.messages)
+            if tab.pages >= self.pages_per_tab:
+                self.recycled += 1
+                try:
+                    tab = await self._replace_or_give_up(tab)
+                except ConnectionError:
+                    tab = None  # the page itself is done; only its tab is lost
+            self._release(tab)
+            return html
+        raise TabCrashed(f"{url}: tab crashed {self.retries + 1} times ({type(error).__name__}: {error})")
+
+    async def _replace_or_give_up(self, tab):
+        for attempt in range(self.replace_attempts):
+            try:
+                return await self._replace(tab)
+            except (CDPError, ConnectionError, asyncio.TimeoutError) as e:
+                error = e
+                await asyncio.sleep(min(2 ** attempt, 10))
+        # The browser keeps one tab fewer from here on
+        self.lost_tabs += 1
+        if self.lost_tabs >= self.max_tabs:
+            self._idle.put_nowait(None)
+        raise ConnectionError(f"could not replace a tab in browser {tab.browser.browser_id} "
+                              f"after {self.replace_attempts} attempts ({type(error).__name__}: {error})")
+
+    async def _load(self, tab, url, row_selector, header_selector, timeout, poll, checkpoint=None):
+        tab.messages = []
+        result = await tab.send("Page.navigate", {"url": url}, timeout)
+        if result.get("errorText"):
+            raise CDPError(f"navigation failed: {result['errorText']}")
+        watch = RowWatch(row_selector, timeout=timeout, header_selector=header_selector, checkpoint=checkpoint)
+        expression = probe_expression(row_selector, header_selector)
+        while not watch.update(await tab.evaluate(expression)):
+            await asyncio.sleep(poll)
+        return await tab.evaluate("document.documentElement.outerHTML")
+
+    def stats(self):
+        open_tabs = sum(len(b.tabs) for b in self._browsers)
+        return {"browsers": len(self._browsers), "tabs": open_tabs, "pages": self.pages, "crashes": self.crashes,
+                "browser_restarts": self.browser_restarts, "recycled": self.recycled, "lost_tabs": self.lost_tabs}
+
+    def summary(self):
+        s = self.stats()
+        return (f"🗂️ Tabs: {s['tabs']} tabs in {s['browsers']} browsers, {s['pages']} pages, "
+                f"{s['crashes']} tab crashes recovered, {s['browser_restarts']} browser restarts, {s['recycled']} tabs recycled, "
+                f"{s['lost_tabs']} tabs given up")
+
+    async def close(self):
+        for browser in self._browsers:
+            await browser.stop()
+        if self._http is not None:
+            await self._http.close()
+        if self._own_root:
+            shutil.rmtree(self._profile_root, ignore_errors=True)
+
+
+class TabFetcher:
+    # A TabScheduler on its own event loop thread, for synchronous callers
+    def __init__(self, **kwargs):
+        self.scheduler = TabScheduler(**kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="tab-scheduler", daemon=True)
+        self._thread.start()
+        self._call(self.scheduler.start())
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def fetch(self, url, row_selector, header_selector=None, timeout=40, checkpoint=None):
+        return self._call(self.scheduler.fetch(url, row_selector, header_selector, timeout, checkpoint=checkpoint))
+
+    def summary(self):
+        return self.scheduler.summary()
+
+    def close(self):
+        try:
+            self._call(self.scheduler.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
@@ -0,0 +1,115 @@
+from aiohttp import web
+import asyncio
+import itertools
+import json
+import os
+import sys
+
+# A stand-in Chrome for tab_scheduler tests: speaks just enough of the DevTools
+# protocol over the browser WebSocket (flattened sessions) to load pages, and
+# misbehaves on request. Chrome's command line is accepted as is; only
+# --user-data-dir is read, for DevToolsActivePort and the one-shot markers.
+#
+# Every page has stable rows and its HTML is "<html>URL</html>", except:
+#   .../crash        the renderer crashes (Target.targetCrashed) the first time
+#   .../nosession    the first command answers "No session with given id"
+#   .../killbrowser  the whole browser exits the first time (per profile)
+# FAKE_CHROME_MAX_TARGETS=n makes Target.createTarget fail after n tabs.
+
+MAX_TARGETS = int(os.environ.get("FAKE_CHROME_MAX_TARGETS", "0")) or None
+
+
+def profile_dir():
+    for arg in sys.argv[1:]:
+        if arg.startswith("--user-data-dir="):
+            return arg.split("=", 1)[1]
+    raise SystemExit("fake_chrome: --user-data-dir is required")
+
+
+def once(name):
+    # True the first time `name` comes up for this profile, across restarts
+    marker = os.path.join(profile_dir(), f"fake_chrome.{name}")
+    if os.path.exists(marker):
+        return False
+    open(marker, "w").close()
+    return True
+
+
+class Browser:
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.targets = {}  # session id -> target id
+        self.urls = {}  # session id -> current url
+        self.created = 0
+
+    async def handle(self, ws, message):
+        method, params, session = message["method"], message.get("params", {}), message.get("sessionId")
+
+        def reply(result=None, error=None):
+            body = {"id": message["id"]}
+            body.update({"error": {"message": error}} if error else {"result": result or {}})
+            return ws.send_str(json.dumps(body))
+
+        if method == "Target.createTarget":
+            if MAX_TARGETS is not None and self.created >= MAX_TARGETS:
+                return await reply(error="Target creation failed")
+            self.created += 1
+            return await reply({"targetId": f"T{next(self.ids)}"})
+        if method == "Target.attachToTarget":
+            session_id = f"S{next(self.ids)}"
+            self.targets[session_id] = params["targetId"]
+            return await reply({"sessionId": session_id})
+        if method == "Target.closeTarget":
+            for session_id, target in list(self.targets.items()):
+                if target == params["targetId"]:
+                    del self.targets[session_id]
+            return await reply({"success": True})
+        if method == "Browser.close":
+            await reply()
+            os._exit(0)
+        if session is not None and session not in self.targets:
+            return await reply(error="No session with given id")
+        if method == "Page.navigate":
+            url = params["url"]
+            self.urls[session] = url
+            if url.endswith("/killbrowser") and once("killbrowser"):
+                os._exit(1)
+            if url.endswith("/crash") and once("crash"):
+                return await ws.send_str(json.dumps({"method": "Target.targetCrashed",
+                                                     "params": {"targetId": self.targets[session]}}))
+            if url.endswith("/nosession") and once("nosession"):
+                return await reply(error="No session with given id")
+            return await reply({"frameId": "F"})
+        if method == "Runtime.evaluate":
+            url = self.urls.get(session, "about:blank")
+            if params["expression"] == "document.documentElement.outerHTML":
+                return await reply({"result": {"type": "string", "value": f"<html>{url}</html>"}})
+            return await reply({"result": {"type": "object", "value": [3, 30, 100, []]}})
+        return await reply()
+
+
+async def devtools(request):
+    ws = web.WebSocketResponse(max_msg_size=0)
+    await ws.prepare(request)
+    browser = request.app["browser"]
+    async for msg in ws:
+        await browser.handle(ws, json.loads(msg.data))
+    return ws
+
+
+async def main():
+    app = web.Application()
+    app["browser"] = Browser()
+    app.router.add_get("/devtools/browser/fake", devtools)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    with open(os.path.join(profile_dir(), "DevToolsActivePort"), "w") as f:
+        f.write(f"{port}\n/devtools/browser/fake")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,35 @@
+from crawl_state import CrawlState, DONE, IN_FLIGHT, PENDING
+import time
+
+
+def test_complete_only_counts_for_the_current_lease_holder(tmp_path):
+    state = CrawlState(str(tmp_path / "state.sqlite"), lease_seconds=0.05)
+    state.seed(["u0"])
+    assert state.lease("slow") == [(0, "u0")]
+    time.sleep(0.1)  # the slow worker runs past its lease; the page goes to another one
+    assert state.lease("fast") == [(0, "u0")]
+
+    assert not state.complete("u0", "late", worker="slow")
+    assert state.complete("u0", "fresh", worker="fast")
+    assert not state.complete("u0", "again", worker="fast")  # already done: no second record
+    assert state.counts()[DONE] == 1
+    assert [result for _, _, result in state.results()] == ["fresh"]
+
+
+def test_fail_from_an_expired_lease_is_ignored(tmp_path):
+    state = CrawlState(str(tmp_path / "state.sqlite"), lease_seconds=0.05)
+    state.seed(["u0"])
+    state.lease("slow")
+    time.sleep(0.1)
+    state.lease("fast")
+    assert not state.fail("u0", "timeout", worker="slow")
+    assert state.counts()[IN_FLIGHT] == 1
+    assert state.fail("u0", "timeout", worker="fast")
+    assert state.counts()[PENDING] == 1
+
+
+def test_complete_without_a_worker_keeps_the_old_behaviour(tmp_path):
+    state = CrawlState(str(tmp_path / "state.sqlite"))
+    state.seed(["u0"])
+    assert state.complete("u0", "r")
+    assert state.counts()[DONE] == 1
@@ -0,0 +1,53 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import crawl_worker
+from crawl_worker import CoordinatorClient
+import json
+import threading
+import urllib.error
+import pytest
+
+
+@pytest.fixture
+def server():
+    # Answers with the statuses queued in server.replies (200 + {} once they run out)
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            httpd.hits += 1
+            status = httpd.replies.pop(0) if httpd.replies else 200
+            body = json.dumps({"ok": True}).encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.hits, httpd.replies = 0, []
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(crawl_worker.time, "sleep", lambda seconds: None)
+
+
+def client(httpd):
+    return CoordinatorClient(f"http://127.0.0.1:{httpd.server_address[1]}", "w1", retries=5)
+
+
+def test_client_errors_are_not_retried(server):
+    server.replies = [404]
+    with pytest.raises(urllib.error.HTTPError):
+        client(server).status()
+    assert server.hits == 1
+
+
+def test_server_errors_are_retried(server):
+    server.replies = [503, 502]
+    assert client(server).status() == {"ok": True}
+    assert server.hits == 3
@@ -0,0 +1,43 @@
+from form_index import FormIndex, build, serve
+import json
+import pytest
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+RECORD = {"idx": 0, "url": "https://ashtadhyayi.com/shabda/@rAma1", "header": {"word": "राम"},
+          "table": [["प्रथमा", "रामः", "रामौ", "रामाः"], ["द्वितीया", "रामम्", "रामौ", "रामान्"]],
+          "info": [["अर्थः", "Rama"]]}
+
+
+@pytest.fixture
+def server(tmp_path):
+    records = tmp_path / "shabda_records.jsonl"
+    records.write_text(json.dumps(RECORD, ensure_ascii=False) + "\n", encoding="utf-8")
+    build(str(tmp_path / "forms.idx"), str(records))
+    index = FormIndex(str(tmp_path / "forms.idx"))
+    server = serve(index, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    index.close()
+
+
+def get(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def test_prefix_limit(server):
+    reply = get(server + "/prefix?q=" + urllib.parse.quote("राम") + "&limit=2")
+    assert reply["total"] == 5 and len(reply["forms"]) == 2
+    assert get(server + "/prefix?q=" + urllib.parse.quote("राम"))["forms"][0] == "रामः"
+
+
+@pytest.mark.parametrize("limit", ["abc", "-1", "2.5"])
+def test_bad_limit_is_a_400(server, limit):
+    with pytest.raises(urllib.error.HTTPError) as e:
+        get(server + "/prefix?q=x&limit=" + urllib.parse.quote(limit))
+    assert e.value.code == 400
@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+from fake_site import FakeSite, DATA_URLS, FIXTURE_DIR
+from http_fetch import HttpFetcher, HttpError, data_url
+from rate_control import AdaptiveThrottle
+from shabda_parser import parse_shabda, parse_shabda_data
+from dhatu_parser import parse_dhatu, parse_dhatu_data
+import os
+import pytest
+
+
+def fixture(*parts):
+    with open(os.path.join(FIXTURE_DIR, *parts), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_data_url_template():
+    assert data_url("https://ashtadhyayi.com/shabda/@ramA1", "/data/shabda/{key}.json") == \
+        "https://ashtadhyayi.com/data/shabda/@ramA1.json"
+    assert data_url("https://ashtadhyayi.com/dhatu/01.0002", "/d/{key}", "http://127.0.0.1:9") == \
+        "http://127.0.0.1:9/d/01.0002"
+    assert data_url("https://ashtadhyayi.com/dhatu/01.0002/", "https://api.example/{key}") == \
+        "https://api.example/01.0002"
+
+
+@pytest.mark.parametrize("kind,key,parse,validate", [
+    ("shabda", "@ramA1", parse_shabda, parse_shabda_data),
+    ("dhatu", "01.0002", parse_dhatu, parse_dhatu_data),
+])
+def test_hand_written_payload_parses_like_the_rendered_page(kind, key, parse, validate):
+    # fixtures/<kind>/<key>.json is written in the endpoint's format, not generated by the parser
+    with FakeSite() as site, HttpFetcher(DATA_URLS[kind], validate=validate) as http:
+        text = http.fetch(f"{site.base_url}/{kind}/{key}")
+    assert text == fixture(kind, f"{key}.json")
+    assert parse(text) == parse(fixture(kind, f"{key}.html"))
+    assert http.served == 1
+
+
+def test_payload_fields_are_read_as_written():
+    record = parse_shabda(fixture("shabda", "@ramA1.json"))
+    assert record["header"]["word"] == "रमा" and record["header"]["subtext"] == "ramA | आ स्त्री"
+    assert record["table"][0] == ["प्रथमा", "रमा", "रमे", "रमाः"]
+    record = parse_dhatu(fixture("dhatu", "01.0002.json"))
+    assert record["cards"][1]["rows"][0][0] == ["एधाञ्चक्रे", "एधाम्बभूव", "एधामास"]
+
+
+def test_unrecognised_payload_is_rendered_instead():
+    # A 200 JSON body of another shape (e.g. the live site's own schema) is not data for the parser:
+    # None, so the caller renders the page and nothing is cached
+    with FakeSite() as site, HttpFetcher(DATA_URLS["shabda"], validate=parse_shabda_data) as http:
+        assert http.fetch(f"{site.base_url}/shabda/@kavi1") is None
+        assert http.unrecognised == 1 and http.served == 0
+    for text in ('{"id": "@kavi1", "forms": {}}', '{"table": "रमा"}', '{"table": [], "info": [["x"]]}', "[1, 2]"):
+        with pytest.raises(ValueError):
+            parse_shabda_data(text)
+    for text in ('{"cards": [{"rows": "एधते"}]}', '{"heading": 1, "cards": []}', '{"entries": []}'):
+        with pytest.raises(ValueError):
+            parse_dhatu_data(text)
+
+
+def test_base_url_rebases_live_links():
+    with FakeSite() as site, HttpFetcher(DATA_URLS["shabda"], base_url=site.base_url) as http:
+        text = http.fetch("https://ashtadhyayi.com/shabda/@ramA1")
+    assert text == fixture("shabda", "@ramA1.json")
+
+
+def test_page_shell_or_missing_endpoint_falls_back_to_the_browser():
+    # HTML (the SPA shell) and 404s are not data: None, so the caller renders the page
+    with FakeSite() as site:
+        with HttpFetcher("/shabda/{key}") as http:
+            assert http.fetch(f"{site.base_url}/shabda/@ramA1") is None
+        with HttpFetcher("/nowhere/{key}.json") as http:
+            assert http.fetch(f"{site.base_url}/shabda/@ramA1") is None
+            assert http.missing == 1 and http.served == 0
+
+
+def test_server_errors_raise_and_count_against_the_throttle():
+    throttle = AdaptiveThrottle(rate=100, burst=4, initial=4, maximum=4, cooldown=0)
+    with FakeSite(error_rate=1.0) as site, HttpFetcher(DATA_URLS["shabda"]) as http:
+        with pytest.raises(HttpError):
+            with throttle.request():
+                http.fetch(f"{site.base_url}/shabda/@ramA1")
+    stats = throttle.snapshot()
+    assert stats["failures"] == 1 and stats["limit"] == 2
+    assert http.errors == 1
+
+
+def test_pages_are_fetched_one_at_a_time_within_the_throttle():
+    # Never more requests at the server than throttle slots, whatever the thread count
+    links = [f"/shabda/@page{i}" for i in range(40)]
+    throttle = AdaptiveThrottle(rate=1000, burst=3, initial=3, maximum=3)
+    peak = [0]
+    with FakeSite(latency=0.02) as site, HttpFetcher(DATA_URLS["shabda"], concurrency=20) as http:
+        def fetch(path):
+            with throttle.request():
+                peak[0] = max(peak[0], site.in_flight)
+                return http.fetch(site.base_url + path)
+
+        with ThreadPoolExecutor(max_workers=12) as executor:
+            pages = list(executor.map(fetch, links))
+    assert all(parse_shabda(page)["table"] for page in pages)
+    assert site.requests == len(links)
+    assert throttle.snapshot()["in_flight"] == 0
+    assert peak[0] <= 3
@@ -0,0 +1,67 @@
+from fake_site import FIXTURE_DIR
+from legacy_convert import convert, convert_block
+from shabda_parser import parse_shabda, format_complete, format_tagged
+import json
+import os
+import pytest
+
+LINKS = [f"https://ashtadhyayi.com/shabda/@w{i}" for i in range(10)]
+SEP = "-" * 60
+
+
+@pytest.fixture
+def record():
+    with open(os.path.join(FIXTURE_DIR, "shabda", "@ramA1.html"), "r", encoding="utf-8") as f:
+        return parse_shabda(f.read())
+
+
+def run(tmp_path, name, text):
+    source = tmp_path / name
+    source.write_text(text, encoding="utf-8")
+    link_file = tmp_path / "links.json"
+    link_file.write_text(json.dumps(LINKS), encoding="utf-8")
+    out = tmp_path / "out"
+    stats = convert([str(source)], output_dir=str(out), problems_file=str(out / "problems.jsonl"),
+                    link_files={"shabda": str(link_file)}, processes=0)
+
+    def read(path):
+        return [json.loads(line) for line in open(path, encoding="utf-8")] if os.path.exists(path) else []
+
+    return stats, read(out / "shabda_records.jsonl"), read(out / "problems.jsonl")
+
+
+def test_shabdhas_complete_batch(tmp_path, record):
+    # shabda_output_{START}_{END}.txt: idx from the batch range, a timeout block in between
+    text = "\n".join([format_complete(record), f"{LINKS[4]}\n⚠️ Timeout or error loading table.\n{SEP}",
+                      format_complete(record)])
+    stats, records, problems = run(tmp_path, "shabda_output_3_6.txt", text)
+    assert [(r["idx"], r["url"]) for r in records] == [(3, LINKS[3]), (5, LINKS[5])]
+    assert records[0]["table"] == record["table"]
+    assert [(p["idx"], p["problem"]) for p in problems] == [(4, "scrape_error")]
+    assert stats["malformed"] == 0
+
+
+def test_multishabdhas_output_with_error_blocks(tmp_path, record):
+    # Baseline multishabdhas.py: record blocks bare, failures as "[i] link" + "⚠️ Error:"
+    text = "\n\n".join([format_tagged(record), f"[7] {LINKS[7]}\n⚠️ Error: Message: timeout\n{SEP}"])
+    stats, records, problems = run(tmp_path, "shabda_output_6_8.txt", text)
+    assert [(r["idx"], r["url"]) for r in records] == [(6, LINKS[6])]
+    assert records[0]["header"] == record["header"]
+    assert [(p["idx"], p["url"], p["problem"]) for p in problems] == [(7, LINKS[7], "scrape_error")]
+    assert stats["scrape_error"] == 1 and stats["malformed"] == 0
+
+
+def test_failed_retry_output(tmp_path, record):
+    # failed.py: "[n] link" over each block, n counting within the retry list
+    text = "\n\n".join([f"[0] {LINKS[8]}\n" + format_tagged(record), f"[1] {LINKS[2]}\n" + format_tagged(record),
+                        f"[2] https://ashtadhyayi.com/shabda/@unlisted1\n" + format_tagged(record)])
+    stats, records, problems = run(tmp_path, "shabda_retry_output.txt", text)
+    assert [(r["idx"], r["url"]) for r in records] == [
+        (8, LINKS[8]), (2, LINKS[2]), (2, "https://ashtadhyayi.com/shabda/@unlisted1")]
+    assert all(r["table"] == record["table"] and r["info"] == record["info"] for r in records)
+    assert problems == [] and stats["unkeyed"] == 0
+
+
+def test_unrecognised_block_is_malformed():
+    status, idx, url, problem, reason = convert_block("shabda", 0, f"[0] {LINKS[0]}\nsomething else")
+    assert (status, idx, url, problem) == ("problem", 0, LINKS[0], "malformed")
@@ -0,0 +1,29 @@
+from network_capture import SHABDA_KEY_RE, DHATU_KEY_RE, discover, find_entries
+
+
+def test_shabda_keys():
+    for key in ("@akSa1", "@rAma1", "@atithInAM_saparyA1", "@a_b_c12"):
+        assert SHABDA_KEY_RE.match(key), key
+    for key in ("akSa1", "@akSa", "@ak Sa1", "@/akSa1"):
+        assert not SHABDA_KEY_RE.match(key), key
+
+
+def test_dhatu_keys():
+    assert DHATU_KEY_RE.match("01.0001")
+    assert not DHATU_KEY_RE.match("1.0001")
+
+
+def test_compound_keys_are_discovered_from_payloads():
+    payload = {"data": [
+        {"id": "@rAma1", "word": "राम"},
+        {"link": "/shabda/@atithInAM_saparyA1", "word": "अतिथीनां सपर्या"},
+        "@hari1",
+    ]}
+    links, metadata = discover([("https://ashtadhyayi.com/api/list", payload)], SHABDA_KEY_RE,
+                               "https://ashtadhyayi.com/shabda/")
+    assert links == ["https://ashtadhyayi.com/shabda/@rAma1",
+                     "https://ashtadhyayi.com/shabda/@atithInAM_saparyA1",
+                     "https://ashtadhyayi.com/shabda/@hari1"]
+    assert metadata["https://ashtadhyayi.com/shabda/@atithInAM_saparyA1"]["word"] == "अतिथीनां सपर्या"
+    assert dict(find_entries(payload, SHABDA_KEY_RE, key_fields=("id",))) == {"@rAma1": {"id": "@rAma1", "word": "राम"},
+                                                                              "@hari1": {}}
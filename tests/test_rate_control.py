@@ -0,0 +1,129 @@
+import rate_control
+from rate_control import AdaptiveThrottle, AimdController, TokenBucket
+import pytest
+
+
+class FakeClock:
+    # Stands in for the time module inside rate_control: sleep() just moves the clock.
+    # Starts at 0 like a freshly booted machine's monotonic clock.
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # A real sleep always lets some time pass; without the floor a rounding residue in
+        # TokenBucket could wait 1e-17 s forever
+        self.now += max(seconds, 1e-6)
+
+
+class SimulatedServer:
+    # Answers 429 to every request past `capacity` in flight, or to everything while throttling;
+    # latency grows with load
+    def __init__(self, capacity, base_latency=0.2):
+        self.capacity = capacity
+        self.base_latency = base_latency
+        self.throttling = False
+
+    def respond(self, in_flight):
+        ok = not self.throttling and in_flight <= self.capacity
+        return ok, self.base_latency * (1 + in_flight / self.capacity)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_control, "time", clock)
+    return clock
+
+
+def run_round(controller, server, clock):
+    # One wave of as many requests as the controller allows, answered together
+    n = int(controller.limit)
+    for _ in range(n):
+        controller.acquire()
+    for i in range(n):
+        ok, latency = server.respond(i + 1)
+        clock.sleep(latency / n)
+        controller.release(latency, ok=ok)
+    return int(controller.limit)
+
+
+def test_backs_off_on_429_and_recovers_additively(clock):
+    controller = AimdController(initial=2, maximum=16, target_latency=1.0, cooldown=0.5)
+    server = SimulatedServer(capacity=8)
+
+    # Healthy: grows one slot per window of healthy responses, then settles around capacity
+    limits = [run_round(controller, server, clock) for _ in range(40)]
+    assert limits[0] == 3
+    assert all(b - a <= 1 for a, b in zip(limits, limits[1:]) if b > a)
+    assert 4 <= max(limits) <= 9
+    assert controller.decreases > 0  # crossing capacity drew 429s and a cut
+
+    # Throttled: every response is a 429; the limit halves at most once per cooldown, down to 1
+    server.throttling = True
+    before = int(controller.limit)
+    after_one = run_round(controller, server, clock)
+    assert after_one == max(1, int(before * 0.5))
+    throttled = [run_round(controller, server, clock) for _ in range(20)]
+    assert throttled[-1] == 1
+
+    # Recovery on a bigger server: strictly additive, +1 at a time up to the maximum, never past it
+    server.throttling = False
+    server.capacity = 100
+    recovery = [run_round(controller, server, clock) for _ in range(60)]
+    steps = [b - a for a, b in zip([1] + recovery, recovery)]
+    assert set(steps) <= {0, 1}
+    assert recovery[-1] == 16
+    assert max(recovery) == 16
+
+
+def test_cooldown_counts_a_burst_of_429s_once(clock):
+    controller = AimdController(initial=8, maximum=8, target_latency=10.0, cooldown=5.0)
+    for _ in range(8):
+        controller.acquire()
+    for _ in range(8):
+        controller.release(0.1, ok=False)
+    assert controller.decreases == 1 and int(controller.limit) == 4
+    clock.sleep(5.0)
+    controller.acquire()
+    controller.release(0.1, ok=False)
+    assert controller.decreases == 2 and int(controller.limit) == 2
+
+
+def test_latency_spike_backs_off_without_errors(clock):
+    controller = AimdController(initial=8, maximum=8, target_latency=1.0, cooldown=0)
+    controller.acquire()
+    controller.release(5.0, ok=True)
+    assert int(controller.limit) == 4 and controller.failures == 0
+
+
+def test_token_bucket_never_exceeds_its_rate(clock):
+    bucket = TokenBucket(rate=5.0, burst=2)
+    stamps = []
+    for _ in range(200):
+        bucket.acquire()
+        stamps.append(clock.now)
+    # Any one-second window holds at most rate + burst requests; the long-run rate is the limit
+    for i, start in enumerate(stamps):
+        assert sum(1 for t in stamps[i:] if t < start + 1.0) <= 5 + 2
+    assert (len(stamps) - 2) / stamps[-1] == pytest.approx(5.0)
+
+
+def test_throttle_caps_requests_per_second_under_a_fast_server(clock):
+    max_requests_per_sec = 4.0
+    throttle = AdaptiveThrottle(rate=max_requests_per_sec, burst=1, initial=4, maximum=32,
+                                target_latency=1.0, cooldown=0)
+    server = SimulatedServer(capacity=1000, base_latency=0.001)
+    started = []
+    for _ in range(100):
+        with throttle.request() as ticket:
+            started.append(clock.now)
+            ok, latency = server.respond(1)
+            clock.sleep(latency)
+            if not ok:
+                ticket.failed("429")
+    elapsed = started[-1] - started[0]
+    assert (len(started) - 1) / elapsed <= max_requests_per_sec + 1e-9
+    assert throttle.snapshot()["failures"] == 0
@@ -0,0 +1,101 @@
+from fake_site import DATA_URLS
+from resource_blocking import ResourceBlocker, template_pattern
+import json
+import pytest
+import threading
+
+SITE = "https://ashtadhyayi.com"
+DATA = SITE + "/data/shabda/@rAma1.json"
+
+
+class FakeDriver:
+    # Records DevTools commands and replays one page's Network events from the performance log
+    def __init__(self, requests):
+        self.requests = requests  # (url, CDP type, bytes)
+        self.commands = []
+        self.log = []
+
+    def execute_cdp_cmd(self, method, params):
+        self.commands.append((method, params))
+        return {}
+
+    def get(self, url):
+        for n, (asset, kind, size) in enumerate(self.requests):
+            self.log += [
+                {"method": "Network.requestWillBeSent",
+                 "params": {"requestId": str(n), "type": kind, "request": {"url": asset}}},
+                {"method": "Network.loadingFinished", "params": {"requestId": str(n), "encodedDataLength": size}},
+            ]
+
+    def get_log(self, name):
+        entries, self.log = [{"message": json.dumps({"message": m})} for m in self.log], []
+        return entries
+
+    def blocked_urls(self):
+        return [p["urls"] for m, p in self.commands if m == "Network.setBlockedURLs"][-1]
+
+
+def test_data_api_is_never_blocked():
+    blocker = ResourceBlocker(allow=[template_pattern(DATA_URLS["shabda"])])
+    assert blocker.matches(SITE + "/static/logo.png")
+    assert blocker.matches(SITE + "/fonts/siddhanta.woff2?v=3")
+    assert not blocker.matches(DATA)
+    assert not blocker.matches(SITE + "/api/shabda/list")
+    assert template_pattern(DATA_URLS["shabda"]) == "*/data/shabda/*.json"
+
+
+def test_block_pattern_over_the_data_api_is_rejected():
+    with pytest.raises(ValueError):
+        ResourceBlocker(patterns=["*/data/*"], allow=["*/data/*"])
+
+
+def test_calibration_learns_assets_by_resource_type():
+    driver = FakeDriver([
+        (SITE + "/shabda/@rAma1", "Document", 20000),
+        (SITE + "/img?id=3", "Image", 5000),  # no extension: only its type gives it away
+        (SITE + "/static/app.js", "Script", 90000),
+        (DATA, "Fetch", 3000),
+        (SITE + "/api/thumbnail", "Image", 700),  # allow-listed, stays loaded
+    ])
+    blocker = ResourceBlocker(types=("image", "font"), block_analytics=False, calibrate_url=SITE + "/shabda/@rAma1",
+                              allow=[template_pattern(DATA_URLS["shabda"])])
+    blocker.install(driver)
+    blocked = driver.blocked_urls()
+    assert SITE + "/img?id=3" in blocked and "*.png" in blocked
+    assert not any(p in blocked for p in (SITE + "/static/app.js", DATA, SITE + "/api/thumbnail"))
+    assert blocker.learned == 1 and blocker.sizes == {SITE + "/img?id=3": 5000}
+
+    # A blocked-type asset that still loads (this driver blocks nothing) shows up in the summary;
+    # the allow-listed one does not
+    driver.get(SITE + "/shabda/@hari1")
+    blocker.page_stats(driver)
+    assert blocker.leaked == {"Image": 1}
+    assert "still loading: 1 Image" in blocker.summary()
+
+
+def test_other_drivers_wait_for_calibration():
+    # Pool drivers starting while the first one calibrates must get the learned URLs as well
+    loading = threading.Event()
+    release = threading.Event()
+
+    class SlowDriver(FakeDriver):
+        def get(self, url):
+            loading.set()
+            release.wait(5)
+            super().get(url)
+
+    first = SlowDriver([(SITE + "/img?id=3", "Image", 5000)])
+    second = FakeDriver([])
+    blocker = ResourceBlocker(types=("image",), block_analytics=False, calibrate_url=SITE + "/shabda/@rAma1")
+    calibrating = threading.Thread(target=blocker.install, args=(first,))
+    calibrating.start()
+    loading.wait(5)
+    installing = threading.Thread(target=blocker.install, args=(second,))
+    installing.start()
+    installing.join(0.3)
+    assert installing.is_alive() and not second.commands  # waiting, nothing installed yet
+    release.set()
+    calibrating.join(5)
+    installing.join(5)
+    assert SITE + "/img?id=3" in second.blocked_urls()
+    assert second.blocked_urls() == first.blocked_urls()
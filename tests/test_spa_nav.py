@@ -0,0 +1,57 @@
+from spa_nav import SpaNavigator, _ROUTE_JS
+import time
+
+
+class FakeApp:
+    # A driver on the dhatu app whose router updates the heading at once but
+    # swaps the table only `render_delay` seconds after the route (None = never)
+    def __init__(self, render_delay, old_rows=("अ", "आ", "इ"), new_rows=("क", "ख", "ग")):
+        self.render_delay = render_delay
+        self.old_rows = old_rows
+        self.new_rows = new_rows
+        self.heading = "०१.०००१ भू सत्तायाम्"
+        self.path = "/dhatu/01.0001"
+        self.routed_at = None
+
+    def rows(self):
+        if self.routed_at is None or self.render_delay is None:
+            return self.old_rows
+        return self.new_rows if time.monotonic() - self.routed_at >= self.render_delay else self.old_rows
+
+    def execute_script(self, script, *args):
+        if script == _ROUTE_JS:
+            path = "/" + args[0].split("/", 3)[3]
+            if path == self.path:
+                return "here"
+            self.path = path
+            self.heading = "०१.०००२ एधँ॒ वृद्धौ"
+            self.routed_at = time.monotonic()
+            return True
+        rows = self.rows()
+        return [len(rows), sum(map(len, rows)), 100, ["dhatu"], hash(rows), [self.heading]]
+
+
+def navigator(**kwargs):
+    return SpaNavigator("dhatu", ".card tbody tr", ".card-header", poll=0.01, **kwargs)
+
+
+def test_heading_before_table_does_not_pass_stale_rows():
+    app = FakeApp(render_delay=0.8)  # well past RowWatch's 0.3 s stability window
+    spa = navigator(route_timeout=5)
+    assert spa.navigate(app, "https://ashtadhyayi.com/dhatu/01.0002")
+    assert app.rows() == app.new_rows
+    assert time.monotonic() - app.routed_at >= 0.8 + 0.3
+
+
+def test_table_that_never_re_renders_falls_back_to_a_full_load():
+    app = FakeApp(render_delay=None)
+    spa = navigator(route_timeout=0.5)
+    assert not spa.navigate(app, "https://ashtadhyayi.com/dhatu/01.0002")
+    assert spa.fallbacks == {"rows did not re-render": 1}
+
+
+def test_entry_already_on_screen_needs_no_re_render():
+    app = FakeApp(render_delay=None)
+    spa = navigator(route_timeout=0.5)
+    assert spa.navigate(app, "https://ashtadhyayi.com/dhatu/01.0001")
+    assert spa.routed == 1 and not spa.fallbacks
@@ -0,0 +1,92 @@
+from tab_scheduler import TabScheduler
+import asyncio
+import os
+import pytest
+import sys
+
+FAKE_CHROME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_chrome.py")
+ROWS = ".table-bordered tbody tr"
+
+
+@pytest.fixture
+def chrome(tmp_path):
+    # tab_scheduler execs a binary; this one runs the fake DevTools browser
+    path = tmp_path / "chrome"
+    path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_CHROME}" "$@"\n')
+    path.chmod(0o755)
+    return str(path)
+
+
+def run(chrome, tmp_path, urls, **kwargs):
+    # Fetch `urls` concurrently; -> (results or exceptions, stats)
+    async def main():
+        scheduler = TabScheduler(chrome=chrome, profile_root=str(tmp_path / "profiles"), **kwargs)
+        await scheduler.start()
+        try:
+            results = await asyncio.wait_for(asyncio.gather(
+                *(scheduler.fetch(url, ROWS, timeout=10, poll=0.02) for url in urls), return_exceptions=True), 60)
+            return results, scheduler.stats()
+        finally:
+            await scheduler.close()
+
+    return asyncio.run(main())
+
+
+def pages(urls):
+    return [f"<html>{url}</html>" for url in urls]
+
+
+def test_pages_load_across_browsers_and_tabs(chrome, tmp_path):
+    urls = [f"http://site/shabda/@w{i}" for i in range(6)]
+    results, stats = run(chrome, tmp_path, urls, browsers=2, tabs_per_browser=2)
+    assert results == pages(urls)
+    assert stats["pages"] == 6 and stats["tabs"] == 4 and stats["crashes"] == 0
+
+
+@pytest.mark.parametrize("path", ["crash", "nosession"])
+def test_dead_tab_is_replaced_and_the_page_retried(chrome, tmp_path, path):
+    urls = [f"http://site/{path}", "http://site/a"]
+    results, stats = run(chrome, tmp_path, urls, browsers=1, tabs_per_browser=2)
+    assert results == pages(urls)
+    assert stats["crashes"] == 1 and stats["tabs"] == 2 and stats["lost_tabs"] == 0
+
+
+def test_browser_restart_rebuilds_every_tab(chrome, tmp_path):
+    urls = ["http://site/killbrowser", "http://site/a", "http://site/b", "http://site/c"]
+    results, stats = run(chrome, tmp_path, urls, browsers=1, tabs_per_browser=3)
+    assert results == pages(urls)
+    assert stats["browser_restarts"] == 1 and stats["tabs"] == 3
+
+
+def test_failed_recycle_keeps_the_loaded_page(chrome, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_CHROME_MAX_TARGETS", "2")
+    urls = ["http://site/a", "http://site/b"]
+    results, stats = run(chrome, tmp_path, urls, browsers=1, tabs_per_browser=2, pages_per_tab=1,
+                         replace_attempts=1)
+    assert results == pages(urls)
+    assert stats["recycled"] == 2 and stats["lost_tabs"] == 2
+
+
+def test_crash_with_no_replacement_moves_to_another_tab(chrome, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_CHROME_MAX_TARGETS", "2")
+    results, stats = run(chrome, tmp_path, ["http://site/crash"], browsers=1, tabs_per_browser=2,
+                         replace_attempts=1)
+    assert results == pages(["http://site/crash"])
+    assert stats["crashes"] == 1 and stats["lost_tabs"] == 1
+
+
+def test_no_tabs_left_fails_instead_of_hanging(chrome, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_CHROME_MAX_TARGETS", "1")
+    async def main():
+        scheduler = TabScheduler(chrome=chrome, profile_root=str(tmp_path / "profiles"), browsers=1,
+                                 tabs_per_browser=1, pages_per_tab=1, replace_attempts=1)
+        await scheduler.start()
+        try:
+            first = await scheduler.fetch("http://site/a", ROWS, timeout=10, poll=0.02)
+            with pytest.raises(ConnectionError):
+                await asyncio.wait_for(scheduler.fetch("http://site/b", ROWS, timeout=10, poll=0.02), 10)
+            return first
+        finally:
+            await scheduler.close()
+
+    assert asyncio.run(main()) == "<html>http://site/a</html>"
@@ -0,0 +1,24 @@
+from translit import TranslitError, from_deva, to_deva, to_slp1
+import pytest
+
+
+def test_vedic_accents_are_dropped():
+    assert from_deva("भू॑") == "bhU"
+    assert from_deva("अ॒ग्निः") == "agniH"
+    assert from_deva("अ॒ग्निमी॑ळे") == "agnimILe"
+
+
+def test_slp1_keeps_the_accents_it_can_write():
+    assert to_slp1("अ॒ग्निः") == "a\\gniH"
+    assert to_slp1("भू॑") == "BU/"
+
+
+def test_unmapped_devanagari_raises():
+    for text in ("ॐ", "ॲ", "ऄ"):
+        with pytest.raises(TranslitError):
+            from_deva(text)
+
+
+def test_punctuation_digits_and_english_pass_through():
+    assert from_deva("रामः। १२ (Rama)") == "rAmaH। १२ (Rama)"
+    assert from_deva(to_deva("akRSNakarman")) == "akRSNakarman"
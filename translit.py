@@ -0,0 +1,302 @@
+from functools import lru_cache
+import bisect
+import json
+import os
+import re
+import sys
+import unicodedata
+
+# Roman <-> Devanagari for the site's keys and content. Shabda link keys are
+# Harvard-Kyoto (https://ashtadhyayi.com/shabda/@akRSNakarman2 is अकृष्णकर्मन्,
+# homonym 2; "_" stands for a space), dhatu links are numbers (01.0002) whose
+# root only appears in Devanagari, and every scraped page is Devanagari. SLP1 is
+# supported alongside HK for queries and file conversion.
+#
+# KeyIndex is the precomputed join: one row per shabda/dhatu key with its roman
+# base, homonym number and Devanagari form, kept as two sorted arrays (roman and
+# Devanagari) so exact and prefix lookups in either script are a bisect and
+# return the whole homonym group (akRSNakarman1, akRSNakarman2, ...).
+#
+#   python translit.py table [OUT.tsv]              # key table from the link files
+#   python translit.py lookup अकृष्णकर्मन्  |  lookup akRSNakarman  |  lookup @akSa1
+#   python translit.py lookup akfzRakarman slp1
+#   python translit.py prefix कृष्ण
+#   python translit.py to-deva IN OUT [hk|slp1]  |  from-deva IN OUT [hk|slp1]
+
+# ----------- SETTINGS -------------
+SHABDA_LINK_FILE = os.path.expanduser("~/Desktop/all_shabda_links.json")
+DHATU_RECORDS = os.path.expanduser("~/Desktop/dhatu_records.jsonl")  # dhatu number -> root comes from the scraped headings
+KEY_TABLE_FILE = os.path.expanduser("~/Desktop/key_table.tsv")
+KEY_SCHEME = "hk"  # how the site spells shabda link keys
+# ----------------------------------
+
+KINDS = ("shabda", "dhatu")
+
+# Devanagari side, index-aligned with every scheme below
+DEVA_VOWELS = "अ आ इ ई उ ऊ ऋ ॠ ऌ ॡ ए ऐ ओ औ".split()
+DEVA_MATRAS = [""] + "ा ि ी ु ू ृ ॄ ॢ ॣ े ै ो ौ".split()
+DEVA_CONSONANTS = "क ख ग घ ङ च छ ज झ ञ ट ठ ड ढ ण त थ द ध न प फ ब भ म य र ल व श ष स ह ळ".split()
+DEVA_MARKS = ["ं", "ः", "ँ", "ऽ", "॑", "॒"]
+DEVA_DIGITS = [chr(0x0966 + d) for d in range(10)]
+VIRAMA = "्"
+NUKTA = "़"
+ACCENTS = "॒॑ँ"  # ignored when matching keys: dhatu headings carry the upadeśa accents/anunāsika
+# Vedic svara marks (U+0951-U+0954) and the Vedic Extensions block: dropped by
+# from_deva() unless the scheme spells them (SLP1 / and \)
+VEDIC_MARKS = re.compile(r"[\u0951-\u0954\u1cd0-\u1cff]")
+# Devanagari that from_deva() copies as is: dandas, digits, the abbreviation sign
+DEVA_PASSTHROUGH = set("।॥॰" + "".join(DEVA_DIGITS))
+
+SCHEMES = {
+    "hk": {
+        "vowels": "a A i I u U R RR lR lRR e ai o au".split(),
+        "consonants": "k kh g gh G c ch j jh J T Th D Dh N t th d dh n p ph b bh m y r l v z S s h L".split(),
+        "marks": ["M", "H", "~", "'", None, None],  # HK has no accent marks
+    },
+    "slp1": {
+        "vowels": "a A i I u U f F x X e E o O".split(),
+        "consonants": "k K g G N c C j J Y w W q Q R t T d D n p P b B m y r l v S z s h L".split(),
+        "marks": ["M", "H", "~", "'", "/", "\\"],
+    },
+}
+_DEVA_RUN = re.compile(r"[ऀ-ॿ᳐-᳿]+")
+_ROMAN_RUN = re.compile(r"[A-Za-z~'/\\]+")
+_KEY = re.compile(r"@?(?P<base>.*?)(?P<homonym>\d*)$")
+
+
+class _Scheme:
+    # Lookup tables for one roman scheme, built once at import
+    def __init__(self, vowels, consonants, marks):
+        self.vowels = dict(zip(vowels, DEVA_VOWELS))
+        self.matras = dict(zip(vowels, DEVA_MATRAS))
+        self.consonants = dict(zip(consonants, DEVA_CONSONANTS))
+        self.marks = {r: d for r, d in zip(marks, DEVA_MARKS) if r}
+        tokens = sorted({*self.vowels, *self.consonants, *self.marks}, key=len, reverse=True)
+        self.tokenizer = re.compile("|".join(map(re.escape, tokens)) + "|.", re.S)
+        # Devanagari -> roman; matras and independent vowels map to the same letter
+        self.roman = {d: r for table in (self.vowels, self.consonants, self.marks) for r, d in table.items()}
+        self.roman.update({d: r for r, d in self.matras.items() if d})
+        self.deva_consonants = set(self.consonants.values())
+        self.deva_matras = {d for d in self.matras.values() if d}
+
+
+_SCHEMES = {name: _Scheme(**spec) for name, spec in SCHEMES.items()}
+
+
+class TranslitError(ValueError):
+    pass
+
+
+def is_devanagari(text):
+    return _DEVA_RUN.search(text) is not None
+
+
+@lru_cache(maxsize=65536)
+def _word_to_deva(word, scheme):
+    s = _SCHEMES[scheme]
+    out = []
+    pending = False  # last token was a consonant still waiting for its vowel
+    for token in s.tokenizer.findall(word):
+        if token in s.consonants:
+            if pending:
+                out.append(VIRAMA)
+            out.append(s.consonants[token])
+            pending = True
+        elif token in s.vowels:
+            out.append(s.matras[token] if pending else s.vowels[token])
+            pending = False
+        else:
+            if pending:
+                out.append(VIRAMA)
+            out.append(s.marks.get(token, token))
+            pending = False
+    if pending:
+        out.append(VIRAMA)
+    return "".join(out)
+
+
+@lru_cache(maxsize=65536)
+def _word_to_roman(word, scheme):
+    s = _SCHEMES[scheme]
+    out = []
+    pending = False  # consonant with its inherent "a" not yet written
+    for ch in unicodedata.normalize("NFD", word):
+        if ch == NUKTA:
+            continue
+        if ch == VIRAMA or ch in s.deva_matras:
+            out.append(s.roman.get(ch, ""))
+            pending = False
+            continue
+        if ch not in s.roman:
+            if VEDIC_MARKS.match(ch):
+                continue
+            if ch not in DEVA_PASSTHROUGH:
+                # Copying it would leave Devanagari in the roman text, which no key ever matches
+                raise TranslitError(f"no {scheme} spelling for U+{ord(ch):04X} {unicodedata.name(ch, '?')} in {word!r}")
+        if pending:
+            out.append("a")
+        out.append(s.roman.get(ch, ch))
+        pending = ch in s.deva_consonants
+    if pending:
+        out.append("a")
+    return "".join(out)
+
+
+def to_deva(text, scheme=KEY_SCHEME):
+    # Only roman letter runs are converted; spaces, digits and punctuation pass through
+    return _ROMAN_RUN.sub(lambda m: _word_to_deva(m.group(), scheme), text)
+
+
+def from_deva(text, scheme=KEY_SCHEME):
+    # Only Devanagari runs are converted, so English glosses in the same text survive.
+    # Accents the scheme cannot write are dropped; any other unknown sign raises TranslitError
+    return _DEVA_RUN.sub(lambda m: _word_to_roman(m.group(), scheme), text)
+
+
+def to_slp1(text):
+    return from_deva(text, "slp1")
+
+
+def strip_accents(deva):
+    return "".join(ch for ch in deva if ch not in ACCENTS)
+
+
+def split_key(key):
+    # "@akRSNakarman2" -> ("akRSNakarman", 2); "_" in keys stands for a space
+    m = _KEY.match(key)
+    return m.group("base").replace("_", " "), int(m.group("homonym") or 0)
+
+
+def deva_digits_to_ascii(text):
+    return text.translate({ord(d): str(i) for i, d in enumerate(DEVA_DIGITS)})
+
+
+# ---- Key table ----
+def shabda_rows(link_file):
+    with open(link_file, "r", encoding="utf-8") as f:
+        links = json.load(f)
+    for url in links:
+        key = url.rstrip("/").rsplit("/", 1)[1]
+        base, homonym = split_key(key)
+        yield "shabda", key, base, homonym, to_deva(base)
+
+
+def dhatu_rows(records_file):
+    # Heading is "०१.०००२ एधँ॒ वृद्धौ ..." -> key 01.0002, root एधँ॒
+    with open(records_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            parts = (json.loads(line).get("heading") or "").split()
+            if len(parts) < 2:
+                continue
+            root = parts[1]
+            yield "dhatu", deva_digits_to_ascii(parts[0]), from_deva(strip_accents(root)), 0, root
+
+
+class KeyIndex:
+    def __init__(self, rows):
+        # rows: (kind, key, roman base, homonym, devanagari); kept in input order
+        self.rows = list(dict.fromkeys(tuple(r) for r in rows))
+        self.by_key = {(kind, key): i for i, (kind, key, *_) in enumerate(self.rows)}
+        self._roman = sorted((base, homonym, i) for i, (_, _, base, homonym, _) in enumerate(self.rows))
+        self._deva = sorted((strip_accents(deva), homonym, i) for i, (*_, homonym, deva) in enumerate(self.rows))
+        self._roman_keys = [r[0] for r in self._roman]
+        self._deva_keys = [r[0] for r in self._deva]
+
+    @classmethod
+    def from_files(cls, shabda_link_file=SHABDA_LINK_FILE, dhatu_records=DHATU_RECORDS):
+        rows = []
+        if shabda_link_file and os.path.exists(shabda_link_file):
+            rows += shabda_rows(shabda_link_file)
+        if dhatu_records and os.path.exists(dhatu_records):
+            rows += dhatu_rows(dhatu_records)
+        return cls(rows)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            next(f)
+            return cls((kind, key, base, int(homonym), deva)
+                       for kind, key, base, homonym, deva in (line.rstrip("\n").split("\t") for line in f))
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"kind\tkey\t{KEY_SCHEME}\thomonym\tdevanagari\n")
+            for row in self.rows:
+                f.write("\t".join(map(str, row)) + "\n")
+        os.replace(tmp, path)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _row(self, i):
+        kind, key, base, homonym, deva = self.rows[i]
+        return {"kind": kind, "key": key, KEY_SCHEME: base, "homonym": homonym, "devanagari": deva}
+
+    def _search(self, text, scheme):
+        # Which sorted array to use, and the normalised query for it
+        text = unicodedata.normalize("NFC", text.strip())
+        if not is_devanagari(text) and scheme == KEY_SCHEME:
+            return self._roman, self._roman_keys, text
+        if not is_devanagari(text):
+            text = to_deva(text, scheme)
+        return self._deva, self._deva_keys, strip_accents(text)
+
+    def _filter(self, rows, kind):
+        return [self._row(i) for _, _, i in rows if kind is None or self.rows[i][0] == kind]
+
+    def lookup(self, text, kind=None, scheme=KEY_SCHEME):
+        # A link key ("@akSa1", "01.0002") gives its row; a word in either script its homonym group
+        for k in (kind,) if kind else KINDS:
+            if (k, text) in self.by_key:
+                return [self._row(self.by_key[(k, text)])]
+        rows, keys, query = self._search(text, scheme)
+        lo, hi = bisect.bisect_left(keys, query), bisect.bisect_right(keys, query)
+        return self._filter(rows[lo:hi], kind)
+
+    def prefix(self, text, limit=50, kind=None, scheme=KEY_SCHEME):
+        rows, keys, query = self._search(text, scheme)
+        lo = bisect.bisect_left(keys, query)
+        # "\U0010ffff" sorts after every continuation of the prefix
+        hi = bisect.bisect_left(keys, query + "\U0010ffff")
+        return self._filter(rows[lo:hi], kind)[:limit]
+
+    def devanagari(self, key, kind="shabda"):
+        i = self.by_key.get((kind, key))
+        return self.rows[i][4] if i is not None else None
+
+
+# ---- Batch conversion ----
+def convert_file(src, dst, direction="to-deva", scheme=KEY_SCHEME):
+    # Line by line, so file size doesn't matter; output is written atomically
+    convert = {"to-deva": to_deva, "from-deva": from_deva}[direction]
+    tmp = dst + ".tmp"
+    lines = 0
+    with open(src, "r", encoding="utf-8") as fin, open(tmp, "w", encoding="utf-8") as fout:
+        for line in fin:
+            fout.write(convert(line, scheme))
+            lines += 1
+    os.replace(tmp, dst)
+    return lines
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "table"
+    if command == "table":
+        out = sys.argv[2] if len(sys.argv) > 2 else KEY_TABLE_FILE
+        index = KeyIndex.from_files()
+        index.save(out)
+        print(f"🔤 Wrote {len(index)} keys → {out}")
+    elif command in ("lookup", "prefix"):
+        scheme = sys.argv[3] if len(sys.argv) > 3 else KEY_SCHEME
+        index = KeyIndex.load(KEY_TABLE_FILE) if os.path.exists(KEY_TABLE_FILE) else KeyIndex.from_files()
+        search = index.lookup if command == "lookup" else index.prefix
+        print(json.dumps(search(sys.argv[2], scheme=scheme), ensure_ascii=False, indent=2))
+    elif command in ("to-deva", "from-deva"):
+        scheme = sys.argv[4] if len(sys.argv) > 4 else KEY_SCHEME
+        lines = convert_file(sys.argv[2], sys.argv[3], command, scheme)
+        print(f"🔤 Converted {lines} lines {sys.argv[2]} → {sys.argv[3]} ({scheme})")
+    else:
+        print(f"Unknown command {command!r}: use table, lookup, prefix, to-deva or from-deva")